@@ -0,0 +1,238 @@
+import os
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+
+import general_settings
+
+from multiprocessing import current_process
+from termcolor import cprint
+
+# Модули, которые проходят целиком на локальном сервере (без Contract.from_address и реальных мостов)
+BENCHMARK_ROUTE = ['swap_jediswap', 'swap_myswap', 'swap_avnu']
+BENCHMARK_SETTINGS = {
+    'SOFTWARE_MODE': 1,
+    'WALLETS_TO_WORK': 0,
+    'SHUFFLE_WALLETS': False,
+    'SAVE_PROGRESS': True,
+    'SLEEP_MODE': False,
+    'TELEGRAM_NOTIFICATIONS': False,
+    'USE_PROXY': False,
+    'MOBILE_PROXY': False,
+    'GLOBAL_NETWORK': 9,
+    'METRICS_PORT': 0,
+    'METRICS_TEXTFILE': '',
+    'SHARD_WORKERS': 0,
+    'JOB_QUEUE_URL': '',
+}
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='Runs synthetic accounts through Runner against a local stand-in '
+                                                 'JSON-RPC/API server and reports throughput')
+    parser.add_argument('--accounts', type=int, default=20, help='number of synthetic accounts')
+    parser.add_argument('--stream', type=int, default=0, help='accounts in one stream (0 - all accounts at once)')
+    parser.add_argument('--route', nargs='+', default=BENCHMARK_ROUTE, help='module names for every account')
+    parser.add_argument('--latency', type=float, nargs=2, default=(50, 150), metavar=('MIN_MS', 'MAX_MS'),
+                        help='stand-in server response latency')
+    parser.add_argument('--error-rate', type=float, default=0, help='share of requests answered with an error')
+    parser.add_argument('--error-kinds', nargs='+', default=['rpc', 'http_503'],
+                        choices=['rpc', 'http_503', 'http_429'], help='kinds of injected errors')
+    parser.add_argument('--block-time', type=float, default=6, help='seconds between stand-in blocks')
+    parser.add_argument('--eth-price', type=float, default=2500, help='ETH price returned by the CoinGecko stub')
+    parser.add_argument('--seed', type=int, default=1, help='seed for synthetic private keys')
+    parser.add_argument('--json', dest='json_path', default='', help='save the report as JSON to this path')
+    return parser.parse_args()
+
+
+def prepare_settings(args, work_dir: str):
+    # Настройки подменяются до первого импорта модулей проекта, так как они читаются через from ... import
+    for name, value in BENCHMARK_SETTINGS.items():
+        setattr(general_settings, name, value)
+    general_settings.ACCOUNTS_IN_STREAM = args.stream or args.accounts
+    general_settings.TRACE_FILE = os.path.join(work_dir, 'trace.json')
+
+    # config.py не читает таблицу аккаунтов и цену ETH вне MainProcess
+    current_process().name = 'StandInBenchmark'
+
+    import config
+    from starknet_py.constants import EC_ORDER
+
+    rng = random.Random(args.seed)
+    config.ETH_PRICE = args.eth_price
+    config.ACCOUNT_NAMES.extend(f'bench_{index}' for index in range(1, args.accounts + 1))
+    config.PRIVATE_KEYS.extend(hex(rng.randrange(1, EC_ORDER)) for _ in range(args.accounts))
+    config.PRIVATE_KEYS_EVM.extend(f'0x{rng.getrandbits(256):064x}' for _ in range(args.accounts))
+
+
+def prepare_work_dir(work_dir: str, account_names: list, route: list):
+    os.makedirs(os.path.join(work_dir, 'data', 'services'))
+    with open(os.path.join(work_dir, 'data', 'services', 'wallets_progress.json'), 'w') as file:
+        json.dump({str(account_name): {"current_step": 0, "route": route} for account_name in account_names}, file,
+                  indent=4)
+    os.chdir(work_dir)
+
+
+def patch_networks(server):
+    from utils import networks
+
+    for network in vars(networks).values():
+        if isinstance(network, networks.Network):
+            network.rpc = [server.get_rpc_url(network)]
+
+
+def patch_client_session(server):
+    # Все HTTP-запросы софта уходят на локальный сервер и помечаются дорожкой трейса (аккаунтом)
+    from aiohttp import ClientSession
+    from utils.tracing import TRACE_TRACK
+    from utils.stand_in_server import STAND_IN_TRACK_HEADER
+
+    original_request = ClientSession._request
+
+    async def request(session, method, str_or_url, **kwargs):
+        url = server.get_local_url(str(str_or_url)) or str_or_url
+        track = TRACE_TRACK.get()
+        if track is not None:
+            kwargs['headers'] = dict(kwargs.get('headers') or {}) | {STAND_IN_TRACK_HEADER: track}
+        return await original_request(session, method, url, **kwargs)
+
+    ClientSession._request = request
+
+
+def get_percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+def build_report(server, wall_time: float, args) -> dict:
+    from utils.tracing import TRACER
+
+    track_names = {track_id: track_name for track_name, track_id in TRACER.tracks.items()}
+    module_spans: dict[str, list[tuple]] = {}
+    modules: dict[str, dict] = {}
+    routes = 0
+
+    for event in TRACER.events:
+        if event['ph'] != 'X':
+            continue
+        if event['cat'] == 'route':
+            routes += 1
+        elif event['cat'] == 'module':
+            track_name = track_names[event['tid']]
+            module_spans.setdefault(track_name, []).append((event['ts'], event['ts'] + event['dur'], event['name']))
+
+            module = modules.setdefault(event['name'], {'runs': 0, 'success': 0, 'durations': [], 'calls': {}})
+            module['runs'] += 1
+            module['success'] += event['args'].get('result') == 'True'
+            module['durations'].append(event['dur'] / 1_000_000)
+
+    outside_calls = {}
+    for track_name, moment, call_name in server.calls:
+        timestamp = TRACER.get_timestamp(moment)
+        calls = outside_calls
+        for started_at, finished_at, module_name in module_spans.get(track_name, []):
+            if started_at <= timestamp <= finished_at:
+                calls = modules[module_name]['calls']
+                break
+        calls[call_name] = calls.get(call_name, 0) + 1
+
+    return {
+        'accounts': args.accounts,
+        'route': args.route,
+        'routes_finished': routes,
+        'wall_time': round(wall_time, 3),
+        'accounts_per_hour': round(routes / wall_time * 3600, 1) if wall_time else 0,
+        'requests': len(server.calls),
+        'injected_errors': server.errors,
+        'modules': {
+            module_name: {
+                'runs': module['runs'],
+                'success': module['success'],
+                'p50': round(get_percentile(module['durations'], 50), 3),
+                'p99': round(get_percentile(module['durations'], 99), 3),
+                'calls_per_run': round(sum(module['calls'].values()) / module['runs'], 1),
+                'calls': dict(sorted(module['calls'].items(), key=lambda item: -item[1])),
+            } for module_name, module in modules.items()
+        },
+        'outside_module_calls': dict(sorted(outside_calls.items(), key=lambda item: -item[1])),
+    }
+
+
+def print_report(report: dict):
+    print()
+    cprint(f'Accounts: {report["routes_finished"]}/{report["accounts"]} | Wall time: {report["wall_time"]} s | '
+           f'Accounts/hour: {report["accounts_per_hour"]} | Requests: {report["requests"]} | '
+           f'Injected errors: {report["injected_errors"] or 0}', 'light_green')
+    print()
+    print(f'{"Module":<28}{"Runs":>6}{"OK":>6}{"p50, s":>10}{"p99, s":>10}{"Calls/run":>12}')
+    for module_name, module in report['modules'].items():
+        print(f'{module_name:<28}{module["runs"]:>6}{module["success"]:>6}{module["p50"]:>10}{module["p99"]:>10}'
+              f'{module["calls_per_run"]:>12}')
+
+    for module_name, module in report['modules'].items():
+        print(f'\n{module_name}:')
+        for call_name, count in module['calls'].items():
+            print(f'    {call_name:<40}{count:>8}')
+
+    if report['outside_module_calls']:
+        print('\nOutside modules:')
+        for call_name, count in report['outside_module_calls'].items():
+            print(f'    {call_name:<40}{count:>8}')
+
+
+async def run_benchmark(args) -> dict:
+    from config import LAYERSWAP_CHAIN_NAME
+    from utils.modules_runner import Runner
+    from utils.stand_in_server import StandInServer
+
+    server = StandInServer(
+        latency=(args.latency[0] / 1000, args.latency[1] / 1000), error_rate=args.error_rate,
+        error_kinds=tuple(args.error_kinds), block_time=args.block_time, eth_price=args.eth_price,
+        layerswap_networks=list(LAYERSWAP_CHAIN_NAME.values())
+    )
+    await server.start()
+    try:
+        patch_networks(server)
+        patch_client_session(server)
+
+        started_at = time.perf_counter()
+        await Runner().run_accounts(smart_route=False)
+        wall_time = time.perf_counter() - started_at
+    finally:
+        await server.stop()
+
+    return build_report(server, wall_time, args)
+
+
+def main():
+    args = get_args()
+    start_dir = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix='starkmachine_bench_')
+
+    prepare_settings(args, work_dir)
+
+    from config import ACCOUNT_NAMES
+    from utils.crypto_executor import CRYPTO_EXECUTOR
+
+    prepare_work_dir(work_dir, ACCOUNT_NAMES, args.route)
+    try:
+        report = asyncio.run(run_benchmark(args))
+    finally:
+        CRYPTO_EXECUTOR.shutdown()
+        os.chdir(start_dir)
+
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, 'w') as file:
+            json.dump(report, file, indent=4)
+    cprint(f'\nTrace and working files: {work_dir}', 'light_cyan')
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,15 @@
 from modules import *
 from utils.networks import *
+from utils.tracing import TRACER
+from utils.profiler import PROFILER
 from general_settings import GLOBAL_NETWORK
 
 
 def get_client(account_name, private_key, network, proxy, bridge_from_evm:bool = False) -> Client | StarknetClient:
-    if GLOBAL_NETWORK != 9 or bridge_from_evm:
-        return Client(account_name, private_key, network, proxy)
-    return StarknetClient(account_name, private_key, network, proxy)
+    with TRACER.span('client init', network=network.name):
+        if GLOBAL_NETWORK != 9 or bridge_from_evm:
+            return Client(account_name, private_key, network, proxy)
+        return StarknetClient(account_name, private_key, network, proxy)
 
 
 def get_interface_by_chain_id(chain_id, deposit_module:bool = False):
@@ -291,3 +294,6 @@ async def bingx_withdraw_util(current_client, **kwargs):
 async def binance_withdraw_util(current_client, **kwargs):
     worker = Binance(current_client)
     return await worker.withdraw(**kwargs)
+
+
+PROFILER.wrap_functions(globals())
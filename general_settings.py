@@ -45,6 +45,8 @@ SHUFFLE_ROUTE = False           # Перемешивает маршрут пер
 BREAK_ROUTE = False             # Прекращает выполнение маршрута, если произойдет ошибка
 SAVE_PROGRESS = True            # True или False | Включает сохранение прогресса аккаунта для Classic-routes
 TELEGRAM_NOTIFICATIONS = False  # True или False | Включает уведомления в Telegram
+TELEGRAM_DIGEST_INTERVAL = 300  # Как часто (сек) отправлять сводку успешных аккаунтов. Отчеты с ошибками - сразу
+TELEGRAM_DIGEST_SIZE = 20       # Максимальное количество аккаунтов в одной сводке
 
 '------------------------------------------------SLEEP CONTROL---------------------------------------------------------'
 SLEEP_MODE = False              # True или False | Включает сон после каждого модуля и аккаунта
@@ -60,7 +62,11 @@ GAS_MULTIPLIER = 1.5            # Множитель газа для транз
 
 '------------------------------------------------RETRY CONTROL---------------------------------------------------------'
 MAXIMUM_RETRY = 20              # Количество повторений при ошибках
-SLEEP_TIME_RETRY = (1, 1)       # (минимум, максимум) секунд | Время сна после очередного повторения
+SLEEP_TIME_RETRY = (1, 1)       # (минимум, максимум) секунд | Время сна после первой ошибки, дальше растет в 2 раза
+RETRY_MAX_SLEEP = 60            # Максимальное время сна между повторениями (сек)
+MODULE_TIME_BUDGET = 1800       # Максимальное время работы модуля с повторениями (сек). 0 - без ограничения
+CIRCUIT_BREAKER_ERRORS = 5      # Количество ошибок подряд у сервиса (RPC, API), после которых он считается недоступным
+CIRCUIT_BREAKER_TIMEOUT = 60    # Сколько секунд все аккаунты сразу получают отказ от недоступного сервиса
 
 '------------------------------------------------PROXY CONTROL---------------------------------------------------------'
 USE_PROXY = False                # True или False | Включает использование прокси
@@ -68,6 +74,31 @@ MOBILE_PROXY = False             # True или False | Включает испо
 MOBILE_PROXY_URL_CHANGER = ['',
                             '',
                             '']  # ['link1', 'link2'..] | Ссылки для смены IP
+PROXY_MAX_ACCOUNTS = 5          # Сколько модулей одновременно могут работать через один прокси. 0 - без ограничения
+PROXY_CHECK_INTERVAL = 60       # Как часто (сек) проверять прокси в фоне
+PROXY_CHECK_TIMEOUT = 10        # Таймаут проверки прокси (сек)
+PROXY_MAX_FAILURES = 3          # После скольких неудачных проверок подряд аккаунты переводятся на другой прокси
+
+'----------------------------------------------PERFORMANCE CONTROL-----------------------------------------------------'
+CRYPTO_WORKERS = 0              # Количество процессов для подписей и расчета адресов. 0 - по количеству ядер
+CEX_WITHDRAW_WORKERS = 2        # Количество одновременных запросов на вывод к одной бирже
+CEX_WITHDRAW_INTERVAL = 3       # Минимальная пауза между выводами с одной биржи (сек)
+BALANCE_WATCHER_INTERVAL = 15   # Интервал общей проверки балансов при ожидании поступления средств (сек)
+BALANCE_WATCHER_BATCH_SIZE = 50 # Максимум запросов в одной пачке к RPC при общей проверке балансов
+BALANCE_CACHE_TTL = 0           # Время жизни общего кэша балансов и цен при поиске баланса по сетям (сек). 0 - без кэша
+METRICS_PORT = 0                # Порт локального эндпоинта метрик Prometheus (http://127.0.0.1:PORT/metrics). 0 - выкл
+METRICS_TEXTFILE = ''           # Путь к .prom файлу для textfile-коллектора node_exporter. '' - не записывать
+METRICS_TEXTFILE_INTERVAL = 15  # Как часто обновлять .prom файл (сек)
+TRACE_FILE = ''                 # Путь к JSON-трейсу запуска (Chrome trace, открывается в ui.perfetto.dev). '' - выкл
+CASSETTE_MODE = ''              # 'record' - записывать все HTTP/RPC запросы, 'replay' - отвечать из записи. '' - выкл
+CASSETTE_FILE = './data/services/cassette.jsonl.gz'  # Файл записи запросов и ответов
+CASSETTE_LATENCY_SCALE = 1      # Множитель задержек при воспроизведении. 1 - как при записи, 0 - без задержек
+PROFILE_DIR = ''                # Папка для отчета профилировщика модулей и стеков для flamegraph. '' - выкл
+HOST_RATE_LIMITS = {}           # Свои лимиты запросов к RPC и API: {'хост': (запросов в секунду, размер пачки)}
+SHARD_WORKERS = 0               # Количество процессов, между которыми делятся кошельки. 0 или 1 - один процесс
+JOB_QUEUE_URL = ''              # Общая очередь кошельков для нескольких процессов и машин: 'sqlite://путь/jobs.db'
+JOB_LEASE_TIME = 600            # На сколько секунд кошелек закрепляется за процессом, если тот перестал отвечать
+JOB_HEARTBEAT_INTERVAL = 60     # Как часто (сек) процесс продлевает аренду своих кошельков
 
 '-----------------------------------------------SLIPPAGE CONTROL-------------------------------------------------------'
 SLIPPAGE = 2                    # 0.54321 = 0.54321%, 1 = 1% | Slippage, на сколько % вы готовы получить меньше
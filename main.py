@@ -7,6 +7,7 @@ from questionary import Choice, select
 
 from modules.interfaces import SoftwareException
 from utils.modules_runner import Runner
+from utils.crypto_executor import CRYPTO_EXECUTOR
 from utils.route_generator import RouteGenerator
 from utils.tools import create_cex_withdrawal_list, drop_date, clean_stark_file, check_progress_file
 
@@ -97,6 +98,9 @@ def main():
         cprint(f'\n{error}', color='light_red')
         sys.exit()
 
+    finally:
+        CRYPTO_EXECUTOR.shutdown()
+
 
 if __name__ == "__main__":
     main()
@@ -6,7 +6,6 @@ import time
 from modules import Blockchain, Logger, Bridge
 from utils.tools import helper, gas_checker
 from starknet_py.hash.selector import get_selector_from_name
-from utils.stark_signature.stark_deployer import BraavosCurveSigner
 from general_settings import TRANSFER_AMOUNT
 from settings import NATIVE_WITHDRAW_AMOUNT
 from config import (NATIVE_CONTRACTS_PER_CHAIN, SPACESHARD_CONTRACT, TOKENS_PER_CHAIN,
@@ -152,12 +151,6 @@ class Starknet(Blockchain, Logger, Bridge):
         await self.client.initialize_account(check_balance=True)
 
         if self.client.WALLET_TYPE:
-            self.client.account.signer = BraavosCurveSigner(
-                account_address=self.client.account.address,
-                key_pair=self.client.key_pair,
-                chain_id=self.client.chain_id
-            )
-
             class_hash = BRAAVOS_PROXY_CLASS_HASH
             salt = [self.client.key_pair.public_key]
             selector = get_selector_from_name("initializer")
@@ -171,15 +164,11 @@ class Starknet(Blockchain, Logger, Bridge):
             class_hash = ARGENT_IMPLEMENTATION_CLASS_HASH_NEW
             constructor_calldata = [self.client.key_pair.public_key, 0]
 
-        signed_tx = await self.client.account.sign_deploy_account_transaction(
+        tx_hash = (await self.client.deploy_account(
             class_hash=class_hash,
-            contract_address_salt=self.client.key_pair.public_key,
             constructor_calldata=constructor_calldata,
-            nonce=0,
-            auto_estimate=True
-        )
-
-        tx_hash = (await self.client.account.client.deploy_account(signed_tx)).transaction_hash
+            braavos_deploy=bool(self.client.WALLET_TYPE)
+        )).transaction_hash
         return await self.client.send_transaction(check_hash=True, hash_for_check=tx_hash)
 
     @helper
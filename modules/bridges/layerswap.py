@@ -1,10 +1,15 @@
 import json
+import asyncio
 
 from config import TOKENS_PER_CHAIN
 from modules import Bridge, Logger
 from general_settings import GLOBAL_NETWORK
 from modules.interfaces import BridgeExceptionWithoutRetry
 from utils.tools import gas_checker, helper
+from utils.tx_journal import TX_JOURNAL
+
+LAYERSWAP_FINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled', 'refunded')
+LAYERSWAP_STATUS_INTERVAL = 30  # Как часто (сек) проверять статус свопа после перезапуска
 
 
 class LayerSwap(Bridge, Logger):
@@ -20,7 +25,7 @@ class LayerSwap(Bridge, Logger):
             'Content-Type': 'application/json'
         }
 
-        return (await self.make_request(url=url, headers=headers))['data']
+        return (await self.make_request(url=url, headers=headers, singleflight='bridge_networks'))['data']
 
     async def get_swap_rate(self, source_chain, destination_chain, source_asset, destination_asset, refuel):
         url = "https://api.layerswap.io/api/swap_rate"
@@ -53,6 +58,21 @@ class LayerSwap(Bridge, Logger):
         return (await self.make_request(method='POST', url=url, headers=self.headers,
                                         data=json.dumps(create_swap_data)))['data']
 
+    async def get_swap_status(self, swap_id) -> str:
+        url = f"https://api.layerswap.io/api/swaps/{swap_id}"
+
+        return (await self.make_request(url=url, headers=self.headers))['data']['status']
+
+    async def wait_for_swap(self, swap_id, timeout: int = 1200) -> bool:
+        for _ in range(max(1, timeout // LAYERSWAP_STATUS_INTERVAL)):
+            status = await self.get_swap_status(swap_id)
+            if status in LAYERSWAP_FINAL_STATUSES:
+                self.logger_msg(self.client.account_name, None, msg=f"LayerSwap swap {swap_id} status: {status}",
+                                type_msg='success' if status == 'completed' else 'error')
+                return status == 'completed'
+            await asyncio.sleep(LAYERSWAP_STATUS_INTERVAL)
+        return True
+
     async def create_tx(self, swap_id):
         url = f"https://api.layerswap.io/api/swaps/{swap_id}/prepare_src_transaction"
 
@@ -116,6 +136,7 @@ class LayerSwap(Bridge, Logger):
 
                     if source_chain == 'STARKNET_MAINNET' and destination_chain != 'STARKNET_MAINNET':
                         swap_id = await self.get_swap_id(amount, dst_address, *data)
+                        TX_JOURNAL.record('layerswap_swap', swap_id=swap_id['swap_id'])
 
                         tx_data = await self.create_tx(swap_id['swap_id'])
 
@@ -143,6 +164,7 @@ class LayerSwap(Bridge, Logger):
                                                                             stark_key_type=True)
 
                         swap_id = await self.get_swap_id(amount, dst_address, *data)
+                        TX_JOURNAL.record('layerswap_swap', swap_id=swap_id['swap_id'])
 
                         tx_data = await self.create_tx(swap_id['swap_id'])
 
@@ -10,17 +10,21 @@ from web3 import AsyncWeb3
 
 
 class Orbiter(Bridge, Logger):
+    MAKERS_DATA: dict[str, dict] = {}
+
     def __init__(self, client):
         self.client = client
         Logger.__init__(self)
         Bridge.__init__(self, client)
 
-    @staticmethod
-    def get_maker_data(from_id:int, to_id:int, token_name: str):
+    @classmethod
+    def get_maker_data(cls, from_id:int, to_id:int, token_name: str):
 
         path = random.choice(['orbiter_maker1.json', 'orbiter_maker2.json'])
-        with open(f'./data/services/{path}') as file:
-            data = json.load(file)
+        if path not in cls.MAKERS_DATA:
+            with open(f'./data/services/{path}') as file:
+                cls.MAKERS_DATA[path] = json.load(file)
+        data = cls.MAKERS_DATA[path]
 
         maker_data = data[f"{from_id}-{to_id}"][f"{token_name}-{token_name}"]
 
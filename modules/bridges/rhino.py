@@ -1,6 +1,4 @@
-import os
 import time
-import json
 import base64
 import random
 import asyncio
@@ -10,11 +8,13 @@ from modules import Bridge, Logger
 from datetime import datetime, timezone
 
 from general_settings import GLOBAL_NETWORK
-from modules.interfaces import BridgeExceptionWithoutRetry
+from modules.interfaces import BridgeExceptionWithoutRetry, RateLimitException, CircuitOpenException
 from utils.tools import gas_checker, sleep
 from eth_account.messages import encode_defunct
-from utils.stark_signature.stark_singature import sign, pedersen_hash, EC_ORDER, private_to_stark_key
-from utils.stark_signature.eth_coder import encrypt_with_public_key, decrypt_with_private_key, get_public_key
+from utils.crypto_executor import CRYPTO_EXECUTOR
+from utils.rhino_session import RhinoSession
+from utils.tx_journal import TX_JOURNAL
+from utils.stark_signature.stark_singature import EC_ORDER, private_to_stark_key
 
 REGISTER_DATA = {
     "types": {
@@ -47,6 +47,7 @@ class Rhino(Bridge, Logger):
 
         self.nonce, self.signature = None, None
         self.evm_client = None
+        self.session: RhinoSession | None = None
 
     def get_authentication_data(self):
         date = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S")
@@ -90,38 +91,60 @@ class Rhino(Bridge, Logger):
 
         return f"0{hex(stark_key)[2:]}"
 
-    def create_dtk(self):
-        dtk = os.urandom(32).hex()
+    async def create_dtk(self):
+        return await CRYPTO_EXECUTOR.create_rhino_dtk(self.evm_client.private_key, REGISTER_DATA)
 
-        sing_data = self.evm_client.w3.eth.account.sign_typed_data(self.evm_client.private_key,
-                                                                   full_message=REGISTER_DATA).signature
+    def update_authentication_data(self, renew: bool = False):
+        auth_data = None if renew else self.session.get_auth()
+        self.nonce, self.signature = auth_data or self.session.set_auth(*self.get_authentication_data())
 
-        encryption_key = self.evm_client.w3.keccak(f"{sing_data.hex()}".encode('utf-8'))
-
-        public_key = get_public_key(encryption_key).hex()
-
-        encrypted_message = encrypt_with_public_key(public_key, json.dumps({"data": dtk}))
-
-        return dtk, encrypted_message
+    async def make_request(self, method:str = 'GET', url:str = None, headers:dict = None, params: dict = None,
+                           data:str = None, json:dict = None, singleflight:str = None):
+        # Подпись входа хранится в сессии до RHINO_AUTH_TTL, но API может отозвать ее раньше,
+        # поэтому запрос с подписью один раз повторяется с новой
+        try:
+            return await super().make_request(method, url, headers, params, data, json, singleflight)
+        except (RateLimitException, CircuitOpenException):
+            raise
+        except Exception as error:
+            json_auth = bool(json and 'signature' in json)
+            header_auth = bool(headers and 'Authorization' in headers)
+            if not (json_auth or header_auth):
+                raise
+
+            self.logger_msg(*self.client.acc_info, msg=f"Rhino rejected request, renewing authentication. "
+                                                       f"Error: {error}", type_msg='warning')
+            self.update_authentication_data(renew=True)
+            json = json | {'nonce': self.nonce, 'signature': self.signature} if json_auth else json
+            headers = self.make_headers() if header_auth else headers
+            return await super().make_request(method, url, headers, params, data, json, singleflight)
 
     async def get_user_config(self):
+        user_config = self.session.get_user_config()
+        if user_config:
+            return user_config
 
         url = "https://api.rhino.fi/v1/trading/r/getUserConf"
 
-        data = {
-            'nonce': self.nonce,
-            'signature': self.signature
-        }
-
         while True:
+            data = {
+                'nonce': self.nonce,
+                'signature': self.signature
+            }
+
             try:
-                data = await self.make_request(method='POST', url=url, headers=self.headers, json=data)
-                return data
+                user_config = await self.make_request(method='POST', url=url, headers=self.headers, json=data)
+                self.session.set_user_config(user_config)
+                return user_config
             except:
                 self.logger_msg(*self.client.acc_info, msg=f"Get bad API data", type_msg='warning')
+                self.update_authentication_data(renew=True)
                 await asyncio.sleep(5)
 
     async def get_vault_id(self):
+        vault_id = self.session.get('vault_id')
+        if vault_id is not None:
+            return vault_id
 
         url = "https://api.rhino.fi/v1/trading/r/getVaultId"
 
@@ -131,14 +154,17 @@ class Rhino(Bridge, Logger):
             'token': 'ETH'
         }
 
-        return await self.make_request(method='POST', url=url, headers=self.headers, json=data)
+        return self.session.set('vault_id', await self.make_request(
+            method='POST', url=url, headers=self.headers, json=data
+        ))
 
     async def reg_new_acc(self):
 
         url = 'https://api.rhino.fi/v1/trading/w/register'
 
-        dtk, encrypted_trading_key = self.create_dtk()
+        dtk, encrypted_trading_key = await self.create_dtk()
         stark_public_key_x = self.create_stark_key(dtk)
+        self.session.set('dtk', dtk)
 
         data = {
             "encryptedTradingKey": {
@@ -174,16 +200,20 @@ class Rhino(Bridge, Logger):
         return await self.make_request(method='POST', url=url, headers=self.headers, json=data)
 
     async def recover_dtk(self):
-        encrypted_trading_key = (await self.recover_trading_key())['encryptedTradingKey']
-        sing_data = self.evm_client.w3.eth.account.sign_typed_data(self.evm_client.private_key,
-                                                                   full_message=REGISTER_DATA).signature
-        encryption_private_key = self.evm_client.w3.keccak(f"{sing_data.hex()}".encode('utf-8')).hex()
+        dtk = self.session.get('dtk')
+        if dtk:
+            return dtk
 
-        dtk = decrypt_with_private_key(encryption_private_key, encrypted_trading_key)
+        encrypted_trading_key = (await self.recover_trading_key())['encryptedTradingKey']
 
-        return json.loads(dtk)['data']
+        return self.session.set('dtk', await CRYPTO_EXECUTOR.recover_rhino_dtk(
+            self.evm_client.private_key, REGISTER_DATA, encrypted_trading_key
+        ))
 
     async def get_vault_id_and_stark_key(self, deversifi_address):
+        vault_data = self.session.get_receiver_vault(deversifi_address)
+        if vault_data:
+            return vault_data
 
         url = "https://api.rhino.fi/v1/trading/r/vaultIdAndStarkKey"
 
@@ -194,7 +224,9 @@ class Rhino(Bridge, Logger):
             "targetEthAddress": deversifi_address,
         }
 
-        return await self.make_request(method="GET", url=url, headers=headers, params=params)
+        return self.session.set_receiver_vault(deversifi_address, await self.make_request(
+            method="GET", url=url, headers=headers, params=params
+        ))
 
     async def get_user_balance(self):
 
@@ -227,13 +259,9 @@ class Rhino(Bridge, Logger):
         packed_message = (packed_message << 31) + int(tx_nonce)
         packed_message = (packed_message << 22) + int(expiration_timestamp)
 
-        msg_hash = pedersen_hash(pedersen_hash(int(token_address, 16), int(receiver_public_key, 16)),
-                                 int(packed_message))
+        dtk = await self.recover_dtk()
 
-        stark_dtk_private_key = int(await self.recover_dtk(), 16) % EC_ORDER
-
-        tx_signature = sign(msg_hash=msg_hash, priv_key=stark_dtk_private_key)
-        return hex(tx_signature[0]), hex(tx_signature[1])
+        return await CRYPTO_EXECUTOR.sign_rhino_transfer(dtk, token_address, receiver_public_key, packed_message)
 
     @gas_checker
     async def deposit_to_rhino(self, amount, source_chain_info, chain_from_name:str, chain_to_name, private_keys):
@@ -323,7 +351,18 @@ class Rhino(Bridge, Logger):
             "isBridge": False,
         }
 
-        await self.make_request(method='POST', url=url, headers=headers, json=payload)
+        response = await self.make_request(method='POST', url=url, headers=headers, json=payload)
+        TX_JOURNAL.record('rhino_withdrawal', id=response.get('_id') if isinstance(response, dict) else None,
+                          nonce=payload_nonce)
+
+    def is_deposit_journaled(self) -> bool:
+        # Депозит из прошлого запуска уже подтвержден: средства на Rhino, осталось только вывести их
+        entries = TX_JOURNAL.get_entries()
+        deposit_index = max((index for index, entry in enumerate(entries) if entry['kind'] == 'rhino_deposit'),
+                            default=None)
+        if deposit_index is None:
+            return False
+        return any(entry['kind'] == 'tx_status' and entry['status'] for entry in entries[deposit_index + 1:])
 
     async def bridge(
             self, chain_from_id:int, private_keys:dict = None, bridge_data:tuple = None, need_fee:bool = False
@@ -342,7 +381,8 @@ class Rhino(Bridge, Logger):
             if need_fee:
                 return round(float(amount + 0.00066), 5)
 
-            self.nonce, self.signature = self.get_authentication_data()
+            self.session = RhinoSession(self.evm_client.address, self.evm_client.private_key)
+            self.update_authentication_data()
             self.logger_msg(*self.client.acc_info, msg=f"Check previous registration on Rhino")
 
             rhino_user_config = await self.get_user_config()
@@ -365,7 +405,12 @@ class Rhino(Bridge, Logger):
 
                 old_balance_on_dst = await self.client.wait_for_receiving(to_chain_id, check_balance_on_dst=True)
 
-                await self.deposit_to_rhino(amount, source_chain_info, chain_from_name, chain_to_name, private_keys)
+                if self.is_deposit_journaled():
+                    self.logger_msg(*self.client.acc_info, msg=f"Deposit to Rhino was already confirmed, skipping it")
+                else:
+                    TX_JOURNAL.record('rhino_deposit', amount=amount, chain_from_name=chain_from_name)
+                    await self.deposit_to_rhino(amount, source_chain_info, chain_from_name, chain_to_name,
+                                                private_keys)
 
                 dst_address = await self.get_address_for_bridge(private_keys['evm_key'], False)
                 if chain_to_name == 'STARKNET':
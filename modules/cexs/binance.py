@@ -1,3 +1,4 @@
+import re
 import asyncio
 import hmac
 import time
@@ -40,6 +41,14 @@ class Binance(CEX, Logger):
         except Exception as error:
             raise SoftwareExceptionWithoutRetry(f'Bad signature for BingX request: {error}')
 
+    async def sign_request(self, method: str, url: str, headers: dict, data: str = None, params: dict = None):
+        if '&signature=' not in url:
+            return url, headers
+
+        base_url, query = url.split('?', 1)
+        query = re.sub(r'timestamp=\d+', f'timestamp={int(time.time() * 1000)}', query.split('&signature=')[0])
+        return f"{base_url}?{query}&signature={self.get_sign(query)}", headers
+
     async def get_balance(self, ccy: str):
         path = '/openApi/spot/v1/account/balance'
 
@@ -66,14 +75,17 @@ class Binance(CEX, Logger):
         parse_params = self.parse_params(params)
 
         url = f"{self.api_url}{path}?{parse_params}&signature={self.get_sign(parse_params)}"
-        data = await self.make_request(url=url, headers=self.headers, module_name='Token info')
+        data = await self.make_request(url=url, headers=self.headers, module_name='Token info', weight=10,
+                                       singleflight='cex_currencies', singleflight_key=path)
         return [item for item in data if item['coin'] == ccy]
 
+    async def get_networks_data(self, ccy: str):
+        return {item['network']: item for item in (await self.get_currencies(ccy))[0]['networkList']}
+
     @helper
     async def withdraw(self, want_balance:float = 0, withdraw_data:tuple = None, transfer_mode:bool = False):
         if GLOBAL_NETWORK == 9:
             await self.client.initialize_account(check_balance=True)
-        await self.get_currencies('ETH')
 
         path = '/sapi/v1/capital/withdraw/apply'
 
@@ -82,19 +94,10 @@ class Binance(CEX, Logger):
         ccy, network_name = network_raw_name.split('-')
 
         dst_chain_id = CEX_WRAPPED_ID[network_id]
-        withdraw_data = (await self.get_currencies(ccy))[0]['networkList']
+        network_data = await self.get_network_data(ccy, network_name)
 
         amount = want_balance if want_balance else await self.client.get_smart_amount(amount)
 
-        network_data = {
-            item['network']: {
-                'withdrawEnable': item['withdrawEnable'],
-                'withdrawFee': item['withdrawFee'],
-                'withdrawMin': item['withdrawMin'],
-                'withdrawMax': item['withdrawMax']
-            } for item in withdraw_data
-        }[network_name]
-
         self.logger_msg(
             *self.client.acc_info, msg=f"Withdraw {amount:.5f} {ccy} to {network_name}")
 
@@ -111,19 +114,22 @@ class Binance(CEX, Logger):
                     "network": network_name,
                 }
 
-                parse_params = self.parse_params(params)
+                async def send_withdraw():
+                    parse_params = self.parse_params(params)
+                    url = f"{self.api_url}{path}?{parse_params}&signature={self.get_sign(parse_params)}"
+                    return (await self.make_request(method='POST', url=url, headers=self.headers,
+                                                    module_name='Withdraw'))['id']
 
                 ccy = f"{ccy}.e" if network_id in [30, 31] else ccy
 
                 old_balance_on_dst = await self.client.wait_for_receiving(dst_chain_id, token_name=ccy,
                                                                           check_balance_on_dst=True)
 
-                url = f"{self.api_url}{path}?{parse_params}&signature={self.get_sign(parse_params)}"
-
-                await self.make_request(method='POST', url=url, headers=self.headers, module_name='Withdraw')
+                withdraw_id = await self.submit_withdraw(send_withdraw)
 
                 self.logger_msg(*self.client.acc_info,
-                                msg=f"Withdraw complete. Note: wait a little for receiving funds", type_msg='success')
+                                msg=f"Withdraw complete (id: {withdraw_id}). Note: wait a little for receiving funds",
+                                type_msg='success')
 
                 await self.client.wait_for_receiving(dst_chain_id, old_balance_on_dst, token_name=ccy)
 
@@ -139,7 +145,6 @@ class Binance(CEX, Logger):
         parse_params = self.parse_params()
         url = f"{self.api_url}{path}?{parse_params}&signature={self.get_sign(parse_params)}"
 
-        await asyncio.sleep(2)
         return await self.make_request(url=url, headers=self.headers, module_name='Get subAccounts list')
 
     async def get_sub_balance(self, sub_email):
@@ -152,9 +157,8 @@ class Binance(CEX, Logger):
         parse_params = self.parse_params(params)
         url = f"{self.api_url}{path}?{parse_params}&signature={self.get_sign(parse_params)}"
 
-        await asyncio.sleep(2)
         return await self.make_request(url=url, params=params, headers=self.headers,
-                                       module_name='Get subAccount balance')
+                                       module_name='Get subAccount balance', weight=60)
 
     async def get_main_balance(self):
         path = '/sapi/v3/asset/getUserAsset'
@@ -162,9 +166,8 @@ class Binance(CEX, Logger):
         parse_params = self.parse_params()
         url = f"{self.api_url}{path}?{parse_params}&signature={self.get_sign(parse_params)}"
 
-        await asyncio.sleep(2)
         return await self.make_request(url=url, headers=self.headers, content_type=None,
-                                       module_name='Get main account balance')
+                                       module_name='Get main account balance', weight=5)
 
     async def transfer_from_subaccounts(self, ccy: str = 'ETH', amount: float = None):
 
@@ -172,12 +175,12 @@ class Binance(CEX, Logger):
 
         flag = True
         sub_list = await self.get_sub_list()
+        sub_balances_list = await asyncio.gather(*[self.get_sub_balance(sub_data['subUid']) for sub_data in sub_list])
 
-        for sub_data in sub_list:
+        for sub_data, sub_balances in zip(sub_list, sub_balances_list):
             sub_email = sub_data['email']
             sub_uid = sub_data['subUid']
 
-            sub_balances = await self.get_sub_balance(sub_uid)
             sub_balance = float([balance for balance in sub_balances if balance['asset'] == ccy][0]['free'])
 
             if sub_balance != 0.0:
@@ -207,25 +210,20 @@ class Binance(CEX, Logger):
     async def get_cex_balances(self, ccy: str = 'ETH'):
         balances = {}
 
-        main_balance = await self.get_main_balance()
+        main_balance, sub_list = await asyncio.gather(self.get_main_balance(), self.get_sub_list())
 
         available_balance = [balance for balance in main_balance['balances'] if balance['asset'] == ccy]
 
         if available_balance:
             balances['Main CEX Account'] = float(available_balance[0]['free'])
 
-        sub_list = await self.get_sub_list()
+        sub_balances_list = await asyncio.gather(*[self.get_sub_balance(sub_data['subUid']) for sub_data in sub_list])
 
-        for sub_data in sub_list:
+        for sub_data, sub_balances in zip(sub_list, sub_balances_list):
             sub_name = sub_data['subAccountString']
-            sub_uid = sub_data['subUid']
-
-            sub_balances = await self.get_sub_balance(sub_uid)
 
             balances[sub_name] = float([balance for balance in sub_balances if balance['asset'] == ccy][0]['free'])
 
-            await asyncio.sleep(3)
-
         return balances
 
     async def wait_deposit_confirmation(self, amount: float, old_balances: dict, ccy: str = 'ETH',
@@ -274,13 +272,7 @@ class Binance(CEX, Logger):
         deposit_network, deposit_amount = deposit_data
         network_raw_name = BINANCE_NETWORKS_NAME[deposit_network]
         ccy, network_name = network_raw_name.split('-')
-        withdraw_data = (await self.get_currencies(ccy))[0]['networkList']
-
-        network_data = {
-            item['network']: {
-                'depositEnable': item['depositEnable']
-            } for item in withdraw_data
-        }[network_name]
+        network_data = await self.get_network_data(ccy, network_name)
 
         ccy = f"{ccy}.e" if deposit_network in [30, 31] else ccy
         amount = await self.client.get_smart_amount(deposit_amount, token_name=ccy)
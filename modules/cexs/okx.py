@@ -4,6 +4,7 @@ import asyncio
 import random
 
 from hashlib import sha256
+from urllib.parse import urlencode
 from modules import CEX, Logger
 from datetime import datetime, timezone
 
@@ -38,6 +39,10 @@ class OKX(CEX, Logger):
         except Exception as error:
             raise SoftwareExceptionWithoutRetry(f'Bad headers for OKX request: {error}')
 
+    async def sign_request(self, method: str, url: str, headers: dict, data: str = None, params: dict = None):
+        request_path = f"{url}?{urlencode(params)}" if params else url
+        return url, await self.get_headers(request_path, method, data or "")
+
     async def get_currencies(self, ccy: str = 'ETH'):
         url = 'https://www.okx.cab/api/v5/asset/currencies'
 
@@ -45,7 +50,17 @@ class OKX(CEX, Logger):
 
         headers = await self.get_headers(f'{url}?ccy={ccy}')
 
-        return await self.make_request(url=url, headers=headers, params=params, module_name='Token info')
+        return await self.make_request(url=url, headers=headers, params=params, module_name='Token info',
+                                       singleflight='cex_currencies')
+
+    async def get_networks_data(self, ccy: str):
+        return {item['chain']: item for item in await self.get_currencies(ccy)}
+
+    async def get_sub_balance(self, sub_name: str, ccy: str):
+        url_sub_balance = f"https://www.okx.cab/api/v5/asset/subaccount/balances?subAcct={sub_name}&ccy={ccy}"
+        headers = await self.get_headers(request_path=url_sub_balance)
+
+        return await self.make_request(url=url_sub_balance, headers=headers, module_name='Get subAccount balance')
 
     @helper
     async def withdraw(self, want_balance:float = 0, withdraw_data:tuple = None):
@@ -58,25 +73,16 @@ class OKX(CEX, Logger):
         network_raw_name = OKX_NETWORKS_NAME[network_id]
         ccy, network_name = network_raw_name.split('-')
         dst_chain_id = CEX_WRAPPED_ID[network_id]
-        withdraw_data = await self.get_currencies(ccy)
-
-        network_data = {
-            item['chain']: {
-                'can_withdraw': item['canWd'],
-                'min_fee': item['minFee'],
-                'min_wd': item['minWd'],
-                'max_wd': item['maxWd']
-            } for item in withdraw_data
-        }[network_raw_name]
+        network_data = await self.get_network_data(ccy, network_raw_name)
 
         amount = await self.client.get_smart_amount(amount)
 
         self.logger_msg(
             *self.client.acc_info, msg=f"Withdraw {amount} {ccy} to {network_name}")
 
-        if network_data['can_withdraw']:
+        if network_data['canWd']:
             address = f"0x{hex(self.client.address)}"
-            min_wd, max_wd = float(network_data['min_wd']), float(network_data['max_wd'])
+            min_wd, max_wd = float(network_data['minWd']), float(network_data['maxWd'])
 
             if min_wd <= amount <= max_wd:
 
@@ -85,21 +91,25 @@ class OKX(CEX, Logger):
                     "amt": amount,
                     "dest": "4",
                     "toAddr": address,
-                    "fee": network_data['min_fee'],
+                    "fee": network_data['minFee'],
                     "chain": network_raw_name,
                 }
 
-                headers = await self.get_headers(method="POST", request_path=url, body=str(body))
+                async def send_withdraw():
+                    headers = await self.get_headers(method="POST", request_path=url, body=str(body))
+                    return (await self.make_request(method='POST', url=url, data=str(body), headers=headers,
+                                                    module_name='Withdraw'))[0]['wdId']
 
                 ccy = f"{ccy}.e" if network_id in [30, 31] else ccy
 
                 old_balance_on_dst = await self.client.wait_for_receiving(dst_chain_id, token_name=ccy,
                                                                           check_balance_on_dst=True)
 
-                await self.make_request(method='POST', url=url, data=str(body), headers=headers, module_name='Withdraw')
+                withdraw_id = await self.submit_withdraw(send_withdraw)
 
                 self.logger_msg(*self.client.acc_info,
-                                msg=f"Withdraw complete. Note: wait a little for receiving funds", type_msg='success')
+                                msg=f"Withdraw complete (id: {withdraw_id}). Note: wait a little for receiving funds",
+                                type_msg='success')
 
                 await self.client.wait_for_receiving(dst_chain_id, old_balance_on_dst, token_name=ccy)
 
@@ -122,22 +132,14 @@ class OKX(CEX, Logger):
         flag = True
         headers = await self.get_headers(request_path=url_sub_list)
         sub_list = await self.make_request(url=url_sub_list, headers=headers, module_name='Get subAccounts list')
-        await asyncio.sleep(1)
+        sub_balances = await asyncio.gather(*[self.get_sub_balance(sub_data['subAcct'], ccy) for sub_data in sub_list])
 
-        for sub_data in sub_list:
+        for sub_data, sub_balance in zip(sub_list, sub_balances):
             sub_name = sub_data['subAcct']
 
-            url_sub_balance = f"https://www.okx.cab/api/v5/asset/subaccount/balances?subAcct={sub_name}&ccy={ccy}"
-            headers = await self.get_headers(request_path=url_sub_balance)
-
-            sub_balance = (await self.make_request(url=url_sub_balance, headers=headers,
-                                                   module_name='Get subAccount balance'))
-
             if sub_balance:
                 sub_balance = float(sub_balance[0]['availBal'])
 
-            await asyncio.sleep(1)
-
             if sub_balance != 0.0:
                 flag = False
                 self.logger_msg(*self.client.acc_info, msg=f'{sub_name} | subAccount balance : {sub_balance} {ccy}')
@@ -204,35 +206,26 @@ class OKX(CEX, Logger):
         balances = {}
         url_sub_list = "https://www.okx.cab/api/v5/users/subaccount/list"
 
-        await asyncio.sleep(10)
-
         if ccy == 'USDC.e':
             ccy = 'USDC'
 
-        headers = await self.get_headers(request_path=url_sub_list)
-        sub_list = await self.make_request(url=url_sub_list, headers=headers, module_name='Get subAccounts list')
-
         url_balance = f"https://www.okx.cab/api/v5/asset/balances?ccy={ccy}"
 
-        headers = await self.get_headers(request_path=url_balance)
-
-        balance = (await self.make_request(url=url_balance, headers=headers, module_name='Get Account balance'))
+        sub_list, balance = await asyncio.gather(
+            self.make_request(url=url_sub_list, headers=await self.get_headers(request_path=url_sub_list),
+                              module_name='Get subAccounts list'),
+            self.make_request(url=url_balance, headers=await self.get_headers(request_path=url_balance),
+                              module_name='Get Account balance')
+        )
 
         if balance:
             balances['Main CEX Account'] = float(balance[0]['availBal'])
 
-        for sub_data in sub_list:
-            sub_name = sub_data['subAcct']
-
-            url_sub_balance = f"https://www.okx.cab/api/v5/asset/subaccount/balances?subAcct={sub_name}&ccy={ccy}"
-            headers = await self.get_headers(request_path=url_sub_balance)
-
-            sub_balance = (await self.make_request(url=url_sub_balance, headers=headers,
-                                                   module_name='Get subAccount balance'))
-            await asyncio.sleep(3)
+        sub_balances = await asyncio.gather(*[self.get_sub_balance(sub_data['subAcct'], ccy) for sub_data in sub_list])
 
+        for sub_data, sub_balance in zip(sub_list, sub_balances):
             if sub_balance:
-                balances[sub_name] = float(sub_balance[0]['availBal'])
+                balances[sub_data['subAcct']] = float(sub_balance[0]['availBal'])
 
         return balances
 
@@ -281,20 +274,15 @@ class OKX(CEX, Logger):
         deposit_network, deposit_amount = deposit_data
         network_raw_name = OKX_NETWORKS_NAME[deposit_network]
         ccy, network_name = network_raw_name.split('-')
-        withdraw_data = await self.get_currencies(ccy)
-
-        networks_raw_data = {item['chain']: {'can_dep': item['canDep'], 'min_dep': item['minDep']}
-                             for item in withdraw_data}
-
-        network_data = networks_raw_data[network_raw_name]
+        network_data = await self.get_network_data(ccy, network_raw_name)
         ccy = f"{ccy}.e" if deposit_network in [30, 31] else ccy
         amount = await self.client.get_smart_amount(deposit_amount, token_name=ccy)
 
         self.logger_msg(*self.client.acc_info, msg=f"Deposit {amount} {ccy} from {network_name} to OKX wallet: {info}")
 
-        if network_data['can_dep']:
+        if network_data['canDep']:
 
-            min_dep = float(network_data['min_dep'])
+            min_dep = float(network_data['minDep'])
 
             if amount >= min_dep:
 
@@ -1,3 +1,4 @@
+import time
 import asyncio
 import random
 
@@ -5,13 +6,23 @@ from asyncio import sleep
 from aiohttp import ClientSession, TCPConnector
 from aiohttp_socks import ProxyConnector
 from eth_typing import HexStr
+from eth_utils import keccak
 from web3.contract import AsyncContract
 from web3.exceptions import TransactionNotFound, TimeExhausted
 from modules.interfaces import PriceImpactException, BlockchainException, SoftwareException
 from modules import Logger
 from utils.networks import Network
+from utils.crypto_executor import CRYPTO_EXECUTOR
+from utils.balance_watcher import BalanceWatcher
+from utils.state_cache import AccountStateCache
+from utils.singleflight import coalesce
+from utils.metrics import MeteredHTTPProvider, RECEIPT_WAIT
+from utils.tracing import TRACER
+from utils.tx_journal import TX_JOURNAL, TX_JOURNAL_TX_TIMEOUT
+from utils.job_queue import check_job_lease
+from utils.retry_policy import choose_rpc, dependency_guard
 from config import ERC20_ABI, TOKENS_PER_CHAIN, ETH_PRICE
-from web3 import AsyncHTTPProvider, AsyncWeb3
+from web3 import AsyncWeb3
 from config import RHINO_CHAIN_INFO, ORBITER_CHAINS_INFO, LAYERSWAP_CHAIN_NAME
 from general_settings import (
     GAS_MULTIPLIER,
@@ -46,13 +57,17 @@ class Client(Logger):
         self.session = ClientSession(connector=ProxyConnector.from_url(f"http://{proxy}", verify_ssl=False)
                                      if proxy else TCPConnector(verify_ssl=False))
         self.request_kwargs = {"proxy": f"http://{proxy}"} if proxy else {}
-        self.rpc = random.choice(network.rpc)
-        self.w3 = AsyncWeb3(AsyncHTTPProvider(self.rpc, request_kwargs=self.request_kwargs))
+        self.rpc = choose_rpc(network.rpc)
+        self.w3 = AsyncWeb3(MeteredHTTPProvider(self.rpc, request_kwargs=self.request_kwargs))
         self.account_name = str(account_name)
         self.private_key = private_key
         self.address = AsyncWeb3.to_checksum_address(self.w3.eth.account.from_key(private_key).address)
         self.acc_info = account_name, self.address
 
+    async def change_rpc(self):
+        self.rpc = choose_rpc(self.network.rpc, self.rpc)
+        self.w3 = AsyncWeb3(MeteredHTTPProvider(self.rpc, request_kwargs=self.request_kwargs))
+
     @staticmethod
     def round_amount(min_amount: float, max_amount: float) -> float:
         decimals = max(len(str(min_amount)) - 1, len(str(max_amount)) - 1) + 1
@@ -69,8 +84,7 @@ class Client(Logger):
             return error
 
     async def get_decimals(self, token_name: str) -> int:
-        contract = self.get_contract(TOKENS_PER_CHAIN[self.network.name][token_name])
-        return await contract.functions.decimals().call()
+        return await self.read_contract(TOKENS_PER_CHAIN[self.network.name][token_name], 'decimals')
 
     async def get_normalize_amount(self, token_name:str, amount_in_wei:int) -> float:
         decimals = await self.get_decimals(token_name)
@@ -140,37 +154,33 @@ class Client(Logger):
         return new_client
 
     async def wait_for_receiving(
-            self, chain_id: int, old_balance: int = 0, token_name: str = 'ETH', sleep_time: int = 60,
-            timeout: int = 1200, check_balance_on_dst: bool = False
+            self, chain_id: int, old_balance: int = 0, token_name: str = 'ETH', timeout: int = 1200,
+            check_balance_on_dst: bool = False
     ) -> bool:
         client = await self.new_client(chain_id)
 
         try:
+            if chain_id == 9:
+                await client.initialize_account()
+
+            watcher = BalanceWatcher.get_watcher(client.network, client.proxy_init)
+
             if check_balance_on_dst:
-                old_balance, _, _ = await client.get_token_balance(token_name)
+                old_balance = await watcher.get_balance(client.address, token_name)
+                TX_JOURNAL.record('receive', chain_id=chain_id, token_name=token_name, address=client.address,
+                                  old_balance=old_balance)
                 return old_balance
 
             self.logger_msg(*self.acc_info, msg=f'Waiting {token_name} to receive')
 
-            t = 0
-            new_eth_balance = 0
-            while t < timeout:
-                try:
-                    new_eth_balance, _, _ = await client.get_token_balance(token_name)
-                except:
-                    pass
-
-                if new_eth_balance > old_balance:
-                    dicimals = await client.get_decimals(token_name) if token_name != client.network.token else 18
-                    amount = round((new_eth_balance - old_balance) / 10 ** dicimals, 6)
-                    self.logger_msg(*self.acc_info, msg=f'{amount} {token_name} was received', type_msg='success')
-                    return True
-                else:
-                    self.logger_msg(*self.acc_info, msg=f'Still waiting {token_name} to receive...', type_msg='warning')
-                    await asyncio.sleep(sleep_time)
-                    t += sleep_time
-                if t > timeout:
-                    raise SoftwareException(f'{token_name} has not been received within {timeout} seconds')
+            new_balance = await watcher.wait_for_balance(client.address, token_name, old_balance, timeout=timeout)
+
+            decimals = await watcher.get_decimals(token_name)
+            amount = round((new_balance - old_balance) / 10 ** decimals, 6)
+            self.logger_msg(*self.acc_info, msg=f'{amount} {token_name} was received', type_msg='success')
+            return True
+        except asyncio.TimeoutError:
+            raise SoftwareException(f'{token_name} has not been received within {timeout} seconds')
         except Exception as error:
             raise SoftwareException(f'Error in <WAIT FOR RECEIVING> function. Error: {error}')
         finally:
@@ -181,23 +191,28 @@ class Client(Logger):
     ) -> [float, int, str]:
         if not check_native:
             if token_name != self.network.token:
-                contract = self.get_contract(TOKENS_PER_CHAIN[self.network.name][token_name])
+                contract_address = TOKENS_PER_CHAIN[self.network.name][token_name]
 
-                amount_in_wei = await contract.functions.balanceOf(self.address).call()
-                decimals = await contract.functions.decimals().call()
+                amount_in_wei = await self.read_contract(contract_address, 'balanceOf', self.address)
+                decimals = await self.read_contract(contract_address, 'decimals')
 
                 if check_symbol:
-                    symbol = await contract.functions.symbol().call()
+                    symbol = await self.read_contract(contract_address, 'symbol')
                     return amount_in_wei, amount_in_wei / 10 ** decimals, symbol
                 return amount_in_wei, amount_in_wei / 10 ** decimals, ''
 
-        amount_in_wei = await self.w3.eth.get_balance(self.address)
+        amount_in_wei = await self.state_cache.call(
+            None, 'getBalance', [self.address], lambda: self.w3.eth.get_balance(self.address), self.get_block_number
+        )
         return amount_in_wei, amount_in_wei / 10 ** 18, self.network.token
 
     async def get_auto_amount(self, token_name_search: str = None, class_name: str = None) -> [str, float, int]:
 
-        wallet_balance = {k: await self.get_token_balance(k, False)
-                          for k, v in TOKENS_PER_CHAIN[self.network.name].items()}
+        token_names = list(TOKENS_PER_CHAIN[self.network.name])
+        with TRACER.span('balance discovery'):
+            wallet_balance = dict(zip(token_names, await asyncio.gather(
+                *[self.get_token_balance(token_name, False) for token_name in token_names]
+            )))
         valid_wallet_balance = {k: v[1] for k, v in wallet_balance.items() if v[0] != 0}
         eth_price = ETH_PRICE
 
@@ -267,12 +282,27 @@ class Client(Logger):
             abi=abi
         )
 
+    @property
+    def state_cache(self) -> AccountStateCache:
+        return AccountStateCache.get_cache(self.network.name, self.address)
+
+    async def get_block_number(self) -> int:
+        return await self.w3.eth.block_number
+
+    async def read_contract(self, contract_address: str, function_name: str, *args):
+        # Чтение состояния через кэш аккаунта: повторные вызовы в пределах одного блока не идут в RPC
+        contract = self.get_contract(contract_address)
+        return await self.state_cache.call(
+            contract.address, function_name, args, contract.functions[function_name](*args).call,
+            self.get_block_number
+        )
+
     async def get_allowance(self, token_address: str, spender_address: str) -> int:
-        contract = self.get_contract(token_address)
-        return await contract.functions.allowance(
+        return await self.read_contract(
+            token_address, 'allowance',
             self.address,
-            spender_address
-        ).call()
+            AsyncWeb3.to_checksum_address(spender_address)
+        )
 
     async def get_priotiry_fee(self) -> int:
         fee_history = await self.w3.eth.fee_history(25, 'latest', [20.0])
@@ -289,7 +319,9 @@ class Client(Logger):
             tx_params = {
                 'chainId': self.network.chain_id,
                 'from': self.w3.to_checksum_address(self.address),
-                'nonce': await self.w3.eth.get_transaction_count(self.address),
+                'nonce': await self.state_cache.get_nonce(
+                    lambda: self.w3.eth.get_transaction_count(self.address), self.get_block_number
+                ),
                 'value': value,
             }
 
@@ -327,10 +359,10 @@ class Client(Logger):
     async def check_for_approved(self, token_address: str, spender_address: str,
                                  amount_in_wei: int, without_bal_check: bool = False) -> bool:
         try:
-            contract = self.get_contract(token_address)
-
-            balance_in_wei = await contract.functions.balanceOf(self.address).call()
-            symbol = await contract.functions.symbol().call()
+            balance_in_wei, symbol = await asyncio.gather(
+                self.read_contract(token_address, 'balanceOf', self.address),
+                self.read_contract(token_address, 'symbol')
+            )
 
             self.logger_msg(*self.acc_info, msg=f'Check for approval {symbol}')
 
@@ -359,14 +391,20 @@ class Client(Logger):
     ) -> bool | HexStr:
         try:
             if not without_gas:
-                transaction['gas'] = int((await self.w3.eth.estimate_gas(transaction)) * GAS_MULTIPLIER)
+                with TRACER.span('fee estimation'):
+                    transaction['gas'] = int((await self.w3.eth.estimate_gas(transaction)) * GAS_MULTIPLIER)
         except Exception as error:
             raise BlockchainException(f'{self.get_normalize_error(error)}')
 
+        check_job_lease()
         try:
-            singed_tx = self.w3.eth.account.sign_transaction(transaction, self.private_key)
-            tx_hash = self.w3.to_hex(await self.w3.eth.send_raw_transaction(singed_tx.rawTransaction))
+            with TRACER.span('signing'):
+                raw_transaction = await CRYPTO_EXECUTOR.sign_evm_transaction(transaction, self.private_key)
+            TX_JOURNAL.record('tx', network=self.network.name, hash=self.w3.to_hex(keccak(raw_transaction)))
+            with TRACER.span('submission'):
+                tx_hash = self.w3.to_hex(await self.w3.eth.send_raw_transaction(raw_transaction))
         except Exception as error:
+            self.state_cache.invalidate()
             if self.get_normalize_error(error) == 'already known':
                 self.logger_msg(*self.acc_info, msg='RPC got error, but tx was send', type_msg='warning')
                 return True
@@ -374,49 +412,88 @@ class Client(Logger):
                 raise BlockchainException(f'{self.get_normalize_error(error)}')
 
         total_time = 0
+        sent_at = time.perf_counter()
         timeout = timeout if self.network.name != 'Polygon' else 1200
 
+        with TRACER.span('receipt wait'):
+            while True:
+                try:
+                    receipts = await self.w3.eth.get_transaction_receipt(tx_hash)
+                    status = receipts.get("status")
+                    if status is not None:
+                        self.state_cache.on_transaction(receipts.get("blockNumber"))
+                        RECEIPT_WAIT.observe(time.perf_counter() - sent_at, network=self.network.name)
+
+                    if status is not None:
+                        TX_JOURNAL.record('tx_status', hash=tx_hash, status=status == 1)
+
+                    if status == 1:
+                        message = f'Transaction was successful: {self.explorer}tx/{tx_hash}'
+                        self.logger_msg(*self.acc_info, msg=message, type_msg='success')
+                        if need_hash:
+                            return tx_hash
+                        return True
+                    elif status is None:
+                        await asyncio.sleep(poll_latency)
+                    else:
+                        self.logger_msg(*self.acc_info, msg=f'Transaction failed: {self.explorer}tx/{tx_hash}',
+                                        type_msg='error')
+                        return False
+                except TransactionNotFound:
+                    if total_time > timeout:
+                        self.state_cache.invalidate()
+                        if self.network.name in ['BNB Chain', 'Moonbeam']:
+                            self.logger_msg(
+                                *self.acc_info,
+                                msg=f'Transaction was sent and tried to be confirmed, but not finished yet',
+                                type_msg='warning')
+                            return True
+                        raise TimeExhausted(f"Transaction is not in the chain after {timeout} seconds")
+                    total_time += poll_latency
+                    await asyncio.sleep(poll_latency)
+
+                except Exception as error:
+                    self.logger_msg(*self.acc_info, msg=f'RPC got autims response. Error: {error}', type_msg='warning')
+                    total_time += poll_latency
+                    await asyncio.sleep(poll_latency)
+
+    async def get_tx_status(self, tx_hash: str, timeout: int = TX_JOURNAL_TX_TIMEOUT, poll_latency: int = 10):
+        # True - транзакция прошла, False - отклонена, None - не попала в сеть
+        total_time = 0
         while True:
             try:
-                receipts = await self.w3.eth.get_transaction_receipt(tx_hash)
-                status = receipts.get("status")
-                if status == 1:
-                    message = f'Transaction was successful: {self.explorer}tx/{tx_hash}'
-                    self.logger_msg(*self.acc_info, msg=message, type_msg='success')
-                    if need_hash:
-                        return tx_hash
-                    return True
-                elif status is None:
-                    await asyncio.sleep(poll_latency)
-                else:
-                    self.logger_msg(*self.acc_info, msg=f'Transaction failed: {self.explorer}tx/{tx_hash}',
-                                    type_msg='error')
-                    return False
+                return (await self.w3.eth.get_transaction_receipt(tx_hash)).get('status') == 1
             except TransactionNotFound:
-                if total_time > timeout:
-                    if self.network.name in ['BNB Chain', 'Moonbeam']:
-                        self.logger_msg(
-                            *self.acc_info,
-                            msg=f'Transaction was sent and tried to be confirmed, but not finished yet',
-                            type_msg='warning')
-                        return True
-                    raise TimeExhausted(f"Transaction is not in the chain after {timeout} seconds")
-                total_time += poll_latency
-                await asyncio.sleep(poll_latency)
+                try:
+                    await self.w3.eth.get_transaction(tx_hash)
+                except TransactionNotFound:
+                    return None
+
+            if total_time > timeout:
+                return None
+            total_time += poll_latency
+            await asyncio.sleep(poll_latency)
+
+    async def request_coingecko(self, params: dict) -> dict:
+        async def request_prices():
+            async with dependency_guard(url) as dependency:
+                async with self.session.get(url, params=params) as response:
+                    dependency.set_response(response)
+                    if response.status == 200:
+                        return await response.json()
+                    raise SoftwareException(f'Bad request to CoinGecko API: {response.status}')
 
-            except Exception as error:
-                self.logger_msg(*self.acc_info, msg=f'RPC got autims response. Error: {error}', type_msg='warning')
-                total_time += poll_latency
-                await asyncio.sleep(poll_latency)
+        url = 'https://api.coingecko.com/api/v3/simple/price'
+        return await coalesce('token_price', (url, params), request_prices)
 
     async def get_token_price(self, token_name: str, vs_currency: str = 'usd') -> float:
+        params = {'ids': f'{token_name}', 'vs_currencies': f'{vs_currency}'}
 
-        url = 'https://api.coingecko.com/api/v3/simple/price'
+        data = await self.request_coingecko(params)
+        return float(data[token_name][vs_currency])
 
-        params = {'ids': f'{token_name}', 'vs_currencies': f'{vs_currency}'}
+    async def get_token_prices(self, token_names: list[str], vs_currency: str = 'usd') -> dict[str, float]:
+        params = {'ids': ','.join(token_names), 'vs_currencies': f'{vs_currency}'}
 
-        async with self.session.get(url, params=params) as response:
-            if response.status == 200:
-                data = await response.json()
-                return float(data[token_name][vs_currency])
-            raise SoftwareException(f'Bad request to CoinGecko API: {response.status}')
+        data = await self.request_coingecko(params)
+        return {token_name: float(data[token_name][vs_currency]) for token_name in token_names}
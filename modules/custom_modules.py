@@ -1,9 +1,12 @@
+import time
 import random
+import asyncio
 
-from general_settings import GLOBAL_NETWORK
+from general_settings import GLOBAL_NETWORK, BALANCE_CACHE_TTL
 from modules import Logger, RequestClient
 from modules.interfaces import SoftwareExceptionWithoutRetry
 from utils.tools import helper, gas_checker, sleep
+from utils.balance_watcher import BalanceWatcher
 from config import (
     ETH_PRICE, TOKENS_PER_CHAIN, CHAIN_NAME, OKX_NETWORKS_NAME, BINGX_NETWORKS_NAME, BINANCE_NETWORKS_NAME, CEX_WRAPPED_ID,
     COINGECKO_TOKEN_API_NAMES
@@ -17,16 +20,44 @@ from settings import (
 
 
 class Custom(Logger, RequestClient):
+    PRICE_CACHE: dict[str, tuple[float, float]] = {}
+
     def __init__(self, client):
         self.client = client
         Logger.__init__(self)
         RequestClient.__init__(self, client)
 
+    async def get_collect_balances(self) -> tuple[dict, dict]:
+        wallet_balance = {k: await self.client.get_token_balance(k, False)
+                          for k, v in TOKENS_PER_CHAIN[self.client.network.name].items()}
+        valid_wallet_balance = {k: v[1] for k, v in wallet_balance.items() if v[0] != 0}
+        eth_price = ETH_PRICE
+
+        for token in ['ETH', 'WETH']:
+            if token in valid_wallet_balance:
+                valid_wallet_balance[token] *= eth_price
+
+        return wallet_balance, valid_wallet_balance
+
+    async def get_collect_swaps(self, wallet_balance: dict, valid_wallet_balance: dict) -> list[tuple]:
+        swaps = []
+        for token_name, token_balance in valid_wallet_balance.items():
+            if token_name != 'ETH':
+                amount_in_wei = wallet_balance[token_name][0]
+                amount = float(f"{(amount_in_wei / 10 ** await self.client.get_decimals(token_name)):.6f}")
+                amount_in_usd = valid_wallet_balance[token_name]
+                if amount_in_usd > 1:
+                    swaps.append((token_name, 'ETH', amount, amount_in_wei))
+                else:
+                    self.logger_msg(*self.client.acc_info, msg=f"{token_name} balance < 1$")
+        return swaps
+
     async def collect_eth_util(self):
         if GLOBAL_NETWORK == 9:
             await self.client.initialize_account()
 
         from functions import swap_avnu
+        from modules import AVNU
 
         self.logger_msg(*self.client.acc_info, msg=f"Started collecting tokens in ETH")
 
@@ -34,14 +65,7 @@ class Custom(Logger, RequestClient):
             'Starknet': [swap_avnu]
         }[self.client.network.name]
 
-        wallet_balance = {k: await self.client.get_token_balance(k, False)
-                          for k, v in TOKENS_PER_CHAIN[self.client.network.name].items()}
-        valid_wallet_balance = {k: v[1] for k, v in wallet_balance.items() if v[0] != 0}
-        eth_price = ETH_PRICE
-
-        for token in ['ETH', 'WETH']:
-            if token in valid_wallet_balance:
-                valid_wallet_balance[token] *= eth_price
+        wallet_balance, valid_wallet_balance = await self.get_collect_balances()
 
         if valid_wallet_balance['ETH'] < 0.5:
             self.logger_msg(*self.client.acc_info, msg=f'Account has not enough ETH for swap', type_msg='warning')
@@ -49,31 +73,38 @@ class Custom(Logger, RequestClient):
 
         if len(valid_wallet_balance.values()) > 1:
             try:
-                for token_name, token_balance in valid_wallet_balance.items():
-                    if token_name != 'ETH':
-                        amount_in_wei = wallet_balance[token_name][0]
-                        amount = float(f"{(amount_in_wei / 10 ** await self.client.get_decimals(token_name)):.6f}")
-                        amount_in_usd = valid_wallet_balance[token_name]
-                        if amount_in_usd > 1:
-                            from_token_name, to_token_name = token_name, 'ETH'
-                            data = from_token_name, to_token_name, amount, amount_in_wei
-                            counter = 0
-                            while True:
-                                result = False
-                                module_func = random.choice(func)
-                                try:
-                                    self.logger_msg(*self.client.acc_info, msg=f'Launching swap module', type_msg='warning')
-                                    result = await module_func(self.client.account_name, self.client.private_key,
-                                                               self.client.network, self.client.proxy_init, swapdata=data)
-                                    if not result:
-                                        counter += 1
-                                except:
-                                    counter += 1
-                                    pass
-                                if result or counter == 3:
-                                    break
-                        else:
-                            self.logger_msg(*self.client.acc_info, msg=f"{token_name} balance < 1$")
+                swaps = await self.get_collect_swaps(wallet_balance, valid_wallet_balance)
+
+                if len(swaps) > 1:
+                    nonce = await self.client.get_nonce()
+                    try:
+                        await AVNU(self.client).swap_batch(swaps)
+                        swaps = []
+                    except Exception as error:
+                        self.logger_msg(*self.client.acc_info,
+                                        msg=f"Batch swap failed, swapping tokens one by one. Error: {error}",
+                                        type_msg='warning')
+                        if await self.client.get_nonce() > nonce:
+                            # Пачка уже отправлена (упало ожидание квитанции): часть токенов могла быть
+                            # обменяна, поэтому суммы для обменов по одному берутся из новых балансов
+                            swaps = await self.get_collect_swaps(*await self.get_collect_balances())
+
+                for data in swaps:
+                    counter = 0
+                    while True:
+                        result = False
+                        module_func = random.choice(func)
+                        try:
+                            self.logger_msg(*self.client.acc_info, msg=f'Launching swap module', type_msg='warning')
+                            result = await module_func(self.client.account_name, self.client.private_key,
+                                                       self.client.network, self.client.proxy_init, swapdata=data)
+                            if not result:
+                                counter += 1
+                        except:
+                            counter += 1
+                            pass
+                        if result or counter == 3:
+                            break
             except Exception as error:
                 self.logger_msg(*self.client.acc_info, msg=f"Error in collector route. Error: {error}")
         else:
@@ -117,25 +148,53 @@ class Custom(Logger, RequestClient):
             return await okx_withdraw_util(self.client, want_balance=need_to_withdraw)
         raise SoftwareExceptionWithoutRetry('Account has enough tokens on balance!')
 
+    async def get_token_prices(self, tokens: list[str]) -> dict[str, float]:
+        prices = {token_name: 1.0 for token_name in tokens if 'USD' in token_name}
+
+        api_names = {}
+        for token_name in set(tokens) - set(prices):
+            cached_price = self.PRICE_CACHE.get(token_name)
+            if BALANCE_CACHE_TTL and cached_price and time.time() - cached_price[1] < BALANCE_CACHE_TTL:
+                prices[token_name] = cached_price[0]
+            else:
+                api_names[token_name] = COINGECKO_TOKEN_API_NAMES[token_name]
+
+        if api_names:
+            api_prices = await self.client.get_token_prices(list(set(api_names.values())))
+            for token_name, api_name in api_names.items():
+                prices[token_name] = api_prices[api_name]
+                self.PRICE_CACHE[token_name] = api_prices[api_name], time.time()
+
+        return prices
+
+    @staticmethod
+    async def get_chain_balance(client, token_name: str) -> tuple[int, float]:
+        if GLOBAL_NETWORK == 9 and client.network.name == 'Starknet':
+            await client.initialize_account()
+
+        watcher = BalanceWatcher.get_watcher(client.network, client.proxy_init)
+        amount_in_wei = await watcher.get_balance(client.address, token_name, max_age=BALANCE_CACHE_TTL)
+        decimals = await watcher.get_decimals(token_name)
+
+        return amount_in_wei, amount_in_wei / 10 ** decimals
+
     async def balance_searcher(self, chains, tokens, bridge_check:bool = False):
 
         clients = [await self.client.new_client(chain)
                    for chain in chains]
 
-        if GLOBAL_NETWORK == 9:
+        try:
+            balances, prices = await asyncio.gather(
+                asyncio.gather(*[self.get_chain_balance(client, token) for client, token in zip(clients, tokens)]),
+                self.get_token_prices(tokens)
+            )
+        except Exception:
             for client in clients:
-                await client.initialize_account()
-
-        balances = [await client.get_token_balance(token_name=token)
-                    for client, token in zip(clients, tokens)]
-
-        balances_in_usd = []
-        for balance_in_wei, balance, token_name in balances:
-            token_price = 1
-            if 'USD' not in token_name:
-                token_price = await self.client.get_token_price(COINGECKO_TOKEN_API_NAMES[token_name])
-            balance_in_usd = balance * token_price
-            balances_in_usd.append([balance_in_usd, token_price])
+                await client.session.close()
+            raise
+
+        balances_in_usd = [[balance * prices[token_name], prices[token_name]]
+                           for (_, balance), token_name in zip(balances, tokens)]
 
         index = balances_in_usd.index(max(balances_in_usd, key=lambda x: x[0]))
 
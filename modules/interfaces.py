@@ -1,16 +1,21 @@
-from aiohttp import ClientSession
 from loguru import logger
 from sys import stderr
 from datetime import datetime
 from web3 import AsyncWeb3
+from starknet_py.net.full_node_client import FullNodeClient
 from abc import ABC, abstractmethod
-from random import uniform
+from random import uniform, choice
 from config import CHAIN_NAME
 
 from general_settings import (LAYERSWAP_API_KEY, OKX_API_KEY, OKX_API_PASSPHRAS,
                               OKX_API_SECRET, GLOBAL_NETWORK, BINGX_API_KEY, BINGX_API_SECRET, BINANCE_API_KEY,
                               BINANCE_API_SECRET)
 from utils.networks import StarknetRPC
+from utils.cex_client import CEXClient, CEXNetworkCache, CEXWithdrawDispatcher
+from utils.singleflight import coalesce
+from utils.tracing import TRACER
+from utils.retry_policy import dependency_guard
+from utils.tx_journal import TX_JOURNAL
 
 
 def get_user_agent():
@@ -43,6 +48,20 @@ class BridgeExceptionWithoutRetry(Exception):
     pass
 
 
+class RateLimitException(SoftwareException):
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenException(SoftwareExceptionWithoutRetry):
+    pass
+
+
+class LeaseLostException(SoftwareExceptionWithoutRetry):
+    pass
+
+
 class Logger(ABC):
     def __init__(self):
         self.logger = logger
@@ -109,26 +128,54 @@ class CEX(ABC):
     async def withdraw(self):
         pass
 
+    @abstractmethod
+    async def get_networks_data(self, ccy: str) -> dict:
+        pass
+
+    async def sign_request(self, method: str, url: str, headers: dict, data: str = None,
+                           params: dict = None) -> tuple[str, dict]:
+        return url, headers
+
+    async def get_network_data(self, ccy: str, network: str) -> dict:
+        return await CEXNetworkCache.get_cache(self.class_name).get(ccy, network, self.get_networks_data)
+
+    async def submit_withdraw(self, send_request):
+        dispatcher = CEXWithdrawDispatcher.get_dispatcher(self.class_name)
+
+        if dispatcher.queue_size:
+            self.logger_msg(*self.client.acc_info, msg=f"Withdraw queued, {dispatcher.queue_size} requests ahead")
+
+        withdraw_id = await dispatcher.submit(send_request)
+        TX_JOURNAL.record('cex_withdrawal', exchange=self.class_name, id=str(withdraw_id))
+        return withdraw_id
+
     async def make_request(self, method:str = 'GET', url:str = None, data:str = None, params:dict = None,
                            headers:dict = None, json:dict = None, module_name:str = 'Request',
-                           content_type:str | None = "application/json"):
+                           content_type:str | None = "application/json", weight:int = 1,
+                           singleflight:str = None, singleflight_key:str = None):
 
-        async with ClientSession() as session:
-            async with session.request(method=method, url=url, headers=headers, data=data, json=json,
-                                       params=params) as response:
+        if singleflight:
+            return await coalesce(
+                singleflight, (self.class_name, method, singleflight_key or url, params, data, json),
+                lambda: self.make_request(method, url, data, params, headers, json, module_name, content_type, weight)
+            )
 
-                data: dict = await response.json(content_type=content_type)
+        with TRACER.span('api call', url=url.split('?')[0]):
+            status, data = await CEXClient.get_client(self.class_name).request(
+                method=method, url=url, weight=weight, content_type=content_type, headers=headers, data=data,
+                json=json, params=params, sign_request=lambda: self.sign_request(method, url, headers, data, params)
+            )
 
-                if self.class_name == 'Binance' and response.status in [200, 201]:
-                    return data
+        if self.class_name == 'Binance' and status in [200, 201]:
+            return data
 
-                if int(data.get('code')) != 0:
-                    message = data.get('msg') or data.get('desc') or 'Unknown error'
-                    error = f"Error code: {data['code']} Msg: {message}"
-                    raise SoftwareException(f"Bad request to {self.class_name}({module_name}): {error}")
+        if int(data.get('code')) != 0:
+            message = data.get('msg') or data.get('desc') or 'Unknown error'
+            error = f"Error code: {data['code']} Msg: {message}"
+            raise SoftwareException(f"Bad request to {self.class_name}({module_name}): {error}")
 
-                # self.logger.success(f"{self.info} {module_name}")
-                return data['data']
+        # self.logger.success(f"{self.info} {module_name}")
+        return data['data']
 
 
 class RequestClient(ABC):
@@ -136,22 +183,29 @@ class RequestClient(ABC):
         self.client = client
 
     async def make_request(self, method:str = 'GET', url:str = None, headers:dict = None, params: dict = None,
-                           data:str = None, json:dict = None):
+                           data:str = None, json:dict = None, singleflight:str = None):
+
+        if singleflight:
+            return await coalesce(singleflight, (method, url, params, data, json),
+                                  lambda: self.make_request(method, url, headers, params, data, json))
 
         headers = (headers or {}) | {'User-Agent': get_user_agent()}
-        async with self.client.session.request(method=method, url=url, headers=headers, data=data,
-                                               params=params, json=json) as response:
-            try:
-                data = await response.json()
-                if response.status == 200:
-                    return data
-                raise SoftwareException(
-                    f"Bad request to {self.__class__.__name__} API. "
-                    f"Response status: {response.status}. Response: {await response.text()}")
-            except Exception as error:
-                raise SoftwareException(
-                    f"Bad request to {self.__class__.__name__} API. "
-                    f"Response status: {response.status}. Response: {await response.text()} Error: {error}")
+        with TRACER.span('api call', url=url.split('?')[0]):
+            async with dependency_guard(url) as dependency:
+                async with self.client.session.request(method=method, url=url, headers=headers, data=data,
+                                                       params=params, json=json) as response:
+                    dependency.set_response(response)
+                    try:
+                        data = await response.json()
+                        if response.status == 200:
+                            return data
+                        raise SoftwareException(
+                            f"Bad request to {self.__class__.__name__} API. "
+                            f"Response status: {response.status}. Response: {await response.text()}")
+                    except Exception as error:
+                        raise SoftwareException(
+                            f"Bad request to {self.__class__.__name__} API. "
+                            f"Response status: {response.status}. Response: {await response.text()} Error: {error}")
 
 
 class Bridge(ABC):
@@ -174,13 +228,8 @@ class Bridge(ABC):
         if private_key is None:
             return
         elif stark_key_type:
-            stark_client = None
-            try:
-                stark_client = StarknetClient('Bridge', private_key, StarknetRPC, self.client.proxy_init)
-                await stark_client.initialize_account()
-                return hex(stark_client.address)
-            finally:
-                await stark_client.session.close()
+            w3 = FullNodeClient(node_url=choice(StarknetRPC.rpc), session=self.client.session)
+            return hex(await StarknetClient.get_address_by_key(private_key, w3))
         else:
             return AsyncWeb3().eth.account.from_key(private_key).address
 
@@ -189,15 +238,22 @@ class Bridge(ABC):
         pass
 
     async def make_request(self, method:str = 'GET', url:str = None, headers:dict = None, params: dict = None,
-                           data:str = None, json:dict = None):
+                           data:str = None, json:dict = None, singleflight:str = None):
+
+        if singleflight:
+            return await coalesce(singleflight, (method, url, params, data, json),
+                                  lambda: self.make_request(method, url, headers, params, data, json))
 
         headers = (headers or {}) | {'User-Agent': get_user_agent()}
-        async with self.client.session.request(method=method, url=url, headers=headers, data=data, json=json,
-                                               params=params) as response:
-            data = await response.json()
-            if response.status in [200, 201]:
-                return data
-            raise SoftwareException(f"Bad request to {self.__class__.__name__} API: {response.status}")
+        with TRACER.span('api call', url=url.split('?')[0]):
+            async with dependency_guard(url) as dependency:
+                async with self.client.session.request(method=method, url=url, headers=headers, data=data, json=json,
+                                                       params=params) as response:
+                    dependency.set_response(response)
+                    data = await response.json()
+                    if response.status in [200, 201]:
+                        return data
+                    raise SoftwareException(f"Bad request to {self.__class__.__name__} API: {response.status}")
 
 
 class Refuel(ABC):
@@ -247,13 +303,19 @@ class Blockchain(ABC):
         self.client = client
 
     async def make_request(self, method:str = 'GET', url:str = None, headers:dict = None, params: dict = None,
-                           data:str = None, json:dict = None):
+                           data:str = None, json:dict = None, singleflight:str = None):
 
-        headers = (headers or {}) | {'User-Agent': get_user_agent()}
-        async with self.client.session.request(method=method, url=url, headers=headers, data=data,
-                                               params=params, json=json) as response:
+        if singleflight:
+            return await coalesce(singleflight, (method, url, params, data, json),
+                                  lambda: self.make_request(method, url, headers, params, data, json))
 
-            data = await response.json()
-            if response.status == 200:
-                return data
-            raise SoftwareException(f"Bad request to {self.__class__.__name__} API: {response.status}")
+        headers = (headers or {}) | {'User-Agent': get_user_agent()}
+        with TRACER.span('api call', url=url.split('?')[0]):
+            async with dependency_guard(url) as dependency:
+                async with self.client.session.request(method=method, url=url, headers=headers, data=data,
+                                                       params=params, json=json) as response:
+                    dependency.set_response(response)
+                    data = await response.json()
+                    if response.status == 200:
+                        return data
+                    raise SoftwareException(f"Bad request to {self.__class__.__name__} API: {response.status}")
@@ -1,31 +1,44 @@
 import asyncio
+import dataclasses
 import json
 import random
 
 from starknet_py.contract import Contract
+from starknet_py.proxy.contract_abi_resolver import ContractAbiResolver
 from starknet_py.net.account.account import Account
-from starknet_py.hash.address import compute_address
 from starknet_py.net.client_errors import ClientError
+from starknet_py.transaction_errors import (TransactionRejectedError, TransactionRevertedError,
+                                            TransactionNotReceivedError)
 from starknet_py.cairo.felt import decode_shortstring
 from starknet_py.net.models.chains import StarknetChainId
 from starknet_py.net.full_node_client import FullNodeClient
 from starknet_py.hash.selector import get_selector_from_name
 from starknet_py.net.signer.stark_curve_signer import KeyPair
 from starknet_py.net.client_models import Call
+from starknet_py.net.models.transaction import DeployAccountV1
+from starknet_py.constants import QUERY_VERSION_BASE
 
 from aiohttp import ClientSession, TCPConnector
 from aiohttp_socks import ProxyConnector
 from modules import Logger
 from modules.interfaces import get_user_agent, SoftwareException, PriceImpactException
 from utils.networks import Network
+from utils.crypto_executor import CRYPTO_EXECUTOR
+from utils.balance_watcher import BalanceWatcher
+from utils.state_cache import AccountStateCache
+from utils.singleflight import coalesce
+from utils.metrics import MeteredFullNodeClient, RECEIPT_WAIT
+from utils.tracing import TRACER
+from utils.tx_journal import TX_JOURNAL, TX_JOURNAL_TX_TIMEOUT
+from utils.job_queue import check_job_lease
+from utils.retry_policy import choose_rpc, dependency_guard
 from config import (
     TOKENS_PER_CHAIN,
     RHINO_CHAIN_INFO,
     ORBITER_CHAINS_INFO,
     LAYERSWAP_CHAIN_NAME,
-    ARGENT_IMPLEMENTATION_CLASS_HASH_NEW,
-    BRAAVOS_PROXY_CLASS_HASH, BRAAVOS_IMPLEMENTATION_CLASS_HASH, ARGENT_PROXY_CLASS_HASH,
-    ARGENT_IMPLEMENTATION_CLASS_HASH, ZKLEND_CONTRACTS, NOSTRA_CONTRACTS, ETH_PRICE
+    ZKLEND_CONTRACTS, NOSTRA_CONTRACTS, ETH_PRICE, ACCOUNT_CLASS_HASHES,
+    BRAAVOS_IMPLEMENTATION_CLASS_HASH_NEW
 )
 
 from general_settings import (
@@ -50,6 +63,8 @@ from settings import (
 
 
 class StarknetClient(Logger):
+    ADDRESS_CACHE: dict[int, tuple[int, int, int, int]] = {}
+
     def __init__(self, account_name: str, private_key: str, network: Network, proxy: None | str = None):
         Logger.__init__(self)
         self.network = network
@@ -59,10 +74,11 @@ class StarknetClient(Logger):
         self.proxy = f"http://{proxy}" if proxy else ""
         self.proxy_init = proxy
 
-        key_pair = KeyPair.from_private_key(private_key)
+        key_pair = self.get_key_pair(private_key)
         self.key_pair = key_pair
         self.session = self.get_proxy_for_account(self.proxy)
-        self.w3 = FullNodeClient(node_url=random.choice(network.rpc), session=self.session)
+        self.rpc = choose_rpc(network.rpc)
+        self.w3 = MeteredFullNodeClient(node_url=self.rpc, session=self.session)
 
         self.account_name = account_name
         self.private_key = private_key
@@ -73,14 +89,23 @@ class StarknetClient(Logger):
         self.WALLET_TYPE = None
 
     async def initialize_account(self, check_balance:bool = False):
-        self.account, self.address, self.WALLET_TYPE = await self.get_wallet_auto(
-            self.w3, self.key_pair,
-            self.account_name, check_balance
-        )
+        with TRACER.span('initialize_account'):
+            self.account, self.address, self.WALLET_TYPE = await self.get_wallet_auto(
+                self.w3, self.key_pair,
+                self.account_name, check_balance
+            )
         self.address = int(self.address)
         self.acc_info = self.account_name, self.address
         self.account.ESTIMATED_FEE_MULTIPLIER = GAS_MULTIPLIER
 
+    async def change_rpc(self):
+        self.rpc = choose_rpc(self.network.rpc, self.rpc)
+        self.w3 = MeteredFullNodeClient(node_url=self.rpc, session=self.session)
+
+        if self.account is not None:
+            self.account = Account(client=self.w3, address=self.address, key_pair=self.key_pair, chain=self.chain_id)
+            self.account.ESTIMATED_FEE_MULTIPLIER = GAS_MULTIPLIER
+
     async def get_wallet_auto(self, w3, key_pair, account_name, check_balance:bool = False):
         last_data = await self.check_stark_data_file(account_name)
         if last_data:
@@ -90,9 +115,13 @@ class StarknetClient(Logger):
 
             return account, address, wallet_type
 
-        possible_addresses = [(self.get_argent_address(key_pair, 1), 0),
-                              (self.get_braavos_address(key_pair), 1),
-                              (self.get_argent_address(key_pair, 0), 0)]
+        _, argent_new_address, braavos_address, argent_old_address = await self.get_possible_addresses(
+            key_pair.private_key
+        )
+
+        possible_addresses = [(argent_new_address, 0),
+                              (braavos_address, 1),
+                              (argent_old_address, 0)]
 
         for address, wallet_type in possible_addresses:
             account = Account(client=w3, address=address, key_pair=key_pair, chain=StarknetChainId.MAINNET)
@@ -109,8 +138,8 @@ class StarknetClient(Logger):
                 pass
 
         new_wallet = {
-            0: ('ArgentX', self.get_argent_address(key_pair, 1), 0),
-            1: ('Braavos', self.get_braavos_address(key_pair), 1)
+            0: ('ArgentX', argent_new_address, 0),
+            1: ('Braavos', braavos_address, 1)
         }[NEW_WALLET_TYPE]
 
         address = new_wallet[1]
@@ -120,6 +149,49 @@ class StarknetClient(Logger):
         self.logger_msg(self.account_name, None, msg=f"Software will create {new_wallet[0]} account")
         return account, address, new_wallet[-1]
 
+    @staticmethod
+    def normalize_private_key(private_key: str | int) -> int:
+        return int(private_key, 16) if isinstance(private_key, str) else int(private_key)
+
+    @classmethod
+    def get_key_pair(cls, private_key: str | int) -> KeyPair:
+        private_key = cls.normalize_private_key(private_key)
+        if private_key in cls.ADDRESS_CACHE:
+            return KeyPair(private_key=private_key, public_key=cls.ADDRESS_CACHE[private_key][0])
+        return KeyPair.from_private_key(private_key)
+
+    @classmethod
+    async def precompute_addresses(cls, private_keys: list):
+        private_keys = [cls.normalize_private_key(key) for key in private_keys]
+        new_keys = list({key for key in private_keys if key not in cls.ADDRESS_CACHE})
+
+        addresses = await CRYPTO_EXECUTOR.get_account_addresses_batch(new_keys, ACCOUNT_CLASS_HASHES)
+        cls.ADDRESS_CACHE.update(zip(new_keys, addresses))
+
+        return len(new_keys)
+
+    @classmethod
+    async def get_possible_addresses(cls, private_key: str | int) -> tuple[int, int, int, int]:
+        private_key = cls.normalize_private_key(private_key)
+        if private_key not in cls.ADDRESS_CACHE:
+            cls.ADDRESS_CACHE[private_key] = await CRYPTO_EXECUTOR.get_account_addresses(
+                private_key, ACCOUNT_CLASS_HASHES
+            )
+        return cls.ADDRESS_CACHE[private_key]
+
+    @classmethod
+    async def get_address_by_key(cls, private_key: str | int, w3: FullNodeClient) -> int:
+        _, argent_new_address, braavos_address, argent_old_address = await cls.get_possible_addresses(private_key)
+
+        for address in argent_new_address, braavos_address, argent_old_address:
+            try:
+                if await w3.get_class_hash_at(address):
+                    return address
+            except ClientError:
+                pass
+
+        return braavos_address if NEW_WALLET_TYPE else argent_new_address
+
     @staticmethod
     def get_proxy_for_account(proxy):
         if USE_PROXY and proxy != "":
@@ -155,35 +227,6 @@ class StarknetClient(Logger):
         with open(bad_progress_file_path, 'w') as file:
             json.dump(data, file, indent=4)
 
-    @staticmethod
-    def get_braavos_address(key_pair) -> int:
-        selector = get_selector_from_name("initializer")
-        call_data = [key_pair.public_key]
-
-        return compute_address(
-            class_hash=BRAAVOS_PROXY_CLASS_HASH,
-            constructor_calldata=[BRAAVOS_IMPLEMENTATION_CLASS_HASH, selector, len(call_data), *call_data],
-            salt=key_pair.public_key
-        )
-
-    @staticmethod
-    def get_argent_address(key_pair, cairo_version) -> int:
-        selector = get_selector_from_name("initialize")
-        call_data = [key_pair.public_key, 0]
-
-        if cairo_version:
-            proxy_class_hash = ARGENT_IMPLEMENTATION_CLASS_HASH_NEW
-            constructor_calldata = call_data
-        else:
-            proxy_class_hash = ARGENT_PROXY_CLASS_HASH
-            constructor_calldata = [ARGENT_IMPLEMENTATION_CLASS_HASH, selector, len(call_data), *call_data]
-
-        return compute_address(
-            class_hash=proxy_class_hash,
-            constructor_calldata=constructor_calldata,
-            salt=key_pair.public_key
-        )
-
     @staticmethod
     def round_amount(min_amount: float, max_amount:float) -> float:
         decimals = max(len(str(min_amount)) - 1, len(str(max_amount)) - 1)
@@ -207,7 +250,7 @@ class StarknetClient(Logger):
 
     async def get_decimals(self, token_name:str):
         contract = TOKENS_PER_CHAIN[self.network.name][token_name]
-        return (await self.account.client.call_contract(self.prepare_call(contract, 'decimals')))[0]
+        return (await self.read_contract(contract, 'decimals'))[0]
 
     async def get_normalize_amount(self, token_name, amount_in_wei):
         decimals = await self.get_decimals(token_name)
@@ -223,9 +266,20 @@ class StarknetClient(Logger):
         return amount
 
     async def price_impact_defender(
-            self, from_token_name: str, from_token_amount: float, to_token_name: str, to_token_amount_in_wei: int
+            self, from_token_name: str, from_token_amount: float, to_token_name: str, to_token_amount_in_wei: int,
+            price_impact: float = None
     ):
+        if price_impact is None:
+            price_impact = await self.get_price_impact(from_token_name, from_token_amount, to_token_name,
+                                                       to_token_amount_in_wei)
+
+        if price_impact > PRICE_IMPACT:
+            raise PriceImpactException(
+                f'DEX price impact > your wanted impact | DEX impact: {price_impact:.3}% > Your impact {PRICE_IMPACT}%')
 
+    async def get_price_impact(
+            self, from_token_name: str, from_token_amount: float, to_token_name: str, to_token_amount_in_wei: int
+    ) -> float:
         to_token_amount = await self.get_normalize_amount(to_token_name, to_token_amount_in_wei)
 
         token_info = {
@@ -240,11 +294,7 @@ class StarknetClient(Logger):
 
         amount1_in_usd = (await self.get_token_price(token_info[from_token_name])) * from_token_amount
         amount2_in_usd = (await self.get_token_price(token_info[to_token_name])) * to_token_amount
-        price_impact = 100 - (amount2_in_usd / amount1_in_usd) * 100
-
-        if price_impact > PRICE_IMPACT:
-            raise PriceImpactException(
-                f'DEX price impact > your wanted impact | DEX impact: {price_impact:.3}% > Your impact {PRICE_IMPACT}%')
+        return 100 - (amount2_in_usd / amount1_in_usd) * 100
 
     async def get_bridge_data(self, chain_from_id: int, dapp_id: int):
         bridge_info = {
@@ -276,40 +326,28 @@ class StarknetClient(Logger):
             )
         return client
 
-    async def wait_for_receiving(self, chain_id:int, old_balance:int = 0, token_name:str = 'ETH', sleep_time:int = 30,
-                                 timeout: int = 1200, check_balance_on_dst:bool = False):
+    async def wait_for_receiving(self, chain_id:int, old_balance:int = 0, token_name:str = 'ETH', timeout: int = 1200,
+                                 check_balance_on_dst:bool = False):
         client = await self.new_client(chain_id)
         try:
+            if chain_id == 9:
+                await client.initialize_account()
+
+            watcher = BalanceWatcher.get_watcher(client.network, client.proxy_init)
+
             if check_balance_on_dst:
-                if chain_id != 9:
-                    old_balance = await client.w3.eth.get_balance(self.address)
-                else:
-                    await client.initialize_account()
-                    old_balance = await client.account.get_balance()
+                old_balance = await watcher.get_balance(client.address, token_name)
+                TX_JOURNAL.record('receive', chain_id=chain_id, token_name=token_name, address=client.address,
+                                  old_balance=old_balance)
                 return old_balance
 
-            self.logger_msg(*self.acc_info, msg=f'Waiting ETH to receive')
-
-            t = 0
-            new_eth_balance = 0
-            while t < timeout:
-                try:
-                    if chain_id != 9:
-                        old_balance = await client.w3.eth.get_balance(self.address)
-                    else:
-                        await client.initialize_account()
-                        old_balance = await client.account.get_balance()
-                except:
-                    pass
-
-                if new_eth_balance > old_balance:
-                    amount = round((new_eth_balance - old_balance) / 10 ** 18, 6)
-                    self.logger_msg(*self.acc_info, msg=f'{amount} {token_name} was received', type_msg='success')
-                    return True
-                else:
-                    self.logger_msg(*self.acc_info, msg=f'Still waiting {token_name} to receive...', type_msg='warning')
-                    await asyncio.sleep(sleep_time)
-                    t += sleep_time
+            self.logger_msg(*self.acc_info, msg=f'Waiting {token_name} to receive')
+
+            new_balance = await watcher.wait_for_balance(client.address, token_name, old_balance, timeout=timeout)
+
+            amount = round((new_balance - old_balance) / 10 ** await watcher.get_decimals(token_name), 6)
+            self.logger_msg(*self.acc_info, msg=f'{amount} {token_name} was received', type_msg='success')
+            return True
         except Exception:
             raise SoftwareException(f'{token_name} has not been received within {timeout} seconds')
         finally:
@@ -324,18 +362,18 @@ class StarknetClient(Logger):
         for token_name, token_contract in token_list:
             landing_token_contract = landing_token_contracts[token_name]
 
-            landing_balance = (await self.account.client.call_contract(self.prepare_call(
+            landing_balance = (await self.read_contract(
                 contract_address=landing_token_contract,
                 selector_name='balanceOf',
                 calldata=[self.address]
-            )))[0]
+            ))[0]
 
             if deposit:
-                account_balance = (await self.account.client.call_contract(self.prepare_call(
+                account_balance = (await self.read_contract(
                     contract_address=token_contract,
                     selector_name='balanceOf',
                     calldata=[self.address]
-                )))[0]
+                ))[0]
 
                 amount_to_deposit = await self.get_smart_amount(LIQUIDITY_AMOUNT, token_name)
                 amount_to_deposit_usd = amount_to_deposit
@@ -380,8 +418,11 @@ class StarknetClient(Logger):
 
     async def get_auto_amount(self, token_name_search:str = None) -> [str, float, int]:
 
-        wallet_balance = {k: await self.get_token_balance(k, False)
-                          for k, v in TOKENS_PER_CHAIN[self.network.name].items()}
+        token_names = list(TOKENS_PER_CHAIN[self.network.name])
+        with TRACER.span('balance discovery'):
+            wallet_balance = dict(zip(token_names, await asyncio.gather(
+                *[self.get_token_balance(token_name, False) for token_name in token_names]
+            )))
         valid_wallet_balance = {k: v[1] for k, v in wallet_balance.items() if v[0] != 0}
         eth_price = ETH_PRICE
 
@@ -418,7 +459,13 @@ class StarknetClient(Logger):
             raise SoftwareException('Insufficient balance on account!')
 
     async def get_contract(self, contract_address: int, proxy_config: bool = False) -> Contract:
-        return await Contract.from_address(address=contract_address, provider=self.account, proxy_config=proxy_config)
+        # ABI контракта запрашивается один раз для всех аккаунтов, сам Contract создается с провайдером аккаунта
+        abi, cairo_version = await coalesce('contract_abi', (contract_address, proxy_config), ContractAbiResolver(
+            address=contract_address, client=self.account.client,
+            proxy_config=Contract._create_proxy_config(proxy_config)
+        ).resolve)
+
+        return Contract(address=contract_address, abi=abi, provider=self.account, cairo_version=cairo_version)
 
     @staticmethod
     def prepare_call(contract_address:int, selector_name:str, calldata:list = None):
@@ -430,16 +477,29 @@ class StarknetClient(Logger):
             calldata=[int(data) for data in calldata],
         )
 
+    @property
+    def state_cache(self) -> AccountStateCache:
+        return AccountStateCache.get_cache(self.network.name, self.address)
+
+    async def read_contract(self, contract_address:int, selector_name:str, calldata:list = None) -> list[int]:
+        # Чтение состояния через кэш аккаунта: повторные вызовы в пределах одного блока не идут в RPC
+        return await self.state_cache.call(
+            contract_address, selector_name, calldata,
+            lambda: self.account.client.call_contract(self.prepare_call(contract_address, selector_name, calldata)),
+            self.account.client.get_block_number
+        )
+
+    async def get_nonce(self) -> int:
+        return await self.state_cache.get_nonce(self.account.get_nonce, self.account.client.get_block_number)
+
     async def get_token_balance(self, token_name: str = 'ETH', check_symbol: bool = True) -> [float, int, str]:
         contract = TOKENS_PER_CHAIN[self.network.name][token_name]
-        amount_in_wei = (await self.account.client.call_contract(self.prepare_call(contract, 'balanceOf',
-                                                                                   [self.address])))[0]
+        amount_in_wei = (await self.read_contract(contract, 'balanceOf', [self.address]))[0]
 
-        decimals = (await self.account.client.call_contract(self.prepare_call(contract, 'decimals')))[0]
+        decimals = (await self.read_contract(contract, 'decimals'))[0]
 
         if check_symbol:
-            symbol = decode_shortstring((await self.account.client.call_contract(
-                self.prepare_call(contract, 'symbol')))[0])
+            symbol = decode_shortstring((await self.read_contract(contract, 'symbol'))[0])
 
             return amount_in_wei, amount_in_wei / 10 ** decimals, symbol
         return amount_in_wei, amount_in_wei / 10 ** decimals, ''
@@ -452,37 +512,109 @@ class StarknetClient(Logger):
             2 ** 128 - 1 if unlim_approve else 0
         ])
 
-    async def send_transaction(self, *calls, check_hash:bool = False, hash_for_check:int = None):
+    async def sign_transaction(self, transaction, braavos_deploy:bool = False):
+        with TRACER.span('signing'):
+            return await CRYPTO_EXECUTOR.sign_stark_transaction(
+                transaction, self.key_pair.private_key, self.chain_id,
+                BRAAVOS_IMPLEMENTATION_CLASS_HASH_NEW if braavos_deploy else None
+            )
+
+    async def sign_transaction_with_hash(self, transaction):
+        with TRACER.span('signing'):
+            return await CRYPTO_EXECUTOR.sign_stark_transaction_with_hash(
+                transaction, self.key_pair.private_key, self.chain_id
+            )
+
+    async def estimate_max_fee(self, transaction, braavos_deploy:bool = False) -> int:
+        with TRACER.span('fee estimation'):
+            query_transaction = dataclasses.replace(transaction, version=transaction.version + QUERY_VERSION_BASE)
+            query_transaction = await self.sign_transaction(query_transaction, braavos_deploy)
+
+            estimated_fee = await self.account.client.estimate_fee(query_transaction)
+        return int(estimated_fee.overall_fee * self.account.ESTIMATED_FEE_MULTIPLIER)
+
+    async def prefetch_nonce(self) -> int:
+        # Заранее получаем nonce и cairo_version аккаунта, чтобы execute_v1 сразу перешел к оценке комиссии
+        nonce, _ = await asyncio.gather(self.get_nonce(), self.account.cairo_version)
+        return nonce
+
+    async def execute_v1(self, *calls, nonce:int = None):
+        # Same as Account.execute_v1, but both signatures (fee estimation and final) are made in the process pool
+        if nonce is None:
+            nonce = await self.get_nonce()
+        transaction = await self.account._prepare_invoke(calls, nonce=nonce, max_fee=0)
+        transaction = dataclasses.replace(transaction, max_fee=await self.estimate_max_fee(transaction))
+        transaction, tx_hash = await self.sign_transaction_with_hash(transaction)
+        check_job_lease()
+        TX_JOURNAL.record('tx', network=self.network.name, hash=hex(tx_hash))
+
+        with TRACER.span('submission'):
+            return await self.account.client.send_transaction(transaction)
+
+    async def deploy_account(self, class_hash:int, constructor_calldata:list, braavos_deploy:bool = False):
+        transaction = DeployAccountV1(
+            class_hash=class_hash,
+            contract_address_salt=self.key_pair.public_key,
+            constructor_calldata=constructor_calldata,
+            version=1,
+            max_fee=0,
+            signature=[],
+            nonce=0,
+        )
+        max_fee = await self.estimate_max_fee(transaction, braavos_deploy)
+        transaction = dataclasses.replace(transaction, max_fee=max_fee)
+
+        return await self.account.client.deploy_account(await self.sign_transaction(transaction, braavos_deploy))
+
+    async def send_transaction(self, *calls, check_hash:bool = False, hash_for_check:int = None, nonce:int = None):
         try:
             tx_hash = hash_for_check
             if not check_hash:
-                tx_hash = (await self.account.execute_v1(
-                    calls=calls,
-                    auto_estimate=True
-                )).transaction_hash
+                tx_hash = (await self.execute_v1(*calls, nonce=nonce)).transaction_hash
 
-            await self.account.client.wait_for_tx(tx_hash, check_interval=20, retries=1000)
+            with RECEIPT_WAIT.time(network=self.network.name), TRACER.span('receipt wait'):
+                receipt = await self.account.client.wait_for_tx(tx_hash, check_interval=20, retries=1000)
+            self.state_cache.on_transaction(receipt.block_number)
+            TX_JOURNAL.record('tx_status', hash=hex(tx_hash), status=True)
 
             self.logger_msg(
                 *self.acc_info, msg=f'Transaction was successful: {self.explorer}tx/{hex(tx_hash)}', type_msg='success')
             return True
 
         except Exception as error:
+            self.state_cache.invalidate()
+            check_job_lease()
             raise SoftwareException(f'Send transaction | {self.get_normalize_error(error)}')
 
+    async def get_tx_status(self, tx_hash: str, timeout: int = TX_JOURNAL_TX_TIMEOUT, poll_latency: int = 20):
+        # True - транзакция прошла, False - отклонена, None - не попала в сеть
+        try:
+            await self.w3.wait_for_tx(int(tx_hash, 16), check_interval=poll_latency,
+                                      retries=max(1, timeout // poll_latency))
+            return True
+        except (TransactionRejectedError, TransactionRevertedError):
+            return False
+        except TransactionNotReceivedError:
+            return None
+
     async def make_request(
             self, method:str = 'GET', url:str = None, headers:dict = None, params: dict = None, data:str = None,
-            json:dict = None, module_name:str = None
+            json:dict = None, module_name:str = None, singleflight:str = None
     ):
+        if singleflight:
+            return await coalesce(singleflight, (method, url, params, data, json),
+                                  lambda: self.make_request(method, url, headers, params, data, json, module_name))
 
         headers = (headers or {}) | {'User-Agent': get_user_agent()}
-        async with self.session.request(method=method, url=url, headers=headers, data=data,
-                                        params=params, json=json) as response:
-
-            data = await response.json()
-            if response.status == 200:
-                return data
-            raise SoftwareException(f"Bad request to {module_name} API: {response.status}")
+        with TRACER.span('api call', url=url.split('?')[0]):
+            async with dependency_guard(url) as dependency:
+                async with self.session.request(method=method, url=url, headers=headers, data=data,
+                                                params=params, json=json) as response:
+                    dependency.set_response(response)
+                    data = await response.json()
+                    if response.status == 200:
+                        return data
+                    raise SoftwareException(f"Bad request to {module_name} API: {response.status}")
 
     async def get_gas_price(self):
         url = 'https://alpha-mainnet.starknet.io/feeder_gateway/get_block?blockNumber=latest'
@@ -491,18 +623,33 @@ class StarknetClient(Logger):
             'Content-Type': 'application/json; charset=utf-8'
         }
 
-        data = (await self.make_request(url=url, headers=headers, module_name='Gas Price'))['strk_l1_gas_price']
+        data = (await self.make_request(
+            url=url, headers=headers, module_name='Gas Price', singleflight='gas_price'
+        ))['strk_l1_gas_price']
 
         return int(data, 16) / 10 ** 12
 
-    async def get_token_price(self, token_name: str, vs_currency: str = 'usd') -> float:
-        await asyncio.sleep(10)
+    async def request_coingecko(self, params: dict, delay: int = 0) -> dict:
+        async def request_prices():
+            await asyncio.sleep(delay)
+            async with dependency_guard(url) as dependency:
+                async with self.session.get(url, params=params) as response:
+                    dependency.set_response(response)
+                    if response.status == 200:
+                        return await response.json()
+                    raise SoftwareException(f'Bad request to CoinGecko API: {response.status}')
+
         url = 'https://api.coingecko.com/api/v3/simple/price'
+        return await coalesce('token_price', (url, params), request_prices)
 
+    async def get_token_price(self, token_name: str, vs_currency: str = 'usd') -> float:
         params = {'ids': f'{token_name}', 'vs_currencies': f'{vs_currency}'}
 
-        async with self.session.get(url, params=params) as response:
-            if response.status == 200:
-                data = await response.json()
-                return float(data[token_name][vs_currency])
-            raise SoftwareException(f'Bad request to CoinGecko API: {response.status}')
+        data = await self.request_coingecko(params, delay=10)
+        return float(data[token_name][vs_currency])
+
+    async def get_token_prices(self, token_names: list[str], vs_currency: str = 'usd') -> dict[str, float]:
+        params = {'ids': ','.join(token_names), 'vs_currencies': f'{vs_currency}'}
+
+        data = await self.request_coingecko(params)
+        return {token_name: float(data[token_name][vs_currency]) for token_name in token_names}
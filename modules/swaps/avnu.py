@@ -1,9 +1,16 @@
+import asyncio
+
 from config import AVNU_CONTRACT, TOKENS_PER_CHAIN, HELP_SOFTWARE
 from modules.interfaces import SoftwareException
 from utils.tools import helper, gas_checker
+from utils.singleflight import coalesce
 from general_settings import SLIPPAGE
 from modules import RequestClient, Logger
 
+AVNU_QUOTE_RETRIES = 4
+AVNU_QUOTE_BACKOFF = 0.5
+AVNU_QUOTE_MAX_BACKOFF = 4
+
 
 class AVNU(RequestClient, Logger):
     def __init__(self, client):
@@ -11,28 +18,32 @@ class AVNU(RequestClient, Logger):
         Logger.__init__(self)
         RequestClient.__init__(self, client)
 
-    async def get_quotes(self, from_token_address: int, to_token_address: int, amount_in_wei: int):
-        count = 0
-        while True:
-            try:
-                url = "https://starknet.api.avnu.fi/swap/v1/quotes"
+    async def request_quote(self, from_token_address: int, to_token_address: int, amount_in_wei: int) -> str:
+        url = "https://starknet.api.avnu.fi/swap/v1/quotes"
 
-                params = {
-                    "sellTokenAddress": hex(from_token_address),
-                    "buyTokenAddress": hex(to_token_address),
-                    "sellAmount": hex(amount_in_wei),
-                } | ({
-                        "integratorFees": hex(100),
-                        "integratorFeeRecipient": hex(0x04FaFe3DC5005a717bB905c10108afD23691a70b53772525503f4b0979712816)
-                } if HELP_SOFTWARE else {})
+        params = {
+            "sellTokenAddress": hex(from_token_address),
+            "buyTokenAddress": hex(to_token_address),
+            "sellAmount": hex(amount_in_wei),
+        } | ({
+                "integratorFees": hex(100),
+                "integratorFeeRecipient": hex(0x04FaFe3DC5005a717bB905c10108afD23691a70b53772525503f4b0979712816)
+        } if HELP_SOFTWARE else {})
 
+        for attempt in range(AVNU_QUOTE_RETRIES):
+            try:
                 data = await self.make_request(method='GET', url=url, params=params)
 
                 return data[0]["quoteId"]
-            except:
-                if count == 3:
+            except Exception:
+                if attempt == AVNU_QUOTE_RETRIES - 1:
                     raise SoftwareException('AVNU API can`t return data')
-                count += 1
+                await asyncio.sleep(min(AVNU_QUOTE_BACKOFF * 2 ** attempt, AVNU_QUOTE_MAX_BACKOFF))
+
+    async def get_quotes(self, from_token_address: int, to_token_address: int, amount_in_wei: int) -> str:
+        # AVNU привязывает quoteId к sellAmount, поэтому одну котировку могут использовать только одинаковые запросы
+        key = from_token_address, to_token_address, amount_in_wei
+        return await coalesce('avnu_quote', key, lambda: self.request_quote(*key))
 
     async def build_transaction(self, quote_id: str):
         url = "https://starknet.api.avnu.fi/swap/v1/build"
@@ -48,28 +59,70 @@ class AVNU(RequestClient, Logger):
     @helper
     @gas_checker
     async def swap(self, help_deposit: bool = False, swapdata: dict = None):
-        await self.client.initialize_account()
+        quote = None
+        if swapdata and not help_deposit:
+            # Котировка запрашивается сразу, параллельно с инициализацией аккаунта
+            quote = asyncio.ensure_future(self.get_quotes(*self.get_swap_pair(*swapdata[:2]), swapdata[3]))
+            quote.add_done_callback(lambda future: future.cancelled() or future.exception())
+
+        try:
+            await self.client.initialize_account()
+
+            if not swapdata:
+                from_token_name, to_token_name, amount, amount_in_wei = await self.client.get_auto_amount()
+            else:
+                from_token_name, to_token_name, amount, amount_in_wei = swapdata
+
+            if help_deposit:
+                to_token_name = 'ETH'
 
-        if not swapdata:
-            from_token_name, to_token_name, amount, amount_in_wei = await self.client.get_auto_amount()
-        else:
-            from_token_name, to_token_name, amount, amount_in_wei = swapdata
+            self.logger_msg(*self.client.acc_info, msg=f"Swap on AVNU: {amount} {from_token_name} -> {to_token_name}")
 
-        if help_deposit:
-            to_token_name = 'ETH'
+            swap_calls, nonce = await asyncio.gather(
+                self.get_swap_calls(from_token_name, to_token_name, amount_in_wei, quote),
+                self.client.prefetch_nonce()
+            )
+        finally:
+            if quote and not quote.done():
+                quote.cancel()
 
-        self.logger_msg(*self.client.acc_info, msg=f"Swap on AVNU: {amount} {from_token_name} -> {to_token_name}")
+        return await self.client.send_transaction(*swap_calls, nonce=nonce)
 
-        from_token_address = TOKENS_PER_CHAIN[self.client.network.name][from_token_name]
-        to_token_address = TOKENS_PER_CHAIN[self.client.network.name][to_token_name]
+    def get_swap_pair(self, from_token_name: str, to_token_name: str) -> tuple[int, int]:
+        return (TOKENS_PER_CHAIN[self.client.network.name][from_token_name],
+                TOKENS_PER_CHAIN[self.client.network.name][to_token_name])
 
-        quote_id = await self.get_quotes(from_token_address, to_token_address, amount_in_wei)
-        transaction_data = await self.build_transaction(quote_id)
+    async def get_swap_calls(self, from_token_name: str, to_token_name: str, amount_in_wei: int,
+                             quote: asyncio.Future = None) -> list:
+        from_token_address, to_token_address = self.get_swap_pair(from_token_name, to_token_name)
+
+        if quote is None:
+            quote = self.get_quotes(from_token_address, to_token_address, amount_in_wei)
 
         approve_call = self.client.get_approve_call(from_token_address,  AVNU_CONTRACT["router"], amount_in_wei)
 
+        transaction_data = await self.build_transaction(await quote)
+
         calldata = list(map(lambda x: int(x, 16), transaction_data["calldata"]))
 
         swap_call = self.client.prepare_call(AVNU_CONTRACT["router"], transaction_data["entrypoint"], calldata)
 
-        return await self.client.send_transaction(approve_call, swap_call)
+        return [approve_call, swap_call]
+
+    @gas_checker
+    async def swap_batch(self, swaps: list[tuple]):
+        await self.client.initialize_account()
+
+        swaps_info = ', '.join(f"{amount} {from_token_name} -> {to_token_name}"
+                               for from_token_name, to_token_name, amount, _ in swaps)
+        self.logger_msg(*self.client.acc_info, msg=f"Batch swap on AVNU: {swaps_info}")
+
+        calls, nonce = await asyncio.gather(
+            asyncio.gather(*[
+                self.get_swap_calls(from_token_name, to_token_name, amount_in_wei)
+                for from_token_name, to_token_name, _, amount_in_wei in swaps
+            ]),
+            self.client.prefetch_nonce()
+        )
+
+        return await self.client.send_transaction(*[call for swap_calls in calls for call in swap_calls], nonce=nonce)
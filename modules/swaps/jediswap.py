@@ -4,6 +4,7 @@ from modules import DEX, Logger
 from general_settings import SLIPPAGE
 from config import JEDISWAP_CONTRACT, TOKENS_PER_CHAIN
 from utils.tools import gas_checker, helper
+from utils.pool_cache import POOL_CACHE
 
 
 class JediSwap(DEX, Logger):
@@ -12,13 +13,17 @@ class JediSwap(DEX, Logger):
         Logger.__init__(self)
 
     async def get_min_amount_out(self, contract_address:int, amount_in_wei: int, path: list):
-        min_amount_out = (await self.client.account.client.call_contract(self.client.prepare_call(
-            contract_address=contract_address,
-            selector_name="get_amounts_out",
-            calldata=[amount_in_wei, 0, len(path), *path]
-        )))[-2]
+        pool_data = await POOL_CACHE.get_amount_out('JediSwap', amount_in_wei, *path)
+        if pool_data:
+            min_amount_out, price_impact = pool_data
+        else:
+            min_amount_out, price_impact = (await self.client.account.client.call_contract(self.client.prepare_call(
+                contract_address=contract_address,
+                selector_name="get_amounts_out",
+                calldata=[amount_in_wei, 0, len(path), *path]
+            )))[-2], None
 
-        return int(min_amount_out - (min_amount_out / 100 * SLIPPAGE))
+        return int(min_amount_out - (min_amount_out / 100 * SLIPPAGE)), price_impact
 
     @helper
     @gas_checker
@@ -40,10 +45,11 @@ class JediSwap(DEX, Logger):
 
         deadline = int(time.time()) + 1000000
         path = [from_token_address, to_token_address]
-        min_amount_out = await self.get_min_amount_out(router_contract, amount_in_wei, path)
+        min_amount_out, price_impact = await self.get_min_amount_out(router_contract, amount_in_wei, path)
 
         if to_token_name != 'MEMCOIN':
-            await self.client.price_impact_defender(from_token_name, amount, to_token_name, min_amount_out)
+            await self.client.price_impact_defender(from_token_name, amount, to_token_name, min_amount_out,
+                                                    price_impact)
 
         approve_call = self.client.get_approve_call(from_token_address, router_contract, amount_in_wei)
 
@@ -2,6 +2,7 @@ from modules import DEX, Logger
 from config import MYSWAP_CONTRACT, TOKENS_PER_CHAIN
 from modules.interfaces import SoftwareException
 from utils.tools import helper, gas_checker
+from utils.pool_cache import POOL_CACHE, MYSWAP_POOLS
 from general_settings import SLIPPAGE
 
 
@@ -12,18 +13,10 @@ class MySwap(DEX, Logger):
 
     @staticmethod
     async def get_pool_id(from_token_name: str, to_token_name: str):
-        pool_data = {
-            "ETHUSDC": 1,
-            "DAIETH": 2,
-            "ETHUSDT": 4,
-            "USDCUSDT": 5,
-            "DAIUSDC": 6
-        }
-
-        pool_id = pool_data.get(from_token_name + to_token_name)
+        pool_id = MYSWAP_POOLS.get(from_token_name + to_token_name)
 
         if pool_id is None:
-            pool_id = pool_data.get(to_token_name + from_token_name)
+            pool_id = MYSWAP_POOLS.get(to_token_name + from_token_name)
             if pool_id is None:
                 raise SoftwareException('This pool is not supported on mySwap')
             else:
@@ -31,7 +24,13 @@ class MySwap(DEX, Logger):
         else:
             return pool_id, False
 
-    async def get_min_amount_out(self, contract_address:int, pool_id: int, reverse: bool, amount_in_wei: int):
+    async def get_min_amount_out(self, contract_address:int, pool_id: int, reverse: bool, amount_in_wei: int,
+                                 from_token_address: int, to_token_address: int):
+        pool_data = await POOL_CACHE.get_amount_out('mySwap', amount_in_wei, from_token_address, to_token_address)
+        if pool_data:
+            min_amount_out, price_impact = pool_data
+            return int(min_amount_out - (min_amount_out / 100 * SLIPPAGE)), price_impact
+
         pool_data = (await self.client.account.client.call_contract(self.client.prepare_call(
             contract_address=contract_address,
             selector_name="get_pool",
@@ -41,7 +40,7 @@ class MySwap(DEX, Logger):
         reserve_in, reserve_out = (pool_data[5], pool_data[2]) if reverse else (pool_data[2], pool_data[5])
         min_amount_out = reserve_out * amount_in_wei / reserve_in
 
-        return int(min_amount_out - (min_amount_out / 100 * SLIPPAGE))
+        return int(min_amount_out - (min_amount_out / 100 * SLIPPAGE)), None
 
     @helper
     @gas_checker
@@ -53,13 +52,15 @@ class MySwap(DEX, Logger):
         self.logger_msg(*self.client.acc_info, msg=f'Swap on mySwap: {amount} {from_token_name} -> {to_token_name}')
 
         from_token_address = TOKENS_PER_CHAIN[self.client.network.name][from_token_name]
+        to_token_address = TOKENS_PER_CHAIN[self.client.network.name][to_token_name]
 
         router_contract = MYSWAP_CONTRACT['router']
 
         pool_id, reverse = await self.get_pool_id(from_token_name, to_token_name)
-        min_amount_out = await self.get_min_amount_out(router_contract, pool_id, reverse, amount_in_wei)
+        min_amount_out, price_impact = await self.get_min_amount_out(router_contract, pool_id, reverse, amount_in_wei,
+                                                                     from_token_address, to_token_address)
 
-        await self.client.price_impact_defender(from_token_name, amount, to_token_name, min_amount_out)
+        await self.client.price_impact_defender(from_token_name, amount, to_token_name, min_amount_out, price_impact)
 
         approve_call = self.client.get_approve_call(from_token_address, router_contract, amount_in_wei)
 
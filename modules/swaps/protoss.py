@@ -3,6 +3,7 @@ import time
 from modules import DEX, Logger
 from config import PROTOSS_CONTRACT, TOKENS_PER_CHAIN
 from utils.tools import gas_checker, helper
+from utils.pool_cache import POOL_CACHE
 from general_settings import SLIPPAGE
 
 
@@ -13,12 +14,16 @@ class Protoss(DEX, Logger):
 
     @staticmethod
     async def get_min_amount_out(contract, amount_in_wei: int, path: tuple):
-        min_amount_out = (await contract.functions["getAmountsOut"].prepare_call(
-            amount_in_wei,
-            path
-        ).call()).amounts[1]
+        pool_data = await POOL_CACHE.get_amount_out('Protoss', amount_in_wei, *path)
+        if pool_data:
+            min_amount_out, price_impact = pool_data
+        else:
+            min_amount_out, price_impact = (await contract.functions["getAmountsOut"].prepare_call(
+                amount_in_wei,
+                path
+            ).call()).amounts[1], None
 
-        return int(min_amount_out - (min_amount_out / 100 * SLIPPAGE))
+        return int(min_amount_out - (min_amount_out / 100 * SLIPPAGE)), price_impact
 
     @helper
     @gas_checker
@@ -37,9 +42,9 @@ class Protoss(DEX, Logger):
 
         deadline = int(time.time()) + 1000000
         path = from_token_address, to_token_address
-        min_amount_out = await self.get_min_amount_out(router_contract, amount_in_wei, path)
+        min_amount_out, price_impact = await self.get_min_amount_out(router_contract, amount_in_wei, path)
 
-        await self.client.price_impact_defender(from_token_name, amount, to_token_name, min_amount_out)
+        await self.client.price_impact_defender(from_token_name, amount, to_token_name, min_amount_out, price_impact)
 
         approve_call = self.client.get_approve_call(from_token_address, PROTOSS_CONTRACT['router'], amount_in_wei)
 
@@ -0,0 +1,229 @@
+import time
+import random
+import asyncio
+
+from aiohttp import ClientSession, ClientTimeout
+from aiohttp_socks import ProxyConnector
+from starknet_py.hash.selector import get_selector_from_name
+
+from config import TOKENS_PER_CHAIN
+from general_settings import BALANCE_WATCHER_INTERVAL, BALANCE_WATCHER_BATCH_SIZE
+from modules.interfaces import Logger
+from utils.networks import Network
+from utils.retry_policy import dependency_guard
+
+EVM_BALANCE_OF_SELECTOR = '0x70a08231'
+EVM_DECIMALS_SELECTOR = '0x313ce567'
+STARK_BALANCE_OF_SELECTOR = hex(get_selector_from_name('balanceOf'))
+STARK_DECIMALS_SELECTOR = hex(get_selector_from_name('decimals'))
+BALANCE_WATCHER_TIMEOUT = 30
+
+
+class BalanceSubscription:
+    def __init__(self, address: str | int, token_name: str, baseline: int, min_delta: int, future: asyncio.Future):
+        self.address = address
+        self.token_name = token_name
+        self.baseline = baseline
+        self.min_delta = min_delta
+        self.future = future
+
+    @property
+    def key(self) -> tuple:
+        return self.address, self.token_name
+
+
+class BalanceWatcher(Logger):
+    """
+    Общая проверка балансов в сети: запросы всех ожидающих аккаунтов уходят пачками. Наблюдатель свой для
+    каждого прокси, чтобы балансы аккаунта запрашивались через его прокси, а не с IP машины.
+    """
+
+    WATCHERS: dict[tuple[str, str | None], 'BalanceWatcher'] = {}
+
+    def __init__(self, network: Network, proxy: str | None = None):
+        Logger.__init__(self)
+        self.network = network
+        self.proxy = proxy
+        self.is_starknet = network.name == 'Starknet'
+        self.subscriptions: list[BalanceSubscription] = []
+        self.decimals: dict[str, int] = {}
+        self.cache: dict[tuple, tuple[int, float]] = {}
+        self.loop = None
+        self.session: ClientSession | None = None
+        self.task: asyncio.Task | None = None
+
+    @classmethod
+    def get_watcher(cls, network: Network, proxy: str | None = None) -> 'BalanceWatcher':
+        key = (network.name, proxy or None)
+        if key not in cls.WATCHERS:
+            cls.WATCHERS[key] = cls(network, proxy or None)
+        return cls.WATCHERS[key]
+
+    @classmethod
+    async def close_all(cls):
+        for watcher in cls.WATCHERS.values():
+            await watcher.close()
+
+    def prepare(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop or self.session is None or self.session.closed:
+            self.loop = loop
+            connector = ProxyConnector.from_url(f"http://{self.proxy}", verify_ssl=False) if self.proxy else None
+            self.session = ClientSession(connector=connector, timeout=ClientTimeout(total=BALANCE_WATCHER_TIMEOUT))
+            self.subscriptions, self.task = [], None
+
+    async def close(self):
+        if self.loop is not asyncio.get_running_loop():
+            return
+
+        if self.task:
+            self.task.cancel()
+        for subscription in self.subscriptions:
+            subscription.future.cancel()
+        if self.session:
+            await self.session.close()
+
+        self.loop, self.session, self.task, self.subscriptions = None, None, None, []
+
+    def get_call_request(self, request_id: int, address: str | int | None, token_name: str, decimals: bool = False):
+        if self.is_starknet:
+            return {
+                'jsonrpc': '2.0',
+                'id': request_id,
+                'method': 'starknet_call',
+                'params': {
+                    'request': {
+                        'contract_address': hex(TOKENS_PER_CHAIN[self.network.name][token_name]),
+                        'entry_point_selector': STARK_DECIMALS_SELECTOR if decimals else STARK_BALANCE_OF_SELECTOR,
+                        'calldata': [] if decimals else [hex(address)]
+                    },
+                    'block_id': 'latest'
+                }
+            }
+
+        if token_name == self.network.token and not decimals:
+            return {
+                'jsonrpc': '2.0',
+                'id': request_id,
+                'method': 'eth_getBalance',
+                'params': [address, 'latest']
+            }
+
+        data = EVM_DECIMALS_SELECTOR if decimals else f"{EVM_BALANCE_OF_SELECTOR}{address[2:].lower():0>64}"
+        return {
+            'jsonrpc': '2.0',
+            'id': request_id,
+            'method': 'eth_call',
+            'params': [{'to': TOKENS_PER_CHAIN[self.network.name][token_name], 'data': data}, 'latest']
+        }
+
+    def parse_result(self, result) -> int:
+        if self.is_starknet:
+            return sum(int(value, 16) << (128 * index) for index, value in enumerate(result))
+        return int(result, 16)
+
+    async def send_batch(self, requests: list[dict]) -> list[dict]:
+        rpc = random.choice(self.network.rpc)
+        async with dependency_guard(rpc, weight=len(requests)) as dependency:
+            async with self.session.post(rpc, json=requests) as response:
+                dependency.set_response(response)
+                data = await response.json(content_type=None)
+
+        if isinstance(data, dict):
+            if 'id' not in data and 'error' in data:
+                # Ошибка на всю пачку, например превышен размер пачки у RPC
+                raise RuntimeError(f'{self.network.name} RPC rejected batch request: {data["error"]}')
+            data = [data]
+        return data
+
+    async def make_batch_request(self, requests: list[dict]) -> tuple[dict[int, int], dict[int, str]]:
+        # Возвращает результаты и ошибки по id запросов. Публичные RPC ограничивают размер пачки
+        self.prepare()
+
+        batches = await asyncio.gather(*[
+            self.send_batch(requests[index:index + BALANCE_WATCHER_BATCH_SIZE])
+            for index in range(0, len(requests), BALANCE_WATCHER_BATCH_SIZE)
+        ])
+
+        results, errors = {}, {}
+        for item in (item for batch in batches for item in batch):
+            if 'result' in item:
+                results[item['id']] = self.parse_result(item['result'])
+            else:
+                errors[item.get('id')] = item.get('error', 'empty response')
+        return results, errors
+
+    async def read_balances(self, keys: list[tuple]) -> tuple[dict[tuple, int], dict[tuple, str]]:
+        requests = [self.get_call_request(index, *key) for index, key in enumerate(keys)]
+        results, errors = await self.make_batch_request(requests)
+        balances = {key: results[index] for index, key in enumerate(keys) if index in results}
+        key_errors = {key: errors[index] for index, key in enumerate(keys) if index in errors}
+
+        updated_at = time.time()
+        self.cache.update({key: (balance, updated_at) for key, balance in balances.items()})
+        return balances, key_errors
+
+    async def get_balance(self, address: str | int, token_name: str, max_age: float = 0) -> int:
+        key = (address, token_name)
+
+        if max_age and key in self.cache:
+            balance, updated_at = self.cache[key]
+            if time.time() - updated_at < max_age:
+                return balance
+
+        balances, errors = await self.read_balances([key])
+        if key not in balances:
+            raise RuntimeError(f'Can`t read {token_name} balance on {self.network.name}: {errors.get(key)}')
+        return balances[key]
+
+    async def get_decimals(self, token_name: str) -> int:
+        if token_name == self.network.token:
+            return self.network.decimals
+
+        if token_name not in self.decimals:
+            results, errors = await self.make_batch_request(
+                [self.get_call_request(0, None, token_name, decimals=True)])
+            if 0 not in results:
+                raise RuntimeError(f'Can`t read {token_name} decimals on {self.network.name}: {errors.get(0)}')
+            self.decimals[token_name] = results[0]
+        return self.decimals[token_name]
+
+    async def run(self):
+        while self.subscriptions:
+            await asyncio.sleep(BALANCE_WATCHER_INTERVAL)
+
+            try:
+                balances, errors = await self.read_balances(list({item.key for item in self.subscriptions}))
+            except Exception as error:
+                self.logger_msg(None, None, f'Can`t check balances on {self.network.name}: {error}', 'warning')
+                continue
+
+            for (address, token_name), error in errors.items():
+                self.logger_msg(None, None, f'Can`t check {token_name} balance of {address} on '
+                                            f'{self.network.name}: {error}', 'warning')
+
+            for subscription in list(self.subscriptions):
+                balance = balances.get(subscription.key)
+                if subscription.future.done():
+                    self.subscriptions.remove(subscription)
+                elif balance is not None and balance - subscription.baseline >= subscription.min_delta:
+                    subscription.future.set_result(balance)
+                    self.subscriptions.remove(subscription)
+
+        self.task = None
+
+    async def wait_for_balance(self, address: str | int, token_name: str, baseline: int, min_delta: int = 1,
+                               timeout: int = 1200) -> int:
+        self.prepare()
+
+        subscription = BalanceSubscription(address, token_name, baseline, min_delta, self.loop.create_future())
+        self.subscriptions.append(subscription)
+
+        if self.task is None:
+            self.task = self.loop.create_task(self.run())
+
+        try:
+            return await asyncio.wait_for(subscription.future, timeout)
+        finally:
+            if subscription in self.subscriptions:
+                self.subscriptions.remove(subscription)
@@ -0,0 +1,279 @@
+import os
+import gzip
+import json
+import time
+import base64
+import asyncio
+
+from collections import deque
+from aiohttp import ClientSession, ClientConnectionError, ClientResponseError, ContentTypeError, RequestInfo
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from general_settings import CASSETTE_MODE, CASSETTE_FILE, CASSETTE_LATENCY_SCALE
+
+# Заголовки ответа, которые сохраняются в кассету (остальные софту не нужны)
+CASSETTE_RESPONSE_HEADERS = ('Content-Type', 'Retry-After')
+
+
+def encode_body(body: bytes | None) -> dict | None:
+    if body is None:
+        return None
+    try:
+        return {'text': body.decode()}
+    except UnicodeDecodeError:
+        return {'base64': base64.b64encode(body).decode()}
+
+
+def decode_body(body: dict | None) -> bytes:
+    if not body:
+        return b''
+    if 'text' in body:
+        return body['text'].encode()
+    return base64.b64decode(body['base64'])
+
+
+def get_request_body(kwargs: dict) -> bytes | None:
+    if kwargs.get('json') is not None:
+        return json.dumps(kwargs['json']).encode()
+
+    data = kwargs.get('data')
+    if isinstance(data, str):
+        return data.encode()
+    if isinstance(data, (bytes, bytearray)):
+        return bytes(data)
+    if isinstance(data, dict):
+        return json.dumps(data, sort_keys=True).encode()
+
+
+def get_rpc_methods(payload) -> list[str]:
+    items = payload if isinstance(payload, list) else [payload]
+    return [item['method'] for item in items if isinstance(item, dict) and 'method' in item]
+
+
+def normalize_body(body: bytes | None) -> tuple[str, list[str]]:
+    # id запросов JSON-RPC меняется от запуска к запуску, поэтому в ключ кассеты он не входит
+    if not body:
+        return '', []
+    try:
+        payload = json.loads(body)
+    except (ValueError, UnicodeDecodeError):
+        return body.hex(), []
+
+    items = payload if isinstance(payload, list) else [payload]
+    for item in items:
+        if isinstance(item, dict) and 'jsonrpc' in item:
+            item.pop('id', None)
+    return json.dumps(payload, sort_keys=True), get_rpc_methods(payload)
+
+
+class CassetteResponse:
+    """Ответ из кассеты с тем же интерфейсом, что и aiohttp.ClientResponse, который используется в софте"""
+
+    def __init__(self, method: str, url: URL, status: int, headers: dict, body: bytes):
+        self.method = method
+        self.url = url
+        self.status = status
+        self.reason = ''
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self.request_info = RequestInfo(url, method, CIMultiDictProxy(CIMultiDict()), url)
+        self.history = ()
+        self._body = body
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get('Content-Type', 'application/octet-stream').split(';')[0].strip()
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise ClientResponseError(self.request_info, self.history, status=self.status, message=self.reason,
+                                      headers=self.headers)
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self, encoding: str = None, errors: str = 'strict') -> str:
+        return self._body.decode(encoding or 'utf-8', errors)
+
+    async def json(self, *, encoding: str = None, loads=json.loads, content_type: str | None = 'application/json'):
+        if content_type and content_type not in self.content_type:
+            raise ContentTypeError(self.request_info, self.history, status=self.status,
+                                   message=f'Attempt to decode JSON with unexpected mimetype: {self.content_type}',
+                                   headers=self.headers)
+        return loads(self._body.decode(encoding or 'utf-8'))
+
+    def release(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def wait_for_close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+class Cassette:
+    def __init__(self, mode: str, file_path: str, latency_scale: float = 1):
+        self.mode = mode
+        self.file_path = file_path
+        self.latency_scale = latency_scale
+        self.original_request = None
+        self.started_at = 0.0
+        self.entries: list[dict] = []
+        self.exact: dict[str, deque] = {}
+        self.shapes: dict[str, deque] = {}
+        self.served = 0
+        self.missed: dict[str, int] = {}
+
+    @staticmethod
+    def get_keys(method: str, url: URL, body: bytes | None) -> tuple[str, str]:
+        # Точный ключ - запрос целиком, ключ формы - метод, путь и методы JSON-RPC без параметров.
+        # По ключу формы отвечаем на запросы, где меняются только суммы, подписи, nonce или время
+        normalized_body, rpc_methods = normalize_body(body)
+        exact_key = json.dumps([method, str(url), normalized_body])
+        shape_key = json.dumps([method, str(url.with_query(None)), rpc_methods])
+        return exact_key, shape_key
+
+    def start(self):
+        if self.mode not in ('record', 'replay') or self.original_request:
+            return
+
+        if self.mode == 'replay':
+            self.load()
+
+        self.started_at = time.perf_counter()
+        self.original_request = ClientSession._request
+        cassette, original_request = self, self.original_request
+
+        async def request(session, method, str_or_url, **kwargs):
+            if cassette.mode == 'record':
+                return await cassette.record(original_request, session, method, str_or_url, **kwargs)
+            return await cassette.replay(method, str_or_url, **kwargs)
+
+        ClientSession._request = request
+
+    def stop(self) -> str | None:
+        if not self.original_request:
+            return
+
+        ClientSession._request, self.original_request = self.original_request, None
+
+        if self.mode == 'record':
+            self.save()
+            return f'Cassette recorded {len(self.entries)} requests to {self.file_path}'
+
+        missed = sum(self.missed.values())
+        return f'Cassette replayed {self.served} requests, {missed} requests had no recorded response'
+
+    @staticmethod
+    def get_url(str_or_url, params: dict | None) -> URL:
+        url = URL(str(str_or_url))
+        if params:
+            url = url.update_query({key: str(value) for key, value in params.items()})
+        return url
+
+    async def record(self, original_request, session, method: str, str_or_url, **kwargs):
+        url = self.get_url(str_or_url, kwargs.get('params'))
+        body = get_request_body(kwargs)
+        entry = {
+            'method': method,
+            'url': str(url),
+            'request': encode_body(body),
+            'offset': round(time.perf_counter() - self.started_at, 4),
+        }
+
+        started_at = time.perf_counter()
+        try:
+            response = await original_request(session, method, str_or_url, **kwargs)
+            response_body = await response.read()
+        except Exception as error:
+            entry['duration'] = round(time.perf_counter() - started_at, 4)
+            entry['error'] = error.__class__.__name__
+            self.entries.append(entry)
+            raise
+
+        entry['duration'] = round(time.perf_counter() - started_at, 4)
+        entry['status'] = response.status
+        entry['headers'] = {name: response.headers[name] for name in CASSETTE_RESPONSE_HEADERS
+                            if name in response.headers}
+        entry['response'] = encode_body(response_body)
+        self.entries.append(entry)
+        return response
+
+    def take_entry(self, exact_key: str, shape_key: str) -> dict | None:
+        # Записи выдаются в порядке записи; когда они закончились, повторяется последний ответ (например, опрос статуса)
+        for pool, key in ((self.exact, exact_key), (self.shapes, shape_key)):
+            entries = pool.get(key)
+            if entries:
+                while len(entries) > 1 and entries[0]['used']:
+                    entries.popleft()
+                entries[0]['used'] = True
+                return entries[0]
+
+    async def replay(self, method: str, str_or_url, **kwargs):
+        url = self.get_url(str_or_url, kwargs.get('params'))
+        body = get_request_body(kwargs)
+        exact_key, shape_key = self.get_keys(method, url, body)
+
+        entry = self.take_entry(exact_key, shape_key)
+        if entry is None:
+            self.missed[shape_key] = self.missed.get(shape_key, 0) + 1
+            raise ClientConnectionError(f'Cassette has no response for {method} {url}')
+
+        self.served += 1
+        if self.latency_scale:
+            await asyncio.sleep(entry['duration'] * self.latency_scale)
+
+        if 'error' in entry:
+            if entry['error'] == 'TimeoutError':
+                raise asyncio.TimeoutError()
+            raise ClientConnectionError(f'{entry["error"]} (recorded)')
+
+        response_body = self.set_response_id(body, decode_body(entry['response']))
+        return CassetteResponse(method, url, entry['status'], entry['headers'], response_body)
+
+    @staticmethod
+    def set_response_id(body: bytes | None, response_body: bytes) -> bytes:
+        # Ответ на одиночный JSON-RPC запрос получает id текущего запроса, а не тот, что был при записи
+        try:
+            request_payload, response_payload = json.loads(body), json.loads(response_body)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            return response_body
+
+        if isinstance(request_payload, dict) and isinstance(response_payload, dict) and 'id' in response_payload:
+            response_payload['id'] = request_payload.get('id')
+            return json.dumps(response_payload).encode()
+        return response_body
+
+    def load(self):
+        with gzip.open(self.file_path, 'rt', encoding='utf-8') as file:
+            self.entries = [json.loads(line) for line in file if line.strip()]
+
+        self.exact, self.shapes = {}, {}
+        for entry in self.entries:
+            request_body = decode_body(entry['request'])
+            entry['key'], entry['shape'] = self.get_keys(entry['method'], URL(entry['url']), request_body)
+            entry['used'] = False
+            self.exact.setdefault(entry['key'], deque()).append(entry)
+            self.shapes.setdefault(entry['shape'], deque()).append(entry)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.file_path) or '.', exist_ok=True)
+        temp_path = f'{self.file_path}.{os.getpid()}.tmp'
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as file:
+            for entry in self.entries:
+                file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        os.replace(temp_path, self.file_path)
+
+
+CASSETTE = Cassette(CASSETTE_MODE, CASSETTE_FILE, CASSETTE_LATENCY_SCALE)
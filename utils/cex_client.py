@@ -0,0 +1,250 @@
+import time
+import asyncio
+import contextvars
+
+from aiohttp import ClientSession, ClientTimeout
+from general_settings import CEX_WITHDRAW_WORKERS, CEX_WITHDRAW_INTERVAL
+from utils.metrics import QUEUE_DEPTH
+from utils.retry_policy import dependency_guard
+from utils.rate_limiter import TokenBucket, HostLimiter
+
+# Лимиты бирж: limit - вес запросов на окно window (сек). Заголовки, если биржа их отдает, синхронизируют лимитер
+# с реальным использованием веса на стороне биржи.
+CEX_RATE_LIMITS = {
+    'OKX': {
+        'limit': 6,
+        'window': 2,
+    },
+    'BingX': {
+        'limit': 10,
+        'window': 1,
+        'remain_header': 'X-RateLimit-Requests-Remain',
+        'expire_header': 'X-RateLimit-Requests-Expire',
+    },
+    'Binance': {
+        'limit': 12000,
+        'window': 60,
+        'used_headers': ('X-SAPI-USED-IP-WEIGHT-1M', 'X-MBX-USED-WEIGHT-1M'),
+    },
+}
+CEX_RATE_LIMIT_STATUSES = (418, 429)
+CEX_RATE_LIMIT_RETRIES = 5
+CEX_REQUEST_TIMEOUT = 30
+
+# Данные о сетях вывода/депозита: после CEX_METADATA_TTL обновляются в фоне, после CEX_METADATA_MAX_AGE - перед выдачей
+CEX_METADATA_TTL = 300
+CEX_METADATA_MAX_AGE = 3600
+
+
+class CEXClient:
+    CLIENTS: dict[str, 'CEXClient'] = {}
+
+    def __init__(self, class_name: str):
+        self.class_name = class_name
+        self.limits = CEX_RATE_LIMITS[class_name]
+        self.loop = None
+        self.session: ClientSession | None = None
+        self.bucket: TokenBucket | None = None
+
+    @classmethod
+    def get_client(cls, class_name: str) -> 'CEXClient':
+        if class_name not in cls.CLIENTS:
+            cls.CLIENTS[class_name] = cls(class_name)
+        return cls.CLIENTS[class_name]
+
+    @classmethod
+    async def close_all(cls):
+        for client in cls.CLIENTS.values():
+            await client.close()
+
+    def prepare(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop or self.session is None or self.session.closed:
+            self.loop = loop
+            self.session = ClientSession(timeout=ClientTimeout(total=CEX_REQUEST_TIMEOUT))
+            # Вес биржи общий для всех процессов, каждому достается своя доля
+            limit = max(1, int(self.limits['limit'] * HostLimiter.RATE_SHARE))
+            self.bucket = TokenBucket(limit, self.limits['window'])
+
+    async def close(self):
+        if self.session and not self.session.closed and self.loop is asyncio.get_running_loop():
+            await self.session.close()
+        self.session = None
+
+    def update_limits(self, headers):
+        for header in self.limits.get('used_headers', ()):
+            if header in headers:
+                self.bucket.sync_used(float(headers[header]))
+                break
+
+        remain_header = self.limits.get('remain_header')
+        if remain_header and remain_header in headers:
+            remain = float(headers[remain_header])
+            self.bucket.sync_remain(remain)
+
+            expire_header = self.limits.get('expire_header')
+            if remain <= 0 and expire_header in headers:
+                self.bucket.block(float(headers[expire_header]) / 1000)
+
+    async def request(self, method: str, url: str, weight: int = 1, content_type: str | None = "application/json",
+                      sign_request=None, **kwargs) -> tuple[int, dict]:
+        # sign_request() возвращает (url, headers) с новой подписью. Запрос подписывается перед каждой отправкой:
+        # после ожидания лимита или паузы за 429 старый timestamp уже вне окна, которое принимает биржа
+        self.prepare()
+
+        status = None
+        for _ in range(CEX_RATE_LIMIT_RETRIES):
+            await self.bucket.acquire(weight)
+            if sign_request:
+                url, kwargs['headers'] = await sign_request()
+
+            async with dependency_guard(url, rate_limit=False,
+                                        rate_limit_statuses=CEX_RATE_LIMIT_STATUSES) as dependency:
+                async with self.session.request(method=method, url=url, **kwargs) as response:
+                    dependency.set_response(response)
+                    status = response.status
+                    self.update_limits(response.headers)
+
+                    if status in CEX_RATE_LIMIT_STATUSES:
+                        retry_after = response.headers.get('Retry-After')
+                        self.bucket.block(float(retry_after) if retry_after else self.limits['window'])
+                        continue
+
+                    return status, await response.json(content_type=content_type)
+
+        return status, {'code': status, 'msg': 'Too many requests'}
+
+
+class CEXNetworkCache:
+    CACHES: dict[str, 'CEXNetworkCache'] = {}
+
+    def __init__(self):
+        self.data: dict[str, dict[str, dict]] = {}
+        self.updated_at: dict[str, float] = {}
+        self.tasks: dict[str, asyncio.Task] = {}
+        self.loop = None
+
+    @classmethod
+    def get_cache(cls, class_name: str) -> 'CEXNetworkCache':
+        if class_name not in cls.CACHES:
+            cls.CACHES[class_name] = cls()
+        return cls.CACHES[class_name]
+
+    async def update(self, ccy: str, fetcher):
+        try:
+            self.data[ccy] = await fetcher(ccy)
+            self.updated_at[ccy] = time.time()
+        except Exception:
+            if ccy not in self.data:
+                raise
+        finally:
+            self.tasks.pop(ccy, None)
+
+    def refresh(self, ccy: str, fetcher) -> asyncio.Task:
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop = loop
+            self.tasks = {}
+
+        if ccy not in self.tasks:
+            self.tasks[ccy] = loop.create_task(self.update(ccy, fetcher))
+        return self.tasks[ccy]
+
+    async def get(self, ccy: str, network: str, fetcher) -> dict:
+        age = time.time() - self.updated_at.get(ccy, 0)
+
+        if age > CEX_METADATA_MAX_AGE:
+            await self.refresh(ccy, fetcher)
+        elif age > CEX_METADATA_TTL:
+            self.refresh(ccy, fetcher)
+
+        return self.data[ccy][network]
+
+
+class CEXWithdrawDispatcher:
+    DISPATCHERS: dict[str, 'CEXWithdrawDispatcher'] = {}
+
+    def __init__(self, class_name: str):
+        self.class_name = class_name
+        self.loop = None
+        self.queue: asyncio.Queue | None = None
+        self.lock: asyncio.Lock | None = None
+        self.workers: list[asyncio.Task] = []
+        self.next_at = 0.0
+
+    @classmethod
+    def get_dispatcher(cls, class_name: str) -> 'CEXWithdrawDispatcher':
+        if class_name not in cls.DISPATCHERS:
+            cls.DISPATCHERS[class_name] = cls(class_name)
+        return cls.DISPATCHERS[class_name]
+
+    @classmethod
+    async def stop_all(cls):
+        for dispatcher in cls.DISPATCHERS.values():
+            await dispatcher.stop()
+
+    @property
+    def queue_size(self) -> int:
+        return self.queue.qsize() if self.queue else 0
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop = loop
+            self.queue = asyncio.Queue()
+            self.lock = asyncio.Lock()
+            self.next_at = 0.0
+            # Воркеры общие для всех аккаунтов, поэтому не наследуют контекст аккаунта, который их запустил
+            self.workers = [loop.create_task(self.worker(), context=contextvars.Context())
+                            for _ in range(max(1, CEX_WITHDRAW_WORKERS))]
+
+    async def stop(self):
+        if self.loop is not asyncio.get_running_loop():
+            return
+
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+
+        while not self.queue.empty():
+            _, future, _ = self.queue.get_nowait()
+            if not future.done():
+                future.cancel()
+
+        self.loop, self.queue, self.workers = None, None, []
+
+    async def wait_slot(self):
+        async with self.lock:
+            delay = self.next_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.next_at = time.monotonic() + CEX_WITHDRAW_INTERVAL
+
+    async def worker(self):
+        while True:
+            send_request, future, context = await self.queue.get()
+            QUEUE_DEPTH.set(self.queue_size, queue=f'{self.class_name} withdraw')
+            try:
+                if not future.done():
+                    await self.wait_slot()
+                    # Запрос выполняется в контексте отправившего его аккаунта: трейс, профиль модуля, задача очереди
+                    result = await asyncio.create_task(send_request(), context=context)
+                    if not future.done():
+                        future.set_result(result)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as error:
+                if not future.done():
+                    future.set_exception(error)
+            finally:
+                self.queue.task_done()
+
+    async def submit(self, send_request):
+        self.start()
+
+        future = self.loop.create_future()
+        await self.queue.put((send_request, future, contextvars.copy_context()))
+        QUEUE_DEPTH.set(self.queue_size, queue=f'{self.class_name} withdraw')
+        return await future
@@ -0,0 +1,221 @@
+import os
+import json
+import asyncio
+import dataclasses
+
+from concurrent.futures import ProcessPoolExecutor
+
+from eth_account import Account as EthAccount
+from eth_utils import keccak
+from hexbytes import HexBytes
+from starknet_py.hash.address import compute_address
+from starknet_py.hash.selector import get_selector_from_name
+from starknet_py.hash.transaction import compute_deploy_account_transaction_hash
+from starknet_py.hash.utils import message_signature, compute_hash_on_elements
+from starknet_py.net.signer.stark_curve_signer import KeyPair
+
+from general_settings import CRYPTO_WORKERS
+from utils.stark_signature.eth_coder import encrypt_with_public_key, decrypt_with_private_key, get_public_key
+from utils.stark_signature.stark_singature import sign, pedersen_hash, EC_ORDER
+
+# Функции ниже выполняются в дочерних процессах, поэтому они не должны импортировать config.py
+# (иначе каждый процесс будет заново читать таблицу с аккаунтами). Все константы передаются аргументами.
+
+
+def compute_argent_address(public_key: int, cairo_version: int, proxy_class_hash: int,
+                           implementation_class_hash: int) -> int:
+    call_data = [public_key, 0]
+
+    if cairo_version:
+        class_hash = implementation_class_hash
+        constructor_calldata = call_data
+    else:
+        class_hash = proxy_class_hash
+        selector = get_selector_from_name("initialize")
+        constructor_calldata = [implementation_class_hash, selector, len(call_data), *call_data]
+
+    return compute_address(class_hash=class_hash, constructor_calldata=constructor_calldata, salt=public_key)
+
+
+def compute_braavos_address(public_key: int, proxy_class_hash: int, implementation_class_hash: int) -> int:
+    selector = get_selector_from_name("initializer")
+    call_data = [public_key]
+
+    return compute_address(
+        class_hash=proxy_class_hash,
+        constructor_calldata=[implementation_class_hash, selector, len(call_data), *call_data],
+        salt=public_key
+    )
+
+
+def compute_account_addresses(private_key: int, class_hashes: dict) -> tuple[int, int, int, int]:
+    public_key = KeyPair.from_private_key(private_key).public_key
+
+    argent_new = compute_argent_address(public_key, 1, class_hashes['argent_proxy'],
+                                        class_hashes['argent_implementation_new'])
+    braavos = compute_braavos_address(public_key, class_hashes['braavos_proxy'],
+                                      class_hashes['braavos_implementation'])
+    argent_old = compute_argent_address(public_key, 0, class_hashes['argent_proxy'],
+                                        class_hashes['argent_implementation'])
+
+    return public_key, argent_new, braavos, argent_old
+
+
+def sign_stark_transaction_with_hash(transaction, private_key: int, chain_id: int) -> tuple[list[int], int]:
+    # Хэш считается один раз и для подписи, и для журнала транзакций
+    tx_hash = transaction.calculate_hash(chain_id)
+    r, s = message_signature(msg_hash=tx_hash, priv_key=private_key)
+    return [r, s], tx_hash
+
+
+def sign_stark_transaction(transaction, private_key: int, chain_id: int) -> list[int]:
+    return sign_stark_transaction_with_hash(transaction, private_key, chain_id)[0]
+
+
+def sign_braavos_deploy_transaction(transaction, private_key: int, chain_id: int,
+                                    implementation_class_hash: int) -> list[int]:
+    contract_address = compute_address(
+        salt=transaction.contract_address_salt,
+        class_hash=transaction.class_hash,
+        constructor_calldata=transaction.constructor_calldata,
+        deployer_address=0,
+    )
+    tx_hash = compute_deploy_account_transaction_hash(
+        contract_address=contract_address,
+        class_hash=transaction.class_hash,
+        constructor_calldata=transaction.constructor_calldata,
+        salt=transaction.contract_address_salt,
+        max_fee=transaction.max_fee,
+        version=transaction.version,
+        chain_id=chain_id,
+        nonce=transaction.nonce,
+    )
+
+    tx_hash = compute_hash_on_elements([tx_hash, implementation_class_hash, 0, 0, 0, 0, 0, 0, 0])
+
+    r, s = message_signature(msg_hash=tx_hash, priv_key=private_key)
+    return [r, s, implementation_class_hash, 0, 0, 0, 0, 0, 0, 0]
+
+
+def sign_evm_transaction(transaction: dict, private_key: str) -> bytes:
+    return bytes(EthAccount.sign_transaction(transaction, private_key).rawTransaction)
+
+
+def sign_evm_typed_data(private_key: str, full_message: dict) -> bytes:
+    return bytes(EthAccount.sign_typed_data(private_key, full_message=full_message).signature)
+
+
+def get_rhino_encryption_key(private_key: str, register_data: dict) -> bytes:
+    sing_data = HexBytes(sign_evm_typed_data(private_key, register_data))
+    return keccak(f"{sing_data.hex()}".encode('utf-8'))
+
+
+def create_rhino_dtk(private_key: str, register_data: dict) -> tuple[str, dict]:
+    dtk = os.urandom(32).hex()
+
+    encryption_key = get_rhino_encryption_key(private_key, register_data)
+    public_key = get_public_key(encryption_key).hex()
+
+    encrypted_message = encrypt_with_public_key(public_key, json.dumps({"data": dtk}))
+
+    return dtk, encrypted_message
+
+
+def recover_rhino_dtk(private_key: str, register_data: dict, encrypted_trading_key: str) -> str:
+    encryption_private_key = f"0x{get_rhino_encryption_key(private_key, register_data).hex()}"
+
+    dtk = decrypt_with_private_key(encryption_private_key, encrypted_trading_key)
+
+    return json.loads(dtk)['data']
+
+
+def sign_rhino_transfer(dtk: str, token_address: str, receiver_public_key: str,
+                        packed_message: int) -> tuple[str, str]:
+    msg_hash = pedersen_hash(pedersen_hash(int(token_address, 16), int(receiver_public_key, 16)),
+                             int(packed_message))
+
+    tx_signature = sign(msg_hash=msg_hash, priv_key=int(dtk, 16) % EC_ORDER)
+    return hex(tx_signature[0]), hex(tx_signature[1])
+
+
+def run_chunk(func, chunk: list) -> list:
+    return [func(*args) for args in chunk]
+
+
+class CryptoExecutor:
+    def __init__(self, max_workers: int = 0):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool: ProcessPoolExecutor | None = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    async def run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, func, *args)
+
+    async def map(self, func, args_list: list, chunk_size: int = 0) -> list:
+        if not args_list:
+            return []
+
+        chunk_size = chunk_size or max(1, len(args_list) // (self.max_workers * 4))
+        chunks = [args_list[i:i + chunk_size] for i in range(0, len(args_list), chunk_size)]
+
+        results = await asyncio.gather(*[self.run(run_chunk, func, chunk) for chunk in chunks])
+        return [item for chunk_result in results for item in chunk_result]
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def get_account_addresses(self, private_key: int, class_hashes: dict) -> tuple[int, int, int, int]:
+        return await self.run(compute_account_addresses, private_key, class_hashes)
+
+    async def get_account_addresses_batch(self, private_keys: list[int], class_hashes: dict) -> list:
+        return await self.map(compute_account_addresses, [(key, class_hashes) for key in private_keys])
+
+    async def sign_stark_transaction(self, transaction, private_key: int, chain_id: int,
+                                     braavos_implementation_class_hash: int = None):
+        if braavos_implementation_class_hash:
+            signature = await self.run(sign_braavos_deploy_transaction, transaction, private_key,
+                                       chain_id, braavos_implementation_class_hash)
+        else:
+            signature = await self.run(sign_stark_transaction, transaction, private_key, chain_id)
+        return dataclasses.replace(transaction, signature=signature)
+
+    async def sign_stark_transaction_with_hash(self, transaction, private_key: int, chain_id: int):
+        signature, tx_hash = await self.run(sign_stark_transaction_with_hash, transaction, private_key, chain_id)
+        return dataclasses.replace(transaction, signature=signature), tx_hash
+
+    async def sign_stark_transactions_batch(self, transactions: list, private_keys: list[int],
+                                            chain_id: int) -> list:
+        signatures = await self.map(sign_stark_transaction, [
+            (transaction, private_key, chain_id) for transaction, private_key in zip(transactions, private_keys)
+        ])
+        return [dataclasses.replace(transaction, signature=signature)
+                for transaction, signature in zip(transactions, signatures)]
+
+    async def sign_evm_transaction(self, transaction: dict, private_key: str) -> bytes:
+        return await self.run(sign_evm_transaction, transaction, private_key)
+
+    async def sign_evm_transactions_batch(self, transactions: list[dict], private_keys: list[str]) -> list[bytes]:
+        return await self.map(sign_evm_transaction, list(zip(transactions, private_keys)))
+
+    async def sign_evm_typed_data(self, private_key: str, full_message: dict) -> bytes:
+        return await self.run(sign_evm_typed_data, private_key, full_message)
+
+    async def create_rhino_dtk(self, private_key: str, register_data: dict) -> tuple[str, dict]:
+        return await self.run(create_rhino_dtk, private_key, register_data)
+
+    async def recover_rhino_dtk(self, private_key: str, register_data: dict, encrypted_trading_key: str) -> str:
+        return await self.run(recover_rhino_dtk, private_key, register_data, encrypted_trading_key)
+
+    async def sign_rhino_transfer(self, dtk: str, token_address: str, receiver_public_key: str,
+                                  packed_message: int) -> tuple[str, str]:
+        return await self.run(sign_rhino_transfer, dtk, token_address, receiver_public_key, packed_message)
+
+
+CRYPTO_EXECUTOR = CryptoExecutor(CRYPTO_WORKERS)
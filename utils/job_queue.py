@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+JOB_PENDING, JOB_LEASED, JOB_DONE, JOB_FAILED = 'pending', 'leased', 'done', 'failed'
+JOB_MAX_ATTEMPTS = 3      # Сколько раз аккаунт выдается после истекшей аренды, прежде чем считается сломанным
+SQLITE_BUSY_TIMEOUT = 10  # Сколько секунд ждать, пока другой процесс держит блокировку файла очереди
+
+
+class Job:
+    def __init__(self, account_name: str, route: list | None, current_step: int, lease_id: str, attempts: int):
+        self.account_name = account_name
+        self.route = route
+        self.current_step = current_step
+        self.lease_id = lease_id
+        self.attempts = attempts
+        self.lease_lost = False
+
+
+# Аренда, под которой работает текущий аккаунт. Задается в Runner перед запуском задачи аккаунта
+CURRENT_JOB: ContextVar[Job | None] = ContextVar('current_job', default=None)
+
+
+def get_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def check_job_lease():
+    # Отмена задачи не всегда доходит до модуля (starknet_py превращает ее в TransactionNotReceivedError),
+    # поэтому перед каждой попыткой и отправкой транзакции аренда проверяется явно
+    from modules.interfaces import LeaseLostException
+
+    job = CURRENT_JOB.get()
+    if job and job.lease_lost:
+        raise LeaseLostException(f"Lease expired, account was taken by another worker")
+
+
+class JobQueue(ABC):
+    """
+    Общая очередь аккаунтов для нескольких процессов или машин. Аккаунт выдается в аренду на lease_time секунд,
+    аренда продлевается heartbeat, пока процесс жив. Аккаунт с истекшей арендой выдается другому процессу и
+    продолжается с сохраненного шага. Шаги и завершение записываются, только пока аренда принадлежит процессу.
+    """
+
+    @abstractmethod
+    def add_jobs(self, jobs: list[tuple[str, list | None, int]]) -> int:
+        pass
+
+    @abstractmethod
+    def lease(self, worker_id: str, account_names: list[str], limit: int, lease_time: float) -> list[Job]:
+        pass
+
+    @abstractmethod
+    def heartbeat(self, job: Job, lease_time: float) -> bool:
+        pass
+
+    @abstractmethod
+    def set_route(self, job: Job, route: list) -> bool:
+        pass
+
+    @abstractmethod
+    def update_step(self, job: Job, step: int) -> bool:
+        pass
+
+    @abstractmethod
+    def complete(self, job: Job) -> bool:
+        pass
+
+    @abstractmethod
+    def release(self, job: Job) -> bool:
+        pass
+
+    @abstractmethod
+    def get_stats(self) -> dict[str, int]:
+        pass
+
+    @abstractmethod
+    def get_journal_dir(self) -> str:
+        # Журнал транзакций должен быть виден всем процессам очереди, чтобы подхвативший аккаунт продолжил его шаг
+        pass
+
+    def close(self):
+        pass
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Очередь в SQLite-файле. Несколько процессов на одной машине или машины с общим диском работают с одним
+    файлом: выдача аренды идет в транзакции BEGIN IMMEDIATE, поэтому один аккаунт не достается двум процессам.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            'account_name TEXT PRIMARY KEY, route TEXT, current_step INTEGER NOT NULL DEFAULT 0, '
+            f"status TEXT NOT NULL DEFAULT '{JOB_PENDING}', worker_id TEXT, lease_id TEXT, "
+            'lease_until REAL NOT NULL DEFAULT 0, attempts INTEGER NOT NULL DEFAULT 0, '
+            'updated_at REAL NOT NULL DEFAULT 0)'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_until)')
+
+    @contextmanager
+    def transaction(self):
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield self.connection
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+        self.connection.execute('COMMIT')
+
+    def execute_leased(self, job: Job, query: str, *params) -> bool:
+        # Запись проходит, только если аренда не истекла и не перешла к другому процессу
+        cursor = self.connection.execute(
+            f'UPDATE jobs SET {query}, updated_at = ? WHERE account_name = ? AND lease_id = ? AND status = ?',
+            (*params, time.time(), job.account_name, job.lease_id, JOB_LEASED)
+        )
+        return cursor.rowcount == 1
+
+    def add_jobs(self, jobs: list[tuple[str, list | None, int]]) -> int:
+        with self.transaction() as connection:
+            changes = connection.total_changes
+            connection.executemany(
+                'INSERT OR IGNORE INTO jobs (account_name, route, current_step, updated_at) VALUES (?, ?, ?, ?)',
+                [(account_name, json.dumps(route) if route else None, current_step, time.time())
+                 for account_name, route, current_step in jobs]
+            )
+            return connection.total_changes - changes
+
+    def lease(self, worker_id: str, account_names: list[str], limit: int, lease_time: float) -> list[Job]:
+        now = time.time()
+        with self.transaction() as connection:
+            connection.execute(
+                'UPDATE jobs SET status = ?, lease_id = NULL, updated_at = ? '
+                'WHERE status = ? AND lease_until < ? AND attempts >= ?',
+                (JOB_FAILED, now, JOB_LEASED, now, JOB_MAX_ATTEMPTS)
+            )
+            rows = connection.execute(
+                'SELECT account_name, route, current_step, attempts FROM jobs '
+                'WHERE account_name IN (SELECT value FROM json_each(?)) '
+                'AND (status = ? OR (status = ? AND lease_until < ?)) ORDER BY attempts, rowid LIMIT ?',
+                (json.dumps(account_names), JOB_PENDING, JOB_LEASED, now, limit)
+            ).fetchall()
+
+            jobs = []
+            for account_name, route, current_step, attempts in rows:
+                job = Job(account_name, json.loads(route) if route else None, current_step, uuid.uuid4().hex,
+                          attempts + 1)
+                connection.execute(
+                    'UPDATE jobs SET status = ?, worker_id = ?, lease_id = ?, lease_until = ?, attempts = ?, '
+                    'updated_at = ? WHERE account_name = ?',
+                    (JOB_LEASED, worker_id, job.lease_id, now + lease_time, job.attempts, now, account_name)
+                )
+                jobs.append(job)
+            return jobs
+
+    def heartbeat(self, job: Job, lease_time: float) -> bool:
+        return self.execute_leased(job, 'lease_until = ?', time.time() + lease_time)
+
+    def set_route(self, job: Job, route: list) -> bool:
+        job.route = route
+        return self.execute_leased(job, 'route = ?', json.dumps(route))
+
+    def update_step(self, job: Job, step: int) -> bool:
+        job.current_step = step
+        return self.execute_leased(job, 'current_step = ?', step)
+
+    def complete(self, job: Job) -> bool:
+        # Шаг и статус записываются одним запросом, поэтому завершенный аккаунт не может остаться без прогресса
+        return self.execute_leased(job, 'status = ?, current_step = ?, lease_id = NULL, lease_until = 0',
+                                   JOB_DONE, job.current_step)
+
+    def release(self, job: Job) -> bool:
+        # Остановленный аккаунт возвращается в очередь без учета попытки
+        return self.execute_leased(job, 'status = ?, lease_id = NULL, lease_until = 0, attempts = attempts - 1',
+                                   JOB_PENDING)
+
+    def get_stats(self) -> dict[str, int]:
+        return dict(self.connection.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+
+    def get_journal_dir(self) -> str:
+        return os.path.join(os.path.dirname(os.path.abspath(self.path)), 'tx_journal')
+
+    def close(self):
+        self.connection.close()
+
+
+JOB_QUEUE_BACKENDS: dict[str, type[JobQueue]] = {
+    'sqlite': SQLiteJobQueue,
+}
+
+
+def get_job_queue(url: str) -> JobQueue:
+    from modules.interfaces import SoftwareException
+
+    scheme, _, path = url.partition('://')
+    if scheme not in JOB_QUEUE_BACKENDS or not path:
+        raise SoftwareException(f"Unsupported job queue: {url}. Example: sqlite://./data/services/jobs.db")
+    return JOB_QUEUE_BACKENDS[scheme](path)
@@ -0,0 +1,233 @@
+import os
+import time
+import asyncio
+
+from contextlib import contextmanager, asynccontextmanager
+from urllib.parse import urlparse
+from aiohttp import web
+from starknet_py.net.http_client import RpcHttpClient
+from starknet_py.net.full_node_client import FullNodeClient
+from web3 import AsyncHTTPProvider
+
+from general_settings import METRICS_PORT, METRICS_TEXTFILE, METRICS_TEXTFILE_INTERVAL
+from utils.retry_policy import dependency_guard
+
+METRICS_HOST = '127.0.0.1'
+METRICS_PREFIX = 'starkmachine'
+METRICS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+
+def escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(label_names: tuple, label_values: tuple, extra: dict = None) -> str:
+    labels = [f'{name}="{escape_label(value)}"' for name, value in zip(label_names, label_values)]
+    labels += [f'{name}="{escape_label(value)}"' for name, value in (extra or {}).items()]
+    return '{' + ','.join(labels) + '}' if labels else ''
+
+
+class Metric:
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, help_text: str, label_names: tuple = ()):
+        self.name = f'{METRICS_PREFIX}_{name}'
+        self.help_text = help_text
+        self.label_names = label_names
+        self.values: dict[tuple, float] = {}
+
+    def get_key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def render_values(self) -> list[str]:
+        return [f'{self.name}{format_labels(self.label_names, key)} {value}' for key, value in self.values.items()]
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.metric_type}']
+        return '\n'.join(lines + self.render_values())
+
+
+class Counter(Metric):
+    metric_type = 'counter'
+
+    def inc(self, value: float = 1, **labels):
+        key = self.get_key(labels)
+        self.values[key] = self.values.get(key, 0) + value
+
+
+class Gauge(Metric):
+    metric_type = 'gauge'
+
+    def set(self, value: float, **labels):
+        self.values[self.get_key(labels)] = value
+
+    def inc(self, value: float = 1, **labels):
+        key = self.get_key(labels)
+        self.values[key] = self.values.get(key, 0) + value
+
+    def dec(self, value: float = 1, **labels):
+        self.inc(-value, **labels)
+
+
+class Histogram(Metric):
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, help_text: str, label_names: tuple = (), buckets: tuple = METRICS_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = buckets
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self.get_key(labels)
+        if key not in self.values:
+            self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+
+        bucket_counts, _, _ = data = self.values[key]
+        for index, bucket in enumerate(self.buckets):
+            if value <= bucket:
+                bucket_counts[index] += 1
+        data[1] += value
+        data[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at, **labels)
+
+    def render_values(self) -> list[str]:
+        lines = []
+        for key, (bucket_counts, total, count) in self.values.items():
+            for bucket, bucket_count in zip(self.buckets, bucket_counts):
+                labels = format_labels(self.label_names, key, {'le': bucket})
+                lines.append(f'{self.name}_bucket{labels} {bucket_count}')
+            labels = format_labels(self.label_names, key)
+            lines.append(f'{self.name}_bucket{format_labels(self.label_names, key, {"le": "+Inf"})} {count}')
+            lines.append(f'{self.name}_sum{labels} {total}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: list[Metric] = []
+        self.runner: web.AppRunner | None = None
+        self.task: asyncio.Task | None = None
+
+    def counter(self, name: str, help_text: str, label_names: tuple = ()) -> Counter:
+        self.metrics.append(Counter(name, help_text, label_names))
+        return self.metrics[-1]
+
+    def gauge(self, name: str, help_text: str, label_names: tuple = ()) -> Gauge:
+        self.metrics.append(Gauge(name, help_text, label_names))
+        return self.metrics[-1]
+
+    def histogram(self, name: str, help_text: str, label_names: tuple = ()) -> Histogram:
+        self.metrics.append(Histogram(name, help_text, label_names))
+        return self.metrics[-1]
+
+    def render(self) -> str:
+        return '\n'.join(metric.render() for metric in self.metrics) + '\n'
+
+    async def handle_metrics(self, _request):
+        return web.Response(text=self.render(), content_type='text/plain', charset='utf-8',
+                            headers={'X-Content-Type-Options': 'nosniff'})
+
+    def write_textfile(self):
+        # Пишем во временный файл и переименовываем, чтобы node_exporter не прочитал файл наполовину
+        os.makedirs(os.path.dirname(METRICS_TEXTFILE) or '.', exist_ok=True)
+        temp_path = f'{METRICS_TEXTFILE}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(self.render())
+        os.replace(temp_path, METRICS_TEXTFILE)
+
+    async def run_textfile_exporter(self):
+        while True:
+            await asyncio.sleep(METRICS_TEXTFILE_INTERVAL)
+            self.write_textfile()
+
+    async def start(self):
+        if METRICS_PORT and self.runner is None:
+            app = web.Application()
+            app.router.add_get('/metrics', self.handle_metrics)
+
+            self.runner = web.AppRunner(app, access_log=None)
+            await self.runner.setup()
+            await web.TCPSite(self.runner, METRICS_HOST, METRICS_PORT).start()
+
+        if METRICS_TEXTFILE and self.task is None:
+            self.task = asyncio.create_task(self.run_textfile_exporter())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+            self.write_textfile()
+
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+
+METRICS = MetricsRegistry()
+
+MODULE_DURATION = METRICS.histogram(
+    'module_duration_seconds', 'Module run time from launch to result', ('module', 'result'))
+RPC_LATENCY = METRICS.histogram(
+    'rpc_request_duration_seconds', 'JSON-RPC request latency', ('endpoint', 'method'))
+RPC_ERRORS = METRICS.counter(
+    'rpc_errors_total', 'JSON-RPC requests that failed or returned an error', ('endpoint', 'method', 'error'))
+HELPER_ERRORS = METRICS.counter(
+    'helper_errors_total', 'Errors caught by the helper decorator', ('module', 'error'))
+HELPER_RETRIES = METRICS.counter(
+    'helper_retries_total', 'Module retries made by the helper decorator', ('module',))
+RECEIPT_WAIT = METRICS.histogram(
+    'receipt_wait_seconds', 'Time from sending a transaction to its receipt', ('network',))
+GAS_WAIT = METRICS.histogram(
+    'gas_wait_seconds', 'Time spent in the gas gate before a module could start', ('module',))
+SLEEP_SECONDS = METRICS.counter(
+    'sleep_seconds_total', 'Time spent in configured sleeps', ('reason',))
+ACCOUNTS_IN_FLIGHT = METRICS.gauge(
+    'accounts_in_flight', 'Accounts currently running their route')
+QUEUE_DEPTH = METRICS.gauge(
+    'queue_depth', 'Items waiting in internal queues', ('queue',))
+
+
+def get_endpoint(url: str) -> str:
+    return urlparse(str(url)).netloc or str(url)
+
+
+@asynccontextmanager
+async def rpc_timer(url: str, method: str):
+    endpoint = get_endpoint(url)
+    try:
+        async with dependency_guard(url):
+            with RPC_LATENCY.time(endpoint=endpoint, method=method):
+                yield
+    except Exception as error:
+        RPC_ERRORS.inc(endpoint=endpoint, method=method, error=error.__class__.__name__)
+        raise
+
+
+class MeteredRpcHttpClient(RpcHttpClient):
+    async def call(self, method_name: str, params: dict):
+        async with rpc_timer(self.url, f'starknet_{method_name}'):
+            return await super().call(method_name, params)
+
+
+class MeteredFullNodeClient(FullNodeClient):
+    def __init__(self, node_url: str, session=None):
+        super().__init__(node_url=node_url, session=session)
+        self._client = MeteredRpcHttpClient(url=node_url, session=session)
+
+
+class MeteredHTTPProvider(AsyncHTTPProvider):
+    async def make_request(self, method, params):
+        async with rpc_timer(self.endpoint_uri, method):
+            response = await super().make_request(method, params)
+
+        if 'error' in response:
+            RPC_ERRORS.inc(endpoint=get_endpoint(self.endpoint_uri), method=method, error='RPCError')
+        return response
@@ -1,31 +1,50 @@
-import re
 import json
+import time
 import random
 import asyncio
 import traceback
-import telebot
 
-from modules import Logger
-from aiohttp import ClientSession
-from utils.networks import EthereumRPC
-from web3 import AsyncWeb3, AsyncHTTPProvider
+from queue import Empty
+
+from modules import Logger, Client, StarknetClient, LayerSwap
+from utils.cex_client import CEXClient, CEXWithdrawDispatcher
+from utils.balance_watcher import BalanceWatcher
+from utils.pool_cache import POOL_CACHE
+from utils.metrics import METRICS, MODULE_DURATION, SLEEP_SECONDS, ACCOUNTS_IN_FLIGHT, QUEUE_DEPTH
+from utils.tracing import TRACER
+from utils.cassette import CASSETTE
+from utils.profiler import PROFILER
+from utils.telegram_notifier import TelegramNotifier
+from utils.proxy_pool import ProxyPool
+from utils.tx_journal import TX_JOURNAL, TX_JOURNAL_OFFCHAIN_SENT, get_network_by_name
+from utils.job_queue import JobQueue, Job, CURRENT_JOB, get_job_queue, get_worker_id, check_job_lease
+from utils.shard_runner import ShardNotifier, create_shard_executor, split_wallets, run_shard
 from functions import get_network_by_chain_id
-from modules.interfaces import SoftwareException
+from modules.interfaces import SoftwareException, LeaseLostException
 from settings import HELP_NEW_MODULE, EXCLUDED_MODULES
 from config import ACCOUNT_NAMES, PRIVATE_KEYS_EVM, PRIVATE_KEYS, PROXIES, CHAIN_NAME
 from utils.route_generator import RouteGenerator, AVAILABLE_MODULES_INFO, get_func_by_name
-from utils.tools import clean_progress_file, clean_google_progress_file, clean_gwei_file, check_google_progress_file
-from general_settings import (USE_PROXY, SLEEP_MODE, SLEEP_TIME, SOFTWARE_MODE, TG_ID, TG_TOKEN, MOBILE_PROXY,
-                              MOBILE_PROXY_URL_CHANGER, WALLETS_TO_WORK, TELEGRAM_NOTIFICATIONS, GLOBAL_NETWORK,
-                              SAVE_PROGRESS, ACCOUNTS_IN_STREAM, SLEEP_TIME_STREAM, SHUFFLE_WALLETS, BREAK_ROUTE)
+from utils.tools import (clean_progress_file, clean_google_progress_file, clean_gwei_file, check_google_progress_file,
+                         check_progress_file)
+from general_settings import (USE_PROXY, SLEEP_MODE, SLEEP_TIME, SOFTWARE_MODE, MOBILE_PROXY, WALLETS_TO_WORK,
+                              TELEGRAM_NOTIFICATIONS, GLOBAL_NETWORK, SAVE_PROGRESS, ACCOUNTS_IN_STREAM,
+                              SLEEP_TIME_STREAM, SHUFFLE_WALLETS, BREAK_ROUTE, SHARD_WORKERS,
+                              JOB_QUEUE_URL, JOB_LEASE_TIME, JOB_HEARTBEAT_INTERVAL)
 
 
 BRIDGE_NAMES = ['bridge_rhino', 'bridge_layerswap', 'bridge_orbiter', 'bridge_across',
                 'bridge_native', 'withdraw_native_bridge', 'bridge_rhino_limiter', 'bridge_layerswap_limiter',
                 'bridge_orbiter_limiter', 'bridge_across_limiter']
+TX_STATUS_NAMES = {True: 'confirmed', False: 'failed', None: 'not found'}
+SHARD_QUEUE_TIMEOUT = 1  # Как часто (сек) координатор проверяет, не упал ли процесс-шард, пока очередь пуста
 
 
 class Runner(Logger):
+    def __init__(self):
+        super().__init__()
+        self.job_queue: JobQueue | None = None
+        self.jobs: dict[str, Job] = {}
+
     @staticmethod
     def get_wallets_batch(account_list: tuple = None):
         range_count = range(account_list[0], account_list[1])
@@ -61,20 +80,21 @@ class Runner(Logger):
 
         return accounts_data
 
-    @staticmethod
-    async def make_request(method: str = 'GET', url: str = None, headers: dict = None):
-
-        async with ClientSession() as session:
-            async with session.request(method=method, url=url, headers=headers) as response:
-                if response.status == 200:
-                    return True
-                return False
-
     @staticmethod
     def load_routes():
         with open('./data/services/wallets_progress.json', 'r') as f:
             return json.load(f)
 
+    def get_account_progress(self, account_name) -> dict:
+        job = self.jobs.get(str(account_name))
+        if job:
+            return {"route": job.route, "current_step": job.current_step}
+        return self.load_routes().get(str(account_name), {})
+
+    @staticmethod
+    def reset_progress():
+        clean_progress_file()
+
     async def smart_sleep(self, account_name, account_number, accounts_delay=False):
         if SLEEP_MODE and account_number:
             if accounts_delay:
@@ -82,21 +102,17 @@ class Runner(Logger):
             else:
                 duration = random.randint(*SLEEP_TIME)
             self.logger_msg(account_name, None, f"💤 Sleeping for {duration} seconds\n")
-            await asyncio.sleep(duration)
-
-    async def send_tg_message(self, account_name, message_to_send, disable_notification=False):
-        try:
-            await asyncio.sleep(1)
-            str_send = '*' + '\n'.join([re.sub(r'([_*\[\]()~`>#+\-=|{}.!])', r'\\\1', message)
-                                       for message in message_to_send]) + '*'
-            bot = telebot.TeleBot(TG_TOKEN)
-            bot.send_message(TG_ID, str_send, parse_mode='MarkdownV2', disable_notification=disable_notification)
-            print()
-            self.logger_msg(account_name, None, f"Telegram message sent", 'success')
-        except Exception as error:
-            self.logger_msg(account_name, None, f"Telegram | API Error: {error}", 'error')
+            SLEEP_SECONDS.inc(duration, reason='stream' if accounts_delay else 'module')
+            with TRACER.span('smart_sleep', accounts_delay=accounts_delay):
+                await asyncio.sleep(duration)
 
     def update_step(self, account_name, step):
+        job = self.jobs.get(str(account_name))
+        if job:
+            if not self.job_queue.update_step(job, step):
+                raise LeaseLostException(f"Lease expired, account was taken by another worker")
+            return
+
         wallets = self.load_routes()
         wallets[str(account_name)]["current_step"] = step
         with open('./data/services/wallets_progress.json', 'w') as f:
@@ -189,45 +205,24 @@ class Runner(Logger):
         except Exception as error:
             raise SoftwareException(f"Can`t generate smart route. Error: {error}")
 
-    async def change_ip_proxy(self):
-        try:
-            self.logger_msg(None, None, f'Trying to change IP address\n', 'info')
-
-            if not await self.make_request(url=MOBILE_PROXY_URL_CHANGER[0]):
-                await self.make_request(url=MOBILE_PROXY_URL_CHANGER[random.randint(1, 2)])
-
-            self.logger_msg(None, None, f'IP address changed!\n', 'success')
-
-        except Exception as error:
-            self.logger_msg(None, None, f'Bad URL for change IP. Error: {error}', 'error')
-
     async def check_proxies_status(self):
-        tasks = []
-        for proxy in PROXIES:
-            tasks.append(self.check_proxy_status(None, proxy=proxy))
-        await asyncio.gather(*tasks)
-
-    async def check_proxy_status(self, account_name: str = None, proxy: str = None, silence: bool = False):
+        proxy_pool = ProxyPool(PROXIES, ACCOUNT_NAMES)
         try:
-            w3 = AsyncWeb3(AsyncHTTPProvider(random.choice(EthereumRPC.rpc),
-                                             request_kwargs={"proxy": f"http://{proxy}"}))
-            if await w3.is_connected():
-                if not silence:
-                    info = f'Proxy {proxy[proxy.find("@"):]} successfully connected to Ethereum RPC'
-                    self.logger_msg(account_name, None, info, 'success')
-                return True
-            self.logger_msg(account_name, None, f"Proxy: {proxy} can`t connect to Ethereum RPC", 'error')
-            return False
-        except Exception as error:
-            self.logger_msg(account_name, None, f"Bad proxy: {proxy} | Error: {error}", 'error')
-            return False
+            latencies = await proxy_pool.check_all()
+        finally:
+            await proxy_pool.stop()
+
+        for proxy, latency in latencies.items():
+            if latency is None:
+                self.logger_msg(None, None, f"Proxy: {proxy} can`t connect to Ethereum RPC", 'error')
+            else:
+                info = f'Proxy {proxy[proxy.find("@"):]} successfully connected to Ethereum RPC | {latency:.2f}s'
+                self.logger_msg(None, None, info, 'success')
 
     def get_proxy_for_account(self, account_name):
         if USE_PROXY:
             try:
-                account_number = ACCOUNT_NAMES.index(account_name)
-                num_proxies = len(PROXIES)
-                return PROXIES[account_number % num_proxies]
+                return self.proxy_pool.get_proxy(account_name)
             except Exception as error:
                 self.logger_msg(account_name, None, f"Bad data in proxy, but you want proxy! Error: {error}", 'error')
                 raise SoftwareException("Proxy error")
@@ -252,8 +247,11 @@ class Runner(Logger):
             self, account_name:str, private_key:str, network, proxy:str | None, smart_route_type:bool, index:int,
             parallel_mode: bool = False):
         message_list, result_list, used_modules, route_paths, break_flag, module_counter = [], [], [], [], False, 0
+        ACCOUNTS_IN_FLIGHT.inc()
+        trace_token, route_started_at = TRACER.set_track(account_name), time.perf_counter()
         try:
-            route_data = self.load_routes().get(str(account_name), {}).get('route')
+            account_progress = self.get_account_progress(account_name)
+            route_data = account_progress.get('route')
             if not route_data:
                 raise SoftwareException(f"No route available")
 
@@ -263,7 +261,7 @@ class Runner(Logger):
             used_modules.extend(route_modules + EXCLUDED_MODULES)
 
             if SAVE_PROGRESS:
-                current_step = self.load_routes()[str(account_name)]["current_step"]
+                current_step = account_progress["current_step"]
 
             module_info = AVAILABLE_MODULES_INFO
             info = CHAIN_NAME[GLOBAL_NETWORK]
@@ -271,6 +269,10 @@ class Runner(Logger):
             message_list.append(
                 f'⚔️ {info} | Account name: "{account_name}"\n \n{len(route_modules)} module(s) in route\n')
 
+            # Журнал перечитывается с диска: аккаунт мог работать в другом процессе, чья аренда истекла
+            TX_JOURNAL.load(account_name, reload=True)
+            TX_JOURNAL.drop_stale_steps(account_name, [module[0] for module in route_modules], current_step)
+
             if current_step >= len(route_modules):
                 self.logger_msg(
                     account_name, None, f"All modules in the route were completed", type_msg='warning')
@@ -288,25 +290,38 @@ class Runner(Logger):
 
                 self.logger_msg(account_name, None, f"🚀 Launch module: {module_info[module_func][2]}\n")
 
-                module_input_data = [account_name, private_key, network, proxy]
+                started_at = time.perf_counter()
+                journal_token = TX_JOURNAL.set_step(account_name, current_step, module_name)
                 try:
-                    if route_modules[current_step][0] in BRIDGE_NAMES:
-                        result = await module_func(*module_input_data, private_keys={
-                            "stark_key": private_key,
-                            "evm_key": PRIVATE_KEYS_EVM[PRIVATE_KEYS.index(private_key)]
-                            if GLOBAL_NETWORK == 9 else private_key
-                        })
-                    else:
-                        result = await module_func(*module_input_data)
+                    result = await self.resume_journal_step(account_name, private_key, proxy)
+                    if result is None:
+                        async with self.proxy_pool.lease(account_name, proxy) as proxy:
+                            module_input_data = [account_name, private_key, network, proxy]
+                            if route_modules[current_step][0] in BRIDGE_NAMES:
+                                result = await module_func(*module_input_data, private_keys={
+                                    "stark_key": private_key,
+                                    "evm_key": PRIVATE_KEYS_EVM[PRIVATE_KEYS.index(private_key)]
+                                    if GLOBAL_NETWORK == 9 else private_key
+                                })
+                            else:
+                                result = await module_func(*module_input_data)
                 except Exception as error:
                     info = f"Module name: {module_info[module_func][2]} | Error {error}"
                     self.logger_msg(
                         account_name, None, f"Module crashed during the route: {info}", type_msg='error')
                     traceback.print_exc()
                     result = False
+                finally:
+                    TX_JOURNAL.reset_step(journal_token)
+
+                MODULE_DURATION.observe(time.perf_counter() - started_at, module=module_name,
+                                        result='success' if result else 'error')
+                TRACER.add_span(module_name, started_at, 'module', result=bool(result))
+                check_job_lease()
 
                 if result:
                     self.update_step(account_name, current_step + 1)
+                    TX_JOURNAL.close_step(account_name, current_step, module_name)
                     if not (current_step + 2) > (len(route_modules)):
                         await self.smart_sleep(account_name, account_number=1)
                 else:
@@ -343,12 +358,7 @@ class Runner(Logger):
             message_list.append(f'Total result:    ✅   —   {success_count}    |    ❌   —   {errors_count}')
 
             if TELEGRAM_NOTIFICATIONS:
-                if errors_count > 0:
-                    disable_notification = False
-                else:
-                    disable_notification = True
-                await self.send_tg_message(account_name, message_to_send=message_list,
-                                           disable_notification=disable_notification)
+                self.tg_notifier.notify(account_name, message_to_send=message_list, urgent=errors_count > 0)
 
             if not SOFTWARE_MODE:
                 self.logger_msg(None, None, f"Start running next wallet!\n", 'info')
@@ -360,6 +370,92 @@ class Runner(Logger):
             if smart_route_type:
                 self.logger_msg(None, None, f"Saving progress in Google...\n", 'success')
             traceback.print_exc()
+        finally:
+            ACCOUNTS_IN_FLIGHT.dec()
+            TRACER.add_span('route', route_started_at, 'route')
+            TRACER.reset_track(trace_token)
+
+    @staticmethod
+    def get_journal_client(account_name, private_key, proxy, network):
+        if network.name == get_network_by_chain_id(9).name:
+            return StarknetClient(account_name, private_key, network, proxy)
+
+        evm_key = PRIVATE_KEYS_EVM[PRIVATE_KEYS.index(private_key)] if GLOBAL_NETWORK == 9 else private_key
+        return Client(account_name, evm_key, network, proxy)
+
+    async def resume_journal_step(self, account_name, private_key, proxy) -> bool | None:
+        # True или False - шаг завершен по журналу прошлого запуска, None - модуль нужно выполнить
+        entries = TX_JOURNAL.get_entries()
+        if not entries:
+            return None
+
+        self.logger_msg(account_name, None, f"Found {len(entries)} journal entries from the previous run, "
+                                            f"checking their status", 'warning')
+
+        checked_hashes = {entry['hash'] for entry in entries if entry['kind'] == 'tx_status'}
+        for entry in entries:
+            if entry['kind'] == 'tx' and entry['hash'] not in checked_hashes:
+                client = self.get_journal_client(account_name, private_key, proxy,
+                                                 get_network_by_name(entry['network']))
+                try:
+                    status = await client.get_tx_status(entry['hash'])
+                finally:
+                    await client.session.close()
+
+                TX_JOURNAL.record('tx_status', hash=entry['hash'], status=status)
+                self.logger_msg(account_name, None, f"Transaction {entry['hash']} from the previous run: "
+                                                    f"{TX_STATUS_NAMES[status]}")
+
+        # Ушли ли средства с аккаунта после того, как был записан баланс получателя
+        entries = TX_JOURNAL.get_entries()
+        receive_index = max((index for index, entry in enumerate(entries) if entry['kind'] == 'receive'),
+                            default=None)
+        if receive_index is None:
+            # Шаг без ожидания средств (обмен, лендинг и т.д.) завершен, если его последняя транзакция подтверждена
+            if {entry['kind'] for entry in entries} & set(TX_JOURNAL_OFFCHAIN_SENT):
+                return True
+
+            statuses = [entry['status'] for entry in entries if entry['kind'] == 'tx_status']
+            if not statuses or statuses[-1] is None:
+                return None
+
+            self.logger_msg(account_name, None, f"Step was {'completed' if statuses[-1] else 'failed'} "
+                                                f"in the previous run", 'success' if statuses[-1] else 'error')
+            return statuses[-1]
+
+        receive, sent_entries = entries[receive_index], entries[receive_index + 1:]
+        sent_kinds = {entry['kind'] for entry in sent_entries}
+        if sent_kinds & set(TX_JOURNAL_OFFCHAIN_SENT):
+            sent = True
+        elif 'rhino_deposit' in sent_kinds:
+            # Депозит на Rhino еще не вывод: модуль продолжит с вывода, не повторяя подтвержденный депозит
+            sent = False
+        else:
+            sent = any(entry['kind'] == 'tx_status' and entry['status'] for entry in sent_entries)
+
+        if not sent:
+            return None
+
+        swap = next((entry for entry in reversed(sent_entries) if entry['kind'] == 'layerswap_swap'), None)
+        if swap:
+            client = self.get_journal_client(account_name, private_key, proxy, get_network_by_chain_id(GLOBAL_NETWORK))
+            try:
+                if not await LayerSwap(client).wait_for_swap(swap['swap_id']):
+                    return False
+            finally:
+                await client.session.close()
+
+        token_name = receive['token_name']
+        self.logger_msg(account_name, None, f"Funds were sent in the previous run, waiting {token_name} to receive")
+        watcher = BalanceWatcher.get_watcher(get_network_by_chain_id(receive['chain_id']), proxy)
+        try:
+            await watcher.wait_for_balance(receive['address'], token_name, receive['old_balance'])
+        except asyncio.TimeoutError:
+            self.logger_msg(account_name, None, f"{token_name} has not been received", 'error')
+            return False
+
+        self.logger_msg(account_name, None, f"{token_name} was received, step completed", 'success')
+        return True
 
     async def run_parallel(self, smart_route, route_generator):
         selected_wallets = list(self.get_wallets())
@@ -367,13 +463,14 @@ class Runner(Logger):
         accounts_per_stream = ACCOUNTS_IN_STREAM
         num_streams, remainder = divmod(num_accounts, accounts_per_stream)
         if smart_route:
-            clean_progress_file()
+            self.reset_progress()
 
         for stream_index in range(num_streams + (remainder > 0)):
             start_index = stream_index * accounts_per_stream
             end_index = (stream_index + 1) * accounts_per_stream if stream_index < num_streams else num_accounts
 
             accounts = selected_wallets[start_index:end_index]
+            QUEUE_DEPTH.set(num_accounts - end_index, queue='accounts')
 
             if smart_route:
                 await self.generate_smart_routes(route_generator, tuple(accounts))
@@ -388,13 +485,14 @@ class Runner(Logger):
                         self.get_proxy_for_account(account_name), smart_route, index, parallel_mode=True)))
 
             await asyncio.gather(*tasks, return_exceptions=True)
+            self.tg_notifier.flush()
 
             if smart_route:
                 await self.update_sheet_data(route_generator)
-                clean_progress_file()
+                self.reset_progress()
 
             if MOBILE_PROXY:
-                await self.change_ip_proxy()
+                self.proxy_pool.request_rotation()
 
             self.logger_msg(None, None, f"Wallets in stream completed their tasks, launching next stream\n", 'success')
 
@@ -406,7 +504,7 @@ class Runner(Logger):
 
         for account_name, private_key in accounts_data:
             if smart_route_type:
-                clean_progress_file()
+                self.reset_progress()
                 await self.generate_smart_routes(route_generator, (account_name, private_key))
 
             await self.run_account_modules(account_name, private_key, get_network_by_chain_id(GLOBAL_NETWORK),
@@ -419,24 +517,200 @@ class Runner(Logger):
                 await self.update_sheet_data(route_generator)
 
             if MOBILE_PROXY:
-                await self.change_ip_proxy()
+                self.proxy_pool.request_rotation()
 
         if smart_route_type:
-            clean_progress_file()
+            self.reset_progress()
 
         self.logger_msg(None, None, f"All accounts completed their tasks!\n",
                         'success')
 
+    async def run_job_heartbeat(self, tasks: dict[str, asyncio.Task]):
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_INTERVAL)
+            for account_name, job in list(self.jobs.items()):
+                if not self.job_queue.heartbeat(job, JOB_LEASE_TIME):
+                    # Аренда уже у другого процесса: аккаунт останавливается, чтобы не выполняться дважды
+                    self.logger_msg(account_name, None, f"Lease expired, account was taken by another worker", 'error')
+                    job.lease_lost = True
+                    del self.jobs[account_name]
+                    tasks[account_name].cancel()
+
+    async def run_job_worker(self, smart_route, route_generator):
+        self.job_queue = get_job_queue(JOB_QUEUE_URL)
+        TX_JOURNAL.dir_path = self.job_queue.get_journal_dir()
+        worker_id = get_worker_id()
+        accounts = {str(account_name): (account_name, private_key) for account_name, private_key in self.get_wallets()}
+
+        if smart_route:
+            new_jobs = [(account_name, None, 0) for account_name in accounts]
+        else:
+            routes = self.load_routes() if check_progress_file() else {}
+            new_jobs = [(account_name, routes[account_name]['route'], routes[account_name]['current_step'])
+                        for account_name in accounts if account_name in routes]
+
+        added_count = self.job_queue.add_jobs(new_jobs)
+        self.logger_msg(None, None, f"Job queue | Worker {worker_id} | {added_count} new accounts added | "
+                                    f"Status: {self.job_queue.get_stats()}\n")
+
+        tasks: dict[str, asyncio.Task] = {}
+        heartbeat = asyncio.create_task(self.run_job_heartbeat(tasks))
+        try:
+            while True:
+                jobs = self.job_queue.lease(worker_id, list(accounts), ACCOUNTS_IN_STREAM if SOFTWARE_MODE else 1,
+                                            JOB_LEASE_TIME)
+                if not jobs:
+                    break
+                self.jobs = {job.account_name: job for job in jobs}
+
+                jobs_without_route = [job for job in jobs if not job.route]
+                if smart_route and jobs_without_route:
+                    self.reset_progress()
+                    await route_generator.get_smart_routes_for_batch([job.account_name for job in jobs_without_route])
+                    routes = self.load_routes()
+                    for job in jobs_without_route:
+                        self.job_queue.set_route(job, routes[job.account_name]['route'])
+
+                tasks.clear()
+                for index, job in enumerate(jobs):
+                    account_name, private_key = accounts[job.account_name]
+                    # Задача копирует контекст при создании, поэтому аренда видна всем модулям аккаунта
+                    job_token = CURRENT_JOB.set(job)
+                    tasks[job.account_name] = asyncio.create_task(
+                        self.run_account_modules(
+                            account_name, private_key, get_network_by_chain_id(GLOBAL_NETWORK),
+                            self.get_proxy_for_account(account_name), smart_route, index,
+                            parallel_mode=bool(SOFTWARE_MODE)))
+                    CURRENT_JOB.reset(job_token)
+
+                await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+                for account_name, job in self.jobs.items():
+                    if not self.job_queue.complete(job):
+                        self.logger_msg(account_name, None, f"Lease expired before the account was completed",
+                                        'warning')
+                self.jobs = {}
+                self.tg_notifier.flush()
+
+                if smart_route:
+                    await self.update_sheet_data(route_generator)
+                    self.reset_progress()
+
+                if not SOFTWARE_MODE:
+                    await self.smart_sleep(jobs[0].account_name, account_number=1, accounts_delay=True)
+
+                if MOBILE_PROXY:
+                    self.proxy_pool.request_rotation()
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+
+            # Прерванные аккаунты сразу возвращаются в очередь и продолжаются другим процессом с сохраненного шага
+            for job in self.jobs.values():
+                self.job_queue.release(job)
+            self.jobs = {}
+            self.logger_msg(None, None, f"Job queue | Status: {self.job_queue.get_stats()}\n", 'success')
+            self.job_queue.close()
+
+    async def handle_shard_message(self, kind: str, data: list):
+        if kind == 'step':
+            self.update_step(*data)
+        elif kind == 'bad_wallet':
+            self.collect_bad_wallets(*data)
+        elif kind == 'google_progress':
+            self.save_google_progress_offline(*data)
+        elif kind == 'stark_data':
+            await StarknetClient.save_stark_data_file(*data)
+        elif kind == 'telegram':
+            self.tg_notifier.notify(*data)
+        elif kind == 'stream_done':
+            self.tg_notifier.flush()
+        elif kind == 'progress':
+            shard_index, done_count, total_count = data
+            self.logger_msg(None, None, f"Shard {shard_index} | {done_count}/{total_count} accounts completed\n")
+
+    async def run_sharded(self, smart_route, route_generator):
+        selected_wallets = self.get_wallets()
+        shards = split_wallets(selected_wallets, SHARD_WORKERS)
+        if smart_route:
+            # Умные маршруты для всех шардов строятся заранее, чтобы только координатор писал в файл прогресса
+            self.reset_progress()
+            accounts_name = [str(account_name) for account_name, _ in selected_wallets]
+            try:
+                await route_generator.get_smart_routes_for_batch(accounts_name)
+            except Exception as error:
+                raise SoftwareException(f"Can`t generate smart route. Error: {error}")
+
+        self.logger_msg(None, None, f"Splitting {len(selected_wallets)} wallets between {len(shards)} processes\n")
+
+        # Файлы прогресса, таблицу и Telegram ведет только координатор, шарды присылают изменения через очередь
+        loop = asyncio.get_running_loop()
+        executor, queue = create_shard_executor(len(shards))
+        futures = [loop.run_in_executor(executor, run_shard, shard_index, shard, smart_route)
+                   for shard_index, shard in enumerate(shards)]
+        pending = set(range(len(shards)))
+        try:
+            while pending:
+                try:
+                    kind, *data = await loop.run_in_executor(None, queue.get, True, SHARD_QUEUE_TIMEOUT)
+                except Empty:
+                    # Упавший процесс не пришлет shard_done
+                    pending -= {index for index, future in enumerate(futures) if future.done() and future.exception()}
+                    continue
+
+                if kind == 'shard_done':
+                    pending.discard(data[0])
+                else:
+                    await self.handle_shard_message(kind, data)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        for shard_index, future in enumerate(futures):
+            if future.done() and not future.cancelled() and future.exception():
+                self.logger_msg(None, None, f"Shard {shard_index} crashed. Error: {future.exception()}", 'error')
+
+        if smart_route:
+            await self.update_sheet_data(route_generator)
+            self.reset_progress()
+
+        self.logger_msg(None, None, f"All shards completed their tasks!\n", 'success')
+
+    @staticmethod
+    async def close_shared_clients():
+        await CEXWithdrawDispatcher.stop_all()
+        await CEXClient.close_all()
+        await BalanceWatcher.close_all()
+        await POOL_CACHE.close()
+
+    async def precompute_stark_addresses(self):
+        if GLOBAL_NETWORK == 9 and PRIVATE_KEYS:
+            self.logger_msg(None, None, f"Computing Starknet addresses for {len(PRIVATE_KEYS)} accounts")
+            computed_count = await StarknetClient.precompute_addresses(PRIVATE_KEYS)
+            self.logger_msg(None, None, f"Computed {computed_count} new addresses\n", 'success')
+
     async def run_accounts(self, smart_route: bool):
         route_generator = None
+        self.tg_notifier = TelegramNotifier()
+        self.proxy_pool = ProxyPool(PROXIES if USE_PROXY else [], ACCOUNT_NAMES)
         clean_gwei_file()
+        await self.precompute_stark_addresses()
         if smart_route:
             if not check_google_progress_file():
                 clean_google_progress_file()
             route_generator = RouteGenerator(silent=False)
 
         try:
-            if SOFTWARE_MODE:
+            CASSETTE.start()
+            PROFILER.start()
+            await METRICS.start()
+            if TELEGRAM_NOTIFICATIONS:
+                self.tg_notifier.start()
+            await self.proxy_pool.start()
+            if JOB_QUEUE_URL:
+                await self.run_job_worker(smart_route, route_generator)
+            elif SHARD_WORKERS > 1:
+                await self.run_sharded(smart_route, route_generator)
+            elif SOFTWARE_MODE:
                 await self.run_parallel(smart_route, route_generator)
             else:
                 await self.run_consistently(smart_route, route_generator)
@@ -449,3 +723,73 @@ class Runner(Logger):
                                 'warning')
                 await self.update_sheet_data(route_generator)
             traceback.print_exc()
+        finally:
+            await self.tg_notifier.stop()
+            await self.proxy_pool.stop()
+            await self.close_shared_clients()
+            await METRICS.stop()
+            TRACER.export()
+
+            for stop_info in CASSETTE.stop(), PROFILER.stop():
+                if stop_info:
+                    self.logger_msg(None, None, stop_info, 'success')
+
+
+class ShardRunner(Runner):
+    """
+    Runner внутри процесса-шарда: выполняет свою часть кошельков со своим event loop. Маршруты читаются один раз
+    при запуске, а шаги, результаты для таблицы и отчеты Telegram отправляются координатору через очередь.
+    """
+
+    def __init__(self, shard_index: int, wallets: list, queue):
+        super().__init__()
+        self.shard_index = shard_index
+        self.wallets = wallets
+        self.queue = queue
+        self.routes = Runner.load_routes()
+        self.done_count = 0
+        self.tg_notifier = ShardNotifier(shard_index, queue)
+
+    def get_wallets(self):
+        return self.wallets
+
+    def load_routes(self):
+        return self.routes
+
+    def update_step(self, account_name, step):
+        self.routes[str(account_name)]["current_step"] = step
+        self.queue.put(('step', account_name, step))
+
+    def collect_bad_wallets(self, account_name, module_name):
+        self.queue.put(('bad_wallet', account_name, module_name))
+
+    def save_google_progress_offline(self, result, module_name, account_name):
+        self.queue.put(('google_progress', result, module_name, account_name))
+
+    def reset_progress(self):
+        pass
+
+    async def generate_smart_routes(self, route_generator, accounts_data: tuple):
+        pass
+
+    async def update_sheet_data(self, route_generator):
+        pass
+
+    async def run_account_modules(self, account_name, *args, **kwargs):
+        try:
+            await super().run_account_modules(account_name, *args, **kwargs)
+        finally:
+            self.done_count += 1
+            self.queue.put(('progress', self.shard_index, self.done_count, len(self.wallets)))
+
+    async def run_shard(self, smart_route: bool):
+        self.proxy_pool = ProxyPool(PROXIES if USE_PROXY else [], ACCOUNT_NAMES)
+        try:
+            await self.proxy_pool.start()
+            if SOFTWARE_MODE:
+                await self.run_parallel(smart_route, None)
+            else:
+                await self.run_consistently(smart_route, None)
+        finally:
+            await self.proxy_pool.stop()
+            await self.close_shared_clients()
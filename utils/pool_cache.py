@@ -0,0 +1,225 @@
+import time
+import random
+import asyncio
+
+from itertools import combinations
+from aiohttp import ClientSession, ClientTimeout
+from starknet_py.hash.selector import get_selector_from_name
+
+from config import TOKENS_PER_CHAIN, JEDISWAP_CONTRACT, TENKSWAP_CONTRACT, PROTOSS_CONTRACT, MYSWAP_CONTRACT
+from utils.networks import StarknetRPC
+from utils.retry_policy import dependency_guard
+
+# Пулы Uniswap V2 форков: селекторы роутера/фабрики/пары, формат резервов (Uint256 или felt) и комиссия в 1/1000
+POOL_DEXES = {
+    'JediSwap': {
+        'router': JEDISWAP_CONTRACT['router'],
+        'factory': 'factory',
+        'get_pair': 'get_pair',
+        'get_reserves': 'get_reserves',
+        'uint256': True,
+        'fee': 3,
+    },
+    '10kSwap': {
+        'router': TENKSWAP_CONTRACT['router'],
+        'factory': 'factory',
+        'get_pair': 'getPair',
+        'get_reserves': 'getReserves',
+        'uint256': False,
+        'fee': 3,
+    },
+    'Protoss': {
+        'router': PROTOSS_CONTRACT['router'],
+        'factory': 'factory',
+        'get_pair': 'getPair',
+        'get_reserves': 'getReserves',
+        'uint256': False,
+        'fee': 3,
+    },
+}
+MYSWAP_POOLS = {
+    "ETHUSDC": 1,
+    "DAIETH": 2,
+    "ETHUSDT": 4,
+    "USDCUSDT": 5,
+    "DAIUSDC": 6
+}
+MYSWAP_FEE = 3
+POOL_CACHE_BLOCK_CHECK = 3
+POOL_CACHE_TIMEOUT = 30
+
+
+class PoolCache:
+    def __init__(self):
+        self.pairs: dict[tuple, int] | None = None
+        self.reserves: dict[tuple, tuple[int, int]] = {}
+        self.block_number = None
+        self.checked_at = 0.0
+        self.loop = None
+        self.session: ClientSession | None = None
+        self.task: asyncio.Task | None = None
+
+    def prepare(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop or self.session is None or self.session.closed:
+            self.loop = loop
+            self.session = ClientSession(timeout=ClientTimeout(total=POOL_CACHE_TIMEOUT))
+            self.task = None
+
+    async def close(self):
+        if self.session and not self.session.closed and self.loop is asyncio.get_running_loop():
+            await self.session.close()
+        self.session = None
+
+    @staticmethod
+    def get_call_request(request_id: int, contract_address: int, selector_name: str, calldata: list = None,
+                         block_number: int = None) -> dict:
+        return {
+            'jsonrpc': '2.0',
+            'id': request_id,
+            'method': 'starknet_call',
+            'params': {
+                'request': {
+                    'contract_address': hex(contract_address),
+                    'entry_point_selector': hex(get_selector_from_name(selector_name)),
+                    'calldata': [hex(value) for value in calldata or []]
+                },
+                'block_id': {'block_number': block_number} if block_number is not None else 'latest'
+            }
+        }
+
+    async def make_batch_request(self, requests: list[dict]) -> dict[int, list[int]]:
+        self.prepare()
+
+        rpc = random.choice(StarknetRPC.rpc)
+        async with dependency_guard(rpc, weight=len(requests)) as dependency:
+            async with self.session.post(rpc, json=requests) as response:
+                dependency.set_response(response)
+                data = await response.json(content_type=None)
+
+        if isinstance(data, dict):
+            data = [data]
+
+        return {item['id']: [int(value, 16) for value in item['result']] for item in data if 'result' in item}
+
+    async def get_block_number(self) -> int:
+        self.prepare()
+
+        request = {'jsonrpc': '2.0', 'id': 0, 'method': 'starknet_blockNumber', 'params': []}
+        rpc = random.choice(StarknetRPC.rpc)
+        async with dependency_guard(rpc) as dependency:
+            async with self.session.post(rpc, json=request) as response:
+                dependency.set_response(response)
+                return (await response.json(content_type=None))['result']
+
+    async def load_pairs(self):
+        dex_names = list(POOL_DEXES)
+        factories = await self.make_batch_request([
+            self.get_call_request(index, POOL_DEXES[dex_name]['router'], POOL_DEXES[dex_name]['factory'])
+            for index, dex_name in enumerate(dex_names)
+        ])
+
+        token_pairs = [sorted(pair) for pair in combinations(TOKENS_PER_CHAIN['Starknet'].values(), 2)]
+        pair_keys = [(dex_name, *token_pair) for index, dex_name in enumerate(dex_names) if index in factories
+                     for token_pair in token_pairs]
+
+        if not pair_keys:
+            self.pairs = {}
+            return
+
+        pairs = await self.make_batch_request([
+            self.get_call_request(index, factories[dex_names.index(dex_name)][0],
+                                  POOL_DEXES[dex_name]['get_pair'], [token0, token1])
+            for index, (dex_name, token0, token1) in enumerate(pair_keys)
+        ])
+
+        self.pairs = {key: pairs[index][0] for index, key in enumerate(pair_keys) if pairs.get(index, [0])[0]}
+
+    async def load_reserves(self, block_number: int):
+        if self.pairs is None:
+            await self.load_pairs()
+
+        keys = list(self.pairs) + [('mySwap', pool_id) for pool_id in MYSWAP_POOLS.values()]
+        requests = []
+        for index, key in enumerate(keys):
+            if key[0] == 'mySwap':
+                requests.append(self.get_call_request(index, MYSWAP_CONTRACT['router'], 'get_pool', [key[1]],
+                                                      block_number))
+            else:
+                requests.append(self.get_call_request(index, self.pairs[key], POOL_DEXES[key[0]]['get_reserves'],
+                                                      block_number=block_number))
+
+        results = await self.make_batch_request(requests)
+
+        reserves = {}
+        for index, key in enumerate(keys):
+            result = results.get(index)
+            if not result:
+                continue
+            if key[0] == 'mySwap':
+                reserves[key] = result[2], result[5]
+            elif POOL_DEXES[key[0]]['uint256']:
+                reserves[key] = result[0] + (result[1] << 128), result[2] + (result[3] << 128)
+            else:
+                reserves[key] = result[0], result[1]
+
+        self.reserves, self.block_number = reserves, block_number
+
+    async def update(self):
+        try:
+            block_number = await self.get_block_number()
+            if block_number != self.block_number:
+                await self.load_reserves(block_number)
+            self.checked_at = time.time()
+        finally:
+            self.task = None
+
+    async def refresh(self):
+        self.prepare()
+
+        if time.time() - self.checked_at > POOL_CACHE_BLOCK_CHECK:
+            if self.task is None:
+                self.task = self.loop.create_task(self.update())
+            await asyncio.shield(self.task)
+
+    async def get_pool_reserves(self, dex_name: str, from_token_address: int,
+                                to_token_address: int) -> tuple[int, int] | None:
+        try:
+            await self.refresh()
+        except Exception:
+            return None
+
+        if dex_name == 'mySwap':
+            tokens = {v: k for k, v in TOKENS_PER_CHAIN['Starknet'].items()}
+            from_token_name, to_token_name = tokens[from_token_address], tokens[to_token_address]
+
+            pool_id = MYSWAP_POOLS.get(from_token_name + to_token_name)
+            if pool_id is not None:
+                return self.reserves.get(('mySwap', pool_id))
+
+            reserves = self.reserves.get(('mySwap', MYSWAP_POOLS.get(to_token_name + from_token_name)))
+            return reserves[::-1] if reserves else None
+
+        token0, token1 = sorted([from_token_address, to_token_address])
+        reserves = self.reserves.get((dex_name, token0, token1))
+        if reserves and from_token_address != token0:
+            return reserves[::-1]
+        return reserves
+
+    async def get_amount_out(self, dex_name: str, amount_in_wei: int, from_token_address: int,
+                             to_token_address: int) -> tuple[int, float] | None:
+        reserves = await self.get_pool_reserves(dex_name, from_token_address, to_token_address)
+        if not reserves or not all(reserves):
+            return None
+
+        reserve_in, reserve_out = reserves
+        fee = MYSWAP_FEE if dex_name == 'mySwap' else POOL_DEXES[dex_name]['fee']
+
+        amount_in_with_fee = amount_in_wei * (1000 - fee)
+        amount_out = amount_in_with_fee * reserve_out // (reserve_in * 1000 + amount_in_with_fee)
+        price_impact = 100 - amount_out / (amount_in_wei * reserve_out / reserve_in) * 100
+
+        return amount_out, price_impact
+
+
+POOL_CACHE = PoolCache()
@@ -0,0 +1,199 @@
+import os
+import sys
+import time
+import inspect
+import functools
+import threading
+import contextvars
+
+from asyncio import events
+from general_settings import PROFILE_DIR
+
+# Папку отчета можно задать и без правки настроек: STARKMACHINE_PROFILE=./data/profile python main.py
+PROFILE_ENV_VAR = 'STARKMACHINE_PROFILE'
+PROFILE_SAMPLE_INTERVAL = 0.005  # Как часто (сек) снимать стек главного потока
+PROFILE_MAX_DEPTH = 64           # Сколько верхних кадров стека сохранять в сэмпле
+PROFILE_TOP_FUNCTIONS = 10       # Сколько самых горячих функций показывать для каждого модуля
+# Интервал переключения GIL на время профилирования. Со стандартными 5 мс поток сэмплера почти не получает GIL
+# посреди короткого шага задачи и видит главный поток только в ожидании
+PROFILE_SWITCH_INTERVAL = 0.0005
+
+PROFILE_MODULE = contextvars.ContextVar('profile_module', default=None)
+
+
+class ModuleStats:
+    def __init__(self):
+        self.calls = 0
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.samples = 0
+        self.stacks: dict[tuple, int] = {}
+        self.leaves: dict[str, int] = {}
+
+
+class ModuleProfiler:
+    """
+    Профилировщик модулей из functions.py. CPU-время считается по шагам задач event loop, которые выполняются
+    в контексте модуля (включая дочерние задачи), остальное время вызова модуля - ожидание (сеть, сон, подписи
+    в пуле процессов). Стеки снимаются сэмплированием главного потока, пока выполняется шаг задачи модуля.
+    """
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self.enabled = bool(output_dir)
+        self.modules: dict[str, ModuleStats] = {}
+        self.active_module: str | None = None
+        self.original_run = None
+        self.thread: threading.Thread | None = None
+        self.stop_event = threading.Event()
+        self.main_thread_id = threading.main_thread().ident
+        self.switch_interval = sys.getswitchinterval()
+        self.started_at = 0.0
+
+    def get_stats(self, module_name: str) -> ModuleStats:
+        if module_name not in self.modules:
+            self.modules[module_name] = ModuleStats()
+        return self.modules[module_name]
+
+    def wrap(self, func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            # Вложенные модули (например, swap_avnu внутри check_and_get_eth) считаются в модуле верхнего уровня
+            if PROFILE_MODULE.get() is not None:
+                return await func(*args, **kwargs)
+
+            token = PROFILE_MODULE.set(func.__name__)
+            started_at = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                stats = self.get_stats(func.__name__)
+                stats.calls += 1
+                stats.wall_time += time.perf_counter() - started_at
+                PROFILE_MODULE.reset(token)
+
+        return wrapper
+
+    def wrap_functions(self, namespace: dict):
+        if not self.enabled:
+            return
+
+        for name, value in list(namespace.items()):
+            if inspect.iscoroutinefunction(value) and value.__module__ == namespace['__name__']:
+                namespace[name] = self.wrap(value)
+
+    def run_handle(self, handle):
+        module_name = handle._context.get(PROFILE_MODULE) if handle._context is not None else None
+        if module_name is None:
+            return self.original_run(handle)
+
+        self.active_module = module_name
+        started_at = time.thread_time()
+        try:
+            return self.original_run(handle)
+        finally:
+            self.active_module = None
+            self.get_stats(module_name).cpu_time += time.thread_time() - started_at
+
+    @staticmethod
+    def get_frame_name(frame) -> str:
+        code = frame.f_code
+        return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+    def sample(self):
+        handle_run_code = self.original_run.__code__
+        while not self.stop_event.wait(PROFILE_SAMPLE_INTERVAL):
+            module_name = self.active_module
+            frame = sys._current_frames().get(self.main_thread_id)
+            if module_name is None or frame is None:
+                continue
+
+            # Кадры event loop ниже шага задачи одинаковы для всех сэмплов, поэтому стек обрезается на Handle._run
+            stack = []
+            while frame is not None and frame.f_code is not handle_run_code and len(stack) < PROFILE_MAX_DEPTH:
+                stack.append(self.get_frame_name(frame))
+                frame = frame.f_back
+
+            if not stack:
+                continue
+
+            stats = self.get_stats(module_name)
+            stats.samples += 1
+            stack_key = tuple(reversed(stack))
+            stats.stacks[stack_key] = stats.stacks.get(stack_key, 0) + 1
+            stats.leaves[stack[0]] = stats.leaves.get(stack[0], 0) + 1
+
+    def start(self):
+        if not self.enabled or self.original_run:
+            return
+
+        self.started_at = time.perf_counter()
+        self.original_run = events.Handle._run
+        profiler = self
+
+        def run_handle(handle):
+            return profiler.run_handle(handle)
+
+        events.Handle._run = run_handle
+
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(PROFILE_SWITCH_INTERVAL)
+
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.sample, name='module-profiler', daemon=True)
+        self.thread.start()
+
+    def stop(self) -> str | None:
+        if not self.original_run:
+            return
+
+        events.Handle._run, self.original_run = self.original_run, None
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        sys.setswitchinterval(self.switch_interval)
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        report_path = os.path.join(self.output_dir, 'profile_report.txt')
+        stacks_path = os.path.join(self.output_dir, 'profile_stacks.txt')
+
+        with open(report_path, 'w', encoding='utf-8') as file:
+            file.write(self.render_report())
+        with open(stacks_path, 'w', encoding='utf-8') as file:
+            file.write(self.render_stacks())
+
+        return f'Module profile saved to {report_path}, flamegraph stacks to {stacks_path}'
+
+    def render_report(self) -> str:
+        lines = [
+            f'Run time: {time.perf_counter() - self.started_at:.1f} s | Sample interval: {PROFILE_SAMPLE_INTERVAL} s',
+            '',
+            f'{"Module":<32}{"Calls":>7}{"Wall, s":>11}{"CPU, s":>10}{"Await, s":>11}{"CPU %":>8}{"Samples":>9}',
+        ]
+
+        modules = sorted(self.modules.items(), key=lambda item: -item[1].cpu_time)
+        for module_name, stats in modules:
+            await_time = max(stats.wall_time - stats.cpu_time, 0)
+            cpu_share = stats.cpu_time / stats.wall_time * 100 if stats.wall_time else 0
+            lines.append(f'{module_name:<32}{stats.calls:>7}{stats.wall_time:>11.2f}{stats.cpu_time:>10.3f}'
+                         f'{await_time:>11.2f}{cpu_share:>8.1f}{stats.samples:>9}')
+
+        for module_name, stats in modules:
+            if not stats.samples:
+                continue
+            lines += ['', f'{module_name} | CPU hotspots (leaf functions by samples):']
+            for function_name, count in sorted(stats.leaves.items(), key=lambda item: -item[1])[:PROFILE_TOP_FUNCTIONS]:
+                lines.append(f'{count:>9} {count / stats.samples * 100:>6.1f}%  {function_name}')
+
+        return '\n'.join(lines) + '\n'
+
+    def render_stacks(self) -> str:
+        # Формат collapsed stacks (flamegraph.pl, speedscope): модуль;кадр;...;кадр количество
+        return ''.join(
+            f'{";".join((module_name, *stack))} {count}\n'
+            for module_name, stats in self.modules.items()
+            for stack, count in stats.stacks.items()
+        )
+
+
+PROFILER = ModuleProfiler(os.environ.get(PROFILE_ENV_VAR, PROFILE_DIR))
@@ -0,0 +1,192 @@
+import time
+import random
+import asyncio
+
+from contextlib import asynccontextmanager
+from aiohttp import ClientSession, ClientTimeout
+from modules import Logger
+from utils.networks import EthereumRPC
+from general_settings import (MOBILE_PROXY_URL_CHANGER, PROXY_MAX_ACCOUNTS, PROXY_CHECK_INTERVAL,
+                              PROXY_CHECK_TIMEOUT, PROXY_MAX_FAILURES)
+
+PROXY_LATENCY_WEIGHT = 0.3  # Вес последней проверки в средней задержке прокси
+
+
+def mask_proxy(proxy: str) -> str:
+    return proxy[proxy.find('@') + 1:]
+
+
+class ProxyState:
+    def __init__(self, proxy: str):
+        self.proxy = proxy
+        self.latency: float | None = None
+        self.failures = 0
+        self.checked_at = 0.0
+        self.in_use = 0
+        self.semaphore = asyncio.Semaphore(PROXY_MAX_ACCOUNTS) if PROXY_MAX_ACCOUNTS else None
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.ready = asyncio.Event()
+        self.ready.set()
+
+    @property
+    def healthy(self) -> bool:
+        return self.failures < PROXY_MAX_FAILURES
+
+    @property
+    def score(self) -> float:
+        # Меньше - лучше: средняя задержка с учетом занятости прокси
+        return (self.latency or PROXY_CHECK_TIMEOUT) * (1 + self.in_use)
+
+    def record_check(self, latency: float | None):
+        self.checked_at = time.time()
+        if latency is None:
+            self.failures += 1
+            return
+
+        self.failures = 0
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += (latency - self.latency) * PROXY_LATENCY_WEIGHT
+
+
+class ProxyPool(Logger):
+    """
+    Пул прокси: фоновые проверки с таймаутом, оценка по задержке и ошибкам, ограничение одновременных модулей
+    на один прокси. Аккаунт закреплен за прокси по номеру, пока тот проходит проверки, иначе переводится на
+    лучший рабочий прокси. Ссылки смены IP мобильных прокси общие для всего пула, поэтому IP меняется один раз,
+    когда ни через один прокси ничего не работает.
+    """
+
+    def __init__(self, proxies: list[str], account_names: list):
+        Logger.__init__(self)
+        self.proxies = proxies
+        self.account_names = account_names
+        self.states = {proxy: ProxyState(proxy) for proxy in proxies}
+        self.assignments: dict[str, str] = {}
+        self.session: ClientSession | None = None
+        self.checker: asyncio.Task | None = None
+        self.rotation: asyncio.Task | None = None
+
+    def get_session(self) -> ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = ClientSession(timeout=ClientTimeout(total=PROXY_CHECK_TIMEOUT))
+        return self.session
+
+    async def start(self):
+        if self.proxies and not self.checker:
+            await self.check_all()
+            self.checker = asyncio.create_task(self.run_checker())
+
+    async def stop(self):
+        tasks = [task for task in [self.checker, self.rotation] if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.checker, self.rotation = None, None
+
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def run_checker(self):
+        while True:
+            await asyncio.sleep(PROXY_CHECK_INTERVAL)
+            await self.check_all()
+
+    async def check_proxy(self, state: ProxyState) -> float | None:
+        request = {"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 1}
+        started_at = time.perf_counter()
+        try:
+            async with self.get_session().post(random.choice(EthereumRPC.rpc), json=request,
+                                               proxy=f"http://{state.proxy}") as response:
+                data = await response.json(content_type=None)
+            latency = time.perf_counter() - started_at if response.status == 200 and 'result' in data else None
+        except Exception:
+            latency = None
+
+        was_healthy = state.healthy
+        state.record_check(latency)
+        if was_healthy and not state.healthy:
+            self.logger_msg(None, None, f"Proxy {mask_proxy(state.proxy)} failed {state.failures} checks in a row, "
+                                        f"accounts will be moved to other proxies", 'warning')
+        return latency
+
+    async def check_all(self) -> dict[str, float | None]:
+        latencies = await asyncio.gather(*(self.check_proxy(state) for state in self.states.values()))
+        return dict(zip(self.states, latencies))
+
+    def get_default_proxy(self, account_name) -> str:
+        return self.proxies[self.account_names.index(account_name) % len(self.proxies)]
+
+    def get_proxy(self, account_name) -> str:
+        current_proxy = self.assignments.get(str(account_name)) or self.get_default_proxy(account_name)
+        if self.states[current_proxy].healthy:
+            self.assignments[str(account_name)] = current_proxy
+            return current_proxy
+
+        healthy = [state for state in self.states.values() if state.healthy]
+        if not healthy:
+            return current_proxy
+
+        new_proxy = min(healthy, key=lambda state: state.score).proxy
+        self.assignments[str(account_name)] = new_proxy
+        self.logger_msg(account_name, None, f"Proxy {mask_proxy(current_proxy)} is failing, "
+                                            f"switched to {mask_proxy(new_proxy)}", 'warning')
+        return new_proxy
+
+    @asynccontextmanager
+    async def lease(self, account_name, proxy: str | None):
+        if proxy not in self.states:
+            yield proxy
+            return
+
+        state = self.states[self.get_proxy(account_name)]
+
+        # Новые модули не начинаются, пока у прокси меняется IP
+        await state.ready.wait()
+        state.in_use += 1
+        state.idle.clear()
+        try:
+            if state.semaphore:
+                async with state.semaphore:
+                    yield state.proxy
+            else:
+                yield state.proxy
+        finally:
+            state.in_use -= 1
+            if not state.in_use:
+                state.idle.set()
+
+    def request_rotation(self):
+        # Повторные запросы от других аккаунтов присоединяются к уже запланированной смене IP
+        if self.states and (not self.rotation or self.rotation.done()):
+            self.rotation = asyncio.create_task(self.rotate())
+
+    async def change_ip(self) -> bool:
+        for url in [MOBILE_PROXY_URL_CHANGER[0], random.choice(MOBILE_PROXY_URL_CHANGER[1:] or [''])]:
+            if not url:
+                continue
+            try:
+                async with self.get_session().get(url) as response:
+                    if response.status == 200:
+                        return True
+            except Exception as error:
+                self.logger_msg(None, None, f'Bad URL for change IP. Error: {error}', 'error')
+        return False
+
+    async def rotate(self):
+        states = list(self.states.values())
+        for state in states:
+            state.ready.clear()
+        try:
+            await asyncio.gather(*(state.idle.wait() for state in states))
+            self.logger_msg(None, None, f'Trying to change IP address\n', 'info')
+
+            if await self.change_ip():
+                await self.check_all()
+                self.logger_msg(None, None, f'IP address changed!\n', 'success')
+        finally:
+            for state in states:
+                state.ready.set()
@@ -0,0 +1,150 @@
+import time
+import asyncio
+
+from collections import deque
+from urllib.parse import urlparse
+from general_settings import HOST_RATE_LIMITS
+from utils.tracing import TRACE_TRACK
+
+# Лимиты публичных RPC и API: хост - (запросов в секунду, размер пачки). HOST_RATE_LIMITS в general_settings
+# дополняет и переопределяет этот список. Для остальных хостов действует RATE_LIMIT_DEFAULT
+RATE_LIMITS = {
+    'rpc.ankr.com': (25, 30),
+    '1rpc.io': (10, 15),
+    'eth.drpc.org': (20, 25),
+    'ethereum.publicnode.com': (20, 25),
+    'starknet-mainnet.g.alchemy.com': (25, 50),
+    'api.coingecko.com': (0.2, 3),
+    'starknet.api.avnu.fi': (5, 10),
+    'api.layerswap.io': (5, 10),
+    'api.rhino.fi': (5, 10),
+}
+RATE_LIMIT_DEFAULT = (20, 40)
+RATE_LIMIT_MIN_SHARE = 0.1      # Ниже какой доли от лимита может опуститься скорость после ответов 429
+RATE_LIMIT_RECOVERY = 0.02      # На какую долю от лимита скорость растет после каждого успешного запроса
+RATE_LIMIT_BLOCK = 1            # Пауза для всех запросов к хосту после 429 без Retry-After (сек)
+
+
+class TokenBucket:
+    def __init__(self, limit: int, window: float):
+        self.capacity = limit
+        self.rate = limit / window
+        self.tokens = float(limit)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def try_acquire(self, weight: int = 1) -> bool:
+        weight = min(weight, self.capacity)
+        self.refill()
+        if self.blocked_until <= self.updated_at and self.tokens >= weight:
+            self.tokens -= weight
+            return True
+        return False
+
+    async def acquire(self, weight: int = 1):
+        weight = min(weight, self.capacity)
+
+        async with self.lock:
+            while True:
+                self.refill()
+                delay = self.blocked_until - time.monotonic()
+
+                if delay <= 0 and self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+
+                await asyncio.sleep(max(delay, (weight - self.tokens) / self.rate))
+
+    def sync_used(self, used: float):
+        self.refill()
+        self.tokens = min(self.tokens, self.capacity - used)
+
+    def sync_remain(self, remain: float):
+        self.refill()
+        self.tokens = min(self.tokens, remain)
+
+    def block(self, seconds: float):
+        self.tokens = 0
+        self.updated_at = time.monotonic()
+        self.blocked_until = max(self.blocked_until, self.updated_at + seconds)
+
+
+class HostLimiter:
+    """
+    Лимитер запросов к одному хосту. Когда токенов не хватает, запросы ждут в очередях аккаунтов и выдаются
+    по кругу, по одному на аккаунт, чтобы аккаунт с пачкой запросов не задерживал остальных. После 429 скорость
+    снижается вдвое и восстанавливается постепенно с каждым успешным ответом.
+    """
+
+    LIMITERS: dict[str, 'HostLimiter'] = {}
+    RATE_SHARE = 1  # Доля лимита на процесс, когда кошельки разделены между процессами
+
+    def __init__(self, host: str, rate: float, burst: int):
+        self.host = host
+        self.base_rate = rate
+        self.burst = burst
+        self.loop = None
+        self.bucket: TokenBucket | None = None
+        self.queues: dict[str | None, deque] = {}
+        self.dispatcher: asyncio.Task | None = None
+
+    @classmethod
+    def get_limiter(cls, url: str) -> 'HostLimiter':
+        host = urlparse(str(url)).netloc or str(url)
+        if host not in cls.LIMITERS:
+            rate, burst = (RATE_LIMITS | HOST_RATE_LIMITS).get(host, RATE_LIMIT_DEFAULT)
+            cls.LIMITERS[host] = cls(host, rate * cls.RATE_SHARE, max(1, int(burst * cls.RATE_SHARE)))
+        return cls.LIMITERS[host]
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate if self.bucket else self.base_rate
+
+    def prepare(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop = loop
+            self.bucket = TokenBucket(self.burst, self.burst / self.base_rate)
+            self.queues, self.dispatcher = {}, None
+
+    async def acquire(self, weight: int = 1):
+        self.prepare()
+        if not self.queues and self.bucket.try_acquire(weight):
+            return
+
+        future = self.loop.create_future()
+        self.queues.setdefault(TRACE_TRACK.get(), deque()).append((future, weight))
+        if self.dispatcher is None or self.dispatcher.done():
+            self.dispatcher = self.loop.create_task(self.dispatch())
+        await future
+
+    async def dispatch(self):
+        while self.queues:
+            for track in list(self.queues):
+                queue = self.queues[track]
+                future, weight = queue.popleft()
+                if not queue:
+                    del self.queues[track]
+
+                if future.done():
+                    continue
+
+                await self.bucket.acquire(weight)
+                if not future.done():
+                    future.set_result(None)
+
+    def slow_down(self, retry_after: float | None = None):
+        self.prepare()
+        self.bucket.rate = max(self.bucket.rate / 2, self.base_rate * RATE_LIMIT_MIN_SHARE)
+        self.bucket.block(retry_after or RATE_LIMIT_BLOCK)
+
+    def speed_up(self):
+        if self.bucket and self.bucket.rate < self.base_rate:
+            self.bucket.refill()
+            self.bucket.rate = min(self.bucket.rate + self.base_rate * RATE_LIMIT_RECOVERY, self.base_rate)
@@ -0,0 +1,205 @@
+import re
+import time
+import random
+import asyncio
+
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+from aiohttp import ClientError as HttpClientError
+from utils.rate_limiter import HostLimiter
+
+from general_settings import (MAXIMUM_RETRY, SLEEP_TIME_RETRY, RETRY_MAX_SLEEP, CIRCUIT_BREAKER_ERRORS,
+                              CIRCUIT_BREAKER_TIMEOUT)
+
+# Правила повторов по видам ошибок: retries - сколько повторов (None - MAXIMUM_RETRY),
+# backoff - множитель паузы SLEEP_TIME_RETRY, которая удваивается с каждым повтором
+RETRY_RULES = {
+    'insufficient_funds': {'retries': 0, 'backoff': 0},
+    'without_retry': {'retries': 0, 'backoff': 0},
+    'circuit_open': {'retries': 0, 'backoff': 0},
+    'deterministic': {'retries': 1, 'backoff': 1},
+    'nonce': {'retries': 5, 'backoff': 0.5},
+    'rate_limit': {'retries': None, 'backoff': 4},
+    'transient': {'retries': None, 'backoff': 1},
+    'default': {'retries': None, 'backoff': 1},
+}
+RETRY_ERROR_PATTERNS = {
+    'insufficient_funds': re.compile(
+        r'insufficient funds|gas required|insufficient balance|exceeds balance|not enough balance', re.I),
+    'rate_limit': re.compile(r'\b429\b|too many requests|rate limit', re.I),
+    'nonce': re.compile(
+        r'nonce too low|invalid transaction nonce|invalid nonce|nonce is too|replacement transaction underpriced|'
+        r'already known', re.I),
+    'transient': re.compile(
+        r'\b50[234]\b|timeout|timed out|connection|cannot connect|server disconnected|bad gateway|'
+        r'service unavailable|internal error|header not found|rpc request failed', re.I),
+    'deterministic': re.compile(r'execution reverted|transaction execution error|contract not found|entry point', re.I),
+}
+
+
+def get_retry_rule(error: Exception) -> str:
+    from web3.exceptions import ContractLogicError, TimeExhausted
+    from starknet_py.net.client_errors import ClientError
+    from modules.interfaces import (BlockchainException, SoftwareExceptionWithoutRetry,
+                                    BlockchainExceptionWithoutRetry, RateLimitException, CircuitOpenException)
+
+    message = str(error)
+
+    if isinstance(error, CircuitOpenException):
+        return 'circuit_open'
+    if RETRY_ERROR_PATTERNS['insufficient_funds'].search(message):
+        return 'insufficient_funds'
+    if isinstance(error, (SoftwareExceptionWithoutRetry, BlockchainExceptionWithoutRetry)):
+        return 'without_retry'
+    if isinstance(error, RateLimitException) or RETRY_ERROR_PATTERNS['rate_limit'].search(message):
+        return 'rate_limit'
+    if RETRY_ERROR_PATTERNS['nonce'].search(message):
+        return 'nonce'
+    if isinstance(error, ContractLogicError) or RETRY_ERROR_PATTERNS['deterministic'].search(message):
+        return 'deterministic'
+    if (isinstance(error, (asyncio.TimeoutError, TimeExhausted, HttpClientError, BlockchainException))
+            or RETRY_ERROR_PATTERNS['transient'].search(message)):
+        return 'transient'
+    if isinstance(error, (ValueError, ClientError)):
+        return 'deterministic'
+    return 'default'
+
+
+def get_max_retries(rule_name: str) -> int:
+    retries = RETRY_RULES[rule_name]['retries']
+    return MAXIMUM_RETRY if retries is None else min(retries, MAXIMUM_RETRY)
+
+
+def get_retry_delay(rule_name: str, attempt: int, error: Exception = None) -> float:
+    # Экспоненциальная пауза с джиттером, чтобы аккаунты после общего сбоя не повторяли запросы одновременно
+    delay = random.uniform(*SLEEP_TIME_RETRY) * RETRY_RULES[rule_name]['backoff'] * 2 ** (attempt - 1)
+    delay = min(delay, RETRY_MAX_SLEEP) * random.uniform(0.5, 1)
+
+    retry_after = getattr(error, 'retry_after', None)
+    if retry_after:
+        delay = max(delay, retry_after + random.uniform(0, 1))
+    return round(delay, 1)
+
+
+def get_dependency_name(url: str) -> str:
+    return urlparse(str(url)).netloc or str(url)
+
+
+def get_error_status(error: Exception) -> int | None:
+    # aiohttp/web3 хранят HTTP-статус в status, starknet_py - строкой в code (отрицательные коды - ошибки JSON-RPC)
+    status = getattr(error, 'status', None)
+    if isinstance(status, int):
+        return status
+
+    code = getattr(error, 'code', None)
+    if isinstance(code, str) and code.isdigit():
+        return int(code)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class CircuitBreaker:
+    BREAKERS: dict[str, 'CircuitBreaker'] = {}
+
+    def __init__(self, name: str):
+        self.name = name
+        self.errors = 0
+        self.opened_at: float | None = None
+        self.probe = False
+
+    @classmethod
+    def get_breaker(cls, name: str) -> 'CircuitBreaker':
+        if name not in cls.BREAKERS:
+            cls.BREAKERS[name] = cls(name)
+        return cls.BREAKERS[name]
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None and time.time() - self.opened_at < CIRCUIT_BREAKER_TIMEOUT
+
+    def check(self) -> bool:
+        # True - запрос занял место проверочного и должен освободить его по завершении
+        from modules.interfaces import CircuitOpenException
+
+        if self.opened_at is None:
+            return False
+
+        # После паузы один запрос проверяет сервис, остальные аккаунты получают отказ до его результата
+        if self.is_open or self.probe:
+            raise CircuitOpenException(
+                f'{self.name} is unavailable after {self.errors} errors in a row, skipping request')
+        self.probe = True
+        return True
+
+    def record_success(self):
+        self.errors, self.opened_at, self.probe = 0, None, False
+
+    def record_failure(self):
+        self.errors += 1
+        if CIRCUIT_BREAKER_ERRORS and (self.probe or self.errors >= CIRCUIT_BREAKER_ERRORS):
+            self.opened_at, self.probe = time.time(), False
+
+
+class DependencyCall:
+    def __init__(self):
+        self.status: int | None = None
+        self.retry_after: float | None = None
+
+    def set_response(self, response):
+        self.status = response.status
+        self.retry_after = parse_retry_after(response.headers.get('Retry-After'))
+
+
+@asynccontextmanager
+async def dependency_guard(url: str, weight: int = 1, rate_limit: bool = True, rate_limit_statuses: tuple = (429,)):
+    # rate_limit=False - у сервиса свой лимитер (биржи считают вес запросов), общий лимит хоста не применяется
+    from modules.interfaces import RateLimitException
+
+    breaker = CircuitBreaker.get_breaker(get_dependency_name(url))
+    is_probe = breaker.check()
+
+    limiter = HostLimiter.get_limiter(url) if rate_limit else None
+    call = DependencyCall()
+
+    def on_rate_limit():
+        if limiter:
+            limiter.slow_down(call.retry_after)
+        breaker.record_failure()
+
+    try:
+        if limiter:
+            await limiter.acquire(weight)
+        yield call
+    except Exception as error:
+        status = call.status or get_error_status(error)
+        if status in rate_limit_statuses:
+            on_rate_limit()
+            raise RateLimitException(f'{error} | Rate limit on {breaker.name}', call.retry_after) from error
+        elif (status or 0) >= 500 or (status is None and isinstance(error, (HttpClientError, asyncio.TimeoutError))):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        raise
+    else:
+        if call.status in rate_limit_statuses:
+            on_rate_limit()
+        elif call.status is not None and call.status >= 500:
+            breaker.record_failure()
+        else:
+            if limiter:
+                limiter.speed_up()
+            breaker.record_success()
+    finally:
+        if is_probe:
+            breaker.probe = False
+
+
+def choose_rpc(rpc_list: list[str], current_rpc: str = None) -> str:
+    candidates = [rpc for rpc in rpc_list if rpc != current_rpc] or rpc_list
+    available = [rpc for rpc in candidates if not CircuitBreaker.get_breaker(get_dependency_name(rpc)).is_open]
+    return random.choice(available or candidates)
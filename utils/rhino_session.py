@@ -0,0 +1,95 @@
+import json
+import time
+import base64
+
+from hashlib import sha256
+from Crypto.Cipher import AES
+from Crypto.Random import get_random_bytes
+
+RHINO_SESSIONS_FILE_PATH = './data/services/rhino_sessions.json'
+RHINO_AUTH_TTL = 3600 * 12
+RHINO_CONFIG_TTL = 3600
+
+
+class RhinoSession:
+    SESSIONS: dict[str, dict] = {}
+
+    def __init__(self, evm_address: str, private_key: str):
+        self.evm_address = evm_address.lower()
+        self.encryption_key = sha256(f"rhino-session:{private_key}".encode('utf-8')).digest()
+
+        if self.evm_address not in self.SESSIONS:
+            self.SESSIONS[self.evm_address] = self.load()
+        self.data = self.SESSIONS[self.evm_address]
+
+    def encrypt(self, data: dict) -> str:
+        nonce = get_random_bytes(12)
+        cipher = AES.new(self.encryption_key, AES.MODE_GCM, nonce=nonce)
+        ciphertext, tag = cipher.encrypt_and_digest(json.dumps(data).encode('utf-8'))
+        return base64.b64encode(nonce + tag + ciphertext).decode('utf-8')
+
+    def decrypt(self, encrypted_data: str) -> dict:
+        raw_data = base64.b64decode(encrypted_data)
+        nonce, tag, ciphertext = raw_data[:12], raw_data[12:28], raw_data[28:]
+        cipher = AES.new(self.encryption_key, AES.MODE_GCM, nonce=nonce)
+        return json.loads(cipher.decrypt_and_verify(ciphertext, tag))
+
+    @staticmethod
+    def read_file() -> dict:
+        try:
+            with open(RHINO_SESSIONS_FILE_PATH, 'r') as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def load(self) -> dict:
+        encrypted_data = self.read_file().get(self.evm_address)
+        if encrypted_data:
+            try:
+                return self.decrypt(encrypted_data)
+            except (ValueError, KeyError):
+                pass
+        return {}
+
+    def save(self):
+        data = self.read_file()
+        data[self.evm_address] = self.encrypt(self.data)
+
+        with open(RHINO_SESSIONS_FILE_PATH, 'w') as file:
+            json.dump(data, file, indent=4)
+
+    def get_auth(self) -> tuple[str, str] | None:
+        auth = self.data.get('auth')
+        if auth and time.time() - auth['created_at'] < RHINO_AUTH_TTL:
+            return auth['nonce'], auth['signature']
+
+    def set_auth(self, nonce: str, signature: str) -> tuple[str, str]:
+        self.data['auth'] = {'nonce': nonce, 'signature': signature, 'created_at': time.time()}
+        self.save()
+        return nonce, signature
+
+    def get_user_config(self) -> dict | None:
+        user_config = self.data.get('user_config')
+        if user_config and time.time() - user_config['updated_at'] < RHINO_CONFIG_TTL:
+            return user_config['data']
+
+    def set_user_config(self, user_config: dict):
+        if user_config.get('isRegistered'):
+            self.data['user_config'] = {'data': user_config, 'updated_at': time.time()}
+            self.save()
+
+    def get(self, key: str):
+        return self.data.get(key)
+
+    def set(self, key: str, value):
+        self.data[key] = value
+        self.save()
+        return value
+
+    def get_receiver_vault(self, deversifi_address: str) -> dict | None:
+        return self.data.get('receiver_vaults', {}).get(deversifi_address.lower())
+
+    def set_receiver_vault(self, deversifi_address: str, vault_data: dict) -> dict:
+        self.data.setdefault('receiver_vaults', {})[deversifi_address.lower()] = vault_data
+        self.save()
+        return vault_data
@@ -0,0 +1,88 @@
+import asyncio
+import multiprocessing
+
+from concurrent.futures import ProcessPoolExecutor
+
+# Очередь сообщений координатору. В процессе-шарде задается в init_shard
+SHARD_QUEUE = None
+SHARED_ACCOUNT_LISTS = ('ACCOUNT_NAMES', 'PRIVATE_KEYS_EVM', 'PRIVATE_KEYS', 'PROXIES', 'CEX_WALLETS')
+
+
+class ShardNotifier:
+    """Заменяет TelegramNotifier в шарде: отчеты уходят координатору, который отправляет их своим уведомителем"""
+
+    def __init__(self, shard_index: int, queue):
+        self.shard_index = shard_index
+        self.queue = queue
+
+    def notify(self, account_name, message_to_send: list[str], urgent: bool = False):
+        self.queue.put(('telegram', account_name, message_to_send, urgent))
+
+    def flush(self):
+        self.queue.put(('stream_done', self.shard_index))
+
+    async def stop(self):
+        pass
+
+
+def split_wallets(wallets: list, workers: int) -> list[list]:
+    # Кошельки раздаются по кругу, чтобы первые потоки всех шардов шли с начала списка
+    return [shard for shard in (wallets[index::workers] for index in range(workers)) if shard]
+
+
+async def save_stark_data_to_queue(account_name, address, wallet_type):
+    SHARD_QUEUE.put(('stark_data', account_name, address, wallet_type))
+
+
+def init_shard(accounts_data: dict, queue, workers: int):
+    # config.py не читает таблицу вне MainProcess, поэтому данные аккаунтов приходят от координатора.
+    # Списки дополняются на месте: модули держат ссылки на них через from config import ...
+    global SHARD_QUEUE
+    import config
+
+    for name in SHARED_ACCOUNT_LISTS:
+        getattr(config, name).extend(accounts_data[name])
+    config.ETH_PRICE = accounts_data['ETH_PRICE']
+    SHARD_QUEUE = queue
+
+    from modules import StarknetClient
+    from utils.crypto_executor import CRYPTO_EXECUTOR
+    from utils.rate_limiter import HostLimiter
+
+    # Адреса уже посчитаны координатором, stark_data.json пишет только он
+    StarknetClient.ADDRESS_CACHE.update(accounts_data['ADDRESS_CACHE'])
+    StarknetClient.save_stark_data_file = staticmethod(save_stark_data_to_queue)
+
+    # Процессы для подписей и лимиты запросов к хостам делятся между шардами
+    CRYPTO_EXECUTOR.max_workers = max(1, CRYPTO_EXECUTOR.max_workers // workers)
+    HostLimiter.RATE_SHARE = 1 / workers
+
+
+def run_shard(shard_index: int, wallets: list, smart_route: bool):
+    from utils.modules_runner import ShardRunner
+    from utils.crypto_executor import CRYPTO_EXECUTOR
+
+    try:
+        asyncio.run(ShardRunner(shard_index, wallets, SHARD_QUEUE).run_shard(smart_route))
+    finally:
+        CRYPTO_EXECUTOR.shutdown()
+        SHARD_QUEUE.put(('shard_done', shard_index))
+
+
+def get_accounts_data() -> dict:
+    import config
+    from modules import StarknetClient
+
+    accounts_data = {name: getattr(config, name) for name in SHARED_ACCOUNT_LISTS}
+    accounts_data['ETH_PRICE'] = config.ETH_PRICE
+    accounts_data['ADDRESS_CACHE'] = StarknetClient.ADDRESS_CACHE
+    return accounts_data
+
+
+def create_shard_executor(workers: int) -> tuple[ProcessPoolExecutor, multiprocessing.Queue]:
+    # spawn, а не fork: копия процесса с работающим event loop и открытыми сессиями ненадежна
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_shard,
+                                   initargs=(get_accounts_data(), queue, workers))
+    return executor, queue
@@ -0,0 +1,105 @@
+import json
+import time
+import asyncio
+
+# Классы запросов для объединения одинаковых одновременных запросов в один сетевой вызов.
+# enabled - объединять ли запросы этого класса, ttl - сколько секунд готовый ответ отдается повторным запросам
+# (0 - объединяются только запросы, которые выполняются в этот момент)
+SINGLEFLIGHT_CLASSES = {
+    'gas_price': {
+        'enabled': True,
+        'ttl': 2,
+    },
+    'token_price': {
+        'enabled': True,
+        'ttl': 10,
+    },
+    'bridge_networks': {
+        'enabled': True,
+        'ttl': 60,
+    },
+    'contract_abi': {
+        'enabled': True,
+        'ttl': 3600,
+    },
+    'cex_currencies': {
+        'enabled': True,
+        'ttl': 0,
+    },
+    'avnu_quote': {
+        'enabled': True,
+        'ttl': 10,
+    },
+}
+
+
+class SingleFlight:
+    GROUPS: dict[str, 'SingleFlight'] = {}
+
+    def __init__(self, name: str):
+        settings = SINGLEFLIGHT_CLASSES.get(name, {})
+        self.name = name
+        self.enabled = settings.get('enabled', True)
+        self.ttl = settings.get('ttl', 0)
+        self.calls: dict[str, tuple[asyncio.Task, list]] = {}
+        self.results: dict[str, tuple[object, float]] = {}
+        self.loop = None
+
+    @classmethod
+    def get_group(cls, name: str) -> 'SingleFlight':
+        if name not in cls.GROUPS:
+            cls.GROUPS[name] = cls(name)
+        return cls.GROUPS[name]
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        return json.dumps(parts, sort_keys=True, default=str)
+
+    async def run(self, key: str, fetchers: list):
+        # fetchers - запросы аккаунтов, которые ждут ответа. Запрос идет через сессию первого из них
+        try:
+            while True:
+                fetcher = fetchers[0]
+                try:
+                    result = await fetcher()
+                except Exception:
+                    # Аккаунт ушел и закрыл свою сессию - запрос повторяется через сессию одного из оставшихся
+                    if fetcher in fetchers or not fetchers:
+                        raise
+                    continue
+
+                if self.ttl:
+                    self.results[key] = result, time.time()
+                return result
+        finally:
+            self.calls.pop(key, None)
+
+    async def do(self, key: str, fetcher):
+        if not self.enabled:
+            return await fetcher()
+
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop, self.calls = loop, {}
+
+        if key in self.results:
+            result, updated_at = self.results[key]
+            if time.time() - updated_at < self.ttl:
+                return result
+            del self.results[key]
+
+        if key not in self.calls:
+            fetchers = []
+            self.calls[key] = loop.create_task(self.run(key, fetchers)), fetchers
+
+        task, fetchers = self.calls[key]
+        fetchers.append(fetcher)
+        try:
+            return await asyncio.shield(task)
+        finally:
+            fetchers.remove(fetcher)
+
+
+async def coalesce(name: str, key_parts: tuple, fetcher):
+    group = SingleFlight.get_group(name)
+    return await group.do(group.make_key(*key_parts), fetcher)
@@ -0,0 +1,352 @@
+import json
+import time
+import uuid
+import random
+import asyncio
+
+from urllib.parse import urlparse
+from aiohttp import web
+from starknet_py.cairo.felt import encode_shortstring
+from starknet_py.hash.selector import get_selector_from_name
+from starknet_py.net.models.chains import StarknetChainId
+
+STAND_IN_HOST = '127.0.0.1'
+# По этому заголовку сервер узнает, с какой дорожки трейса (аккаунта) пришел запрос
+STAND_IN_TRACK_HEADER = 'X-Stand-In-Track'
+# Внешние API, которые подменяются заглушками: хост -> префикс пути на локальном сервере
+STAND_IN_API_HOSTS = {
+    'api.coingecko.com': '/coingecko',
+    'alpha-mainnet.starknet.io': '/feeder',
+    'starknet.api.avnu.fi': '/avnu',
+    'api.layerswap.io': '/layerswap',
+}
+STAND_IN_BALANCE = 10 ** 18
+STAND_IN_RESERVE = 10 ** 30
+STAND_IN_CLASS_HASH = 0x1a736d6ed154502257f02b1ccdf4d9d1089f80811cd6acad48e6b6a9d1f2003
+STAND_IN_PAIR_ADDRESS = 0x4d0390b777b424e43839cd1e744799f3de6c176c7e32c1812a41dbd9c19db6a
+STAND_IN_FACTORY_ADDRESS = 0xdad44c139a476c7a17fc8141e6db680e9abc9f56fe249a105094c44382c2fd
+STAND_IN_SIERRA_CLASS = {
+    'sierra_program': ['0x1'],
+    'contract_class_version': '0.1.0',
+    'entry_points_by_type': {'CONSTRUCTOR': [], 'EXTERNAL': [], 'L1_HANDLER': []},
+    'abi': '[]'
+}
+EVM_SELECTOR_DECIMALS = '0x313ce567'
+EVM_SELECTOR_ALLOWANCE = '0xdd62ed3e'
+
+
+def to_hex_list(values: list[int]) -> list[str]:
+    return [hex(value) for value in values]
+
+
+class StandInServer:
+    """
+    Локальная замена Starknet/EVM JSON-RPC и внешних API для офлайн-прогонов Runner.
+    latency - (минимум, максимум) задержки ответа в секундах, error_rate - доля запросов с внедренной ошибкой,
+    error_kinds - виды ошибок: 'rpc' (ошибка JSON-RPC), 'http_503', 'http_429'
+    """
+
+    def __init__(self, latency: tuple = (0.05, 0.15), error_rate: float = 0, error_kinds: tuple = ('rpc', 'http_503'),
+                 port: int = 0, block_time: float = 6, eth_price: float = 2500, gas_price_gwei: float = 10,
+                 layerswap_networks: list = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_kinds = error_kinds
+        self.port = port
+        self.block_time = block_time
+        self.eth_price = eth_price
+        self.gas_price_gwei = gas_price_gwei
+        self.layerswap_networks = layerswap_networks or ['STARKNET_MAINNET', 'ARBITRUM_MAINNET']
+        self.started_at = time.time()
+        self.runner: web.AppRunner | None = None
+        self.calls: list[tuple[str | None, float, str]] = []
+        self.errors: dict[str, int] = {}
+
+        self.call_results = {get_selector_from_name(name): handler for name, handler in {
+            'balanceOf': lambda calldata: [STAND_IN_BALANCE, 0],
+            'balance_of': lambda calldata: [STAND_IN_BALANCE, 0],
+            'allowance': lambda calldata: [2 ** 128 - 1, 2 ** 128 - 1],
+            'decimals': lambda calldata: [18],
+            'symbol': lambda calldata: [encode_shortstring('TOKEN')],
+            'factory': lambda calldata: [STAND_IN_FACTORY_ADDRESS],
+            'get_pair': lambda calldata: [STAND_IN_PAIR_ADDRESS],
+            'getPair': lambda calldata: [STAND_IN_PAIR_ADDRESS],
+            'get_reserves': lambda calldata: [STAND_IN_RESERVE, 0, STAND_IN_RESERVE, 0, int(time.time())],
+            'getReserves': lambda calldata: [STAND_IN_RESERVE, STAND_IN_RESERVE, int(time.time())],
+            'get_pool': lambda calldata: [0, 0, STAND_IN_RESERVE, 0, 0, STAND_IN_RESERVE, 0, 3],
+            'get_amounts_out': lambda calldata: [2, calldata[0], 0, calldata[0] * 997 // 1000, 0],
+        }.items()}
+
+    @property
+    def url(self) -> str:
+        return f'http://{STAND_IN_HOST}:{self.port}'
+
+    @property
+    def block_number(self) -> int:
+        return int((time.time() - self.started_at) / self.block_time) + 1
+
+    def get_rpc_url(self, network) -> str:
+        if network.name == 'Starknet':
+            return f'{self.url}/starknet'
+        return f'{self.url}/evm/{network.chain_id}'
+
+    def get_local_url(self, url: str) -> str | None:
+        parsed_url = urlparse(url)
+        if parsed_url.hostname in STAND_IN_API_HOSTS:
+            query = f'?{parsed_url.query}' if parsed_url.query else ''
+            return f'{self.url}{STAND_IN_API_HOSTS[parsed_url.hostname]}{parsed_url.path}{query}'
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post('/starknet', self.handle_starknet)
+        app.router.add_post('/evm/{chain_id}', self.handle_evm)
+        app.router.add_get('/coingecko/api/v3/simple/price', self.handle_coingecko)
+        app.router.add_get('/feeder/feeder_gateway/get_block', self.handle_feeder_block)
+        app.router.add_get('/avnu/swap/v1/quotes', self.handle_avnu_quotes)
+        app.router.add_post('/avnu/swap/v1/build', self.handle_avnu_build)
+        app.router.add_get('/layerswap/api/available_networks', self.handle_layerswap_networks)
+        app.router.add_post('/layerswap/api/swap_rate', self.handle_layerswap_rate)
+        app.router.add_post('/layerswap/api/swaps', self.handle_layerswap_swap)
+        app.router.add_get('/layerswap/api/swaps/{swap_id}', self.handle_layerswap_status)
+        app.router.add_get('/layerswap/api/swaps/{swap_id}/prepare_src_transaction', self.handle_layerswap_tx)
+
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, STAND_IN_HOST, self.port)
+        await site.start()
+        self.port = self.runner.addresses[0][1]
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+    def record(self, request: web.Request, names: list[str]):
+        track = request.headers.get(STAND_IN_TRACK_HEADER)
+        moment = time.perf_counter()
+        self.calls.extend((track, moment, name) for name in names)
+
+    def get_injected_error(self) -> str | None:
+        if self.error_rate and random.random() < self.error_rate:
+            error_kind = random.choice(self.error_kinds)
+            self.errors[error_kind] = self.errors.get(error_kind, 0) + 1
+            return error_kind
+
+    async def delay(self):
+        await asyncio.sleep(random.uniform(*self.latency))
+
+    async def handle_api(self, request: web.Request, name: str, result: dict | list) -> web.Response:
+        self.record(request, [name])
+        await self.delay()
+
+        error_kind = self.get_injected_error()
+        if error_kind == 'http_429':
+            return web.json_response({'error': 'Too Many Requests'}, status=429, headers={'Retry-After': '1'})
+        elif error_kind:
+            return web.json_response({'error': 'Service Unavailable'}, status=503)
+        return web.json_response(result)
+
+    async def handle_json_rpc(self, request: web.Request, handler) -> web.Response:
+        payload = json.loads(await request.read())
+        items = payload if isinstance(payload, list) else [payload]
+
+        self.record(request, [item.get('method', '') for item in items])
+        await self.delay()
+
+        error_kind = self.get_injected_error()
+        if error_kind == 'http_429':
+            return web.json_response({'error': 'Too Many Requests'}, status=429, headers={'Retry-After': '1'})
+        elif error_kind == 'http_503':
+            return web.json_response({'error': 'Service Unavailable'}, status=503)
+
+        responses = []
+        for item in items:
+            response = {'jsonrpc': '2.0', 'id': item.get('id')}
+            if error_kind == 'rpc':
+                response['error'] = {'code': -32603, 'message': 'Internal error (injected by stand-in server)'}
+            else:
+                try:
+                    response['result'] = handler(item['method'], item.get('params') or {})
+                except KeyError:
+                    response['error'] = {'code': -32601, 'message': f'Method not found: {item["method"]}'}
+            responses.append(response)
+
+        return web.json_response(responses if isinstance(payload, list) else responses[0])
+
+    async def handle_starknet(self, request: web.Request) -> web.Response:
+        return await self.handle_json_rpc(request, self.get_starknet_result)
+
+    async def handle_evm(self, request: web.Request) -> web.Response:
+        chain_id = int(request.match_info['chain_id'])
+        return await self.handle_json_rpc(request, lambda method, params: self.get_evm_result(chain_id, method, params))
+
+    def get_starknet_result(self, method: str, params: dict | list):
+        if method == 'starknet_call':
+            call = params['request'] if isinstance(params, dict) else params[0]
+            calldata = [int(value, 16) for value in call['calldata']]
+            handler = self.call_results.get(int(call['entry_point_selector'], 16), lambda _: [0])
+            return to_hex_list(handler(calldata))
+
+        elif method == 'starknet_estimateFee':
+            transactions = params['request'] if isinstance(params, dict) else params[0]
+            return [{
+                'overall_fee': hex(10 ** 13),
+                'gas_price': hex(10 ** 10),
+                'gas_consumed': hex(1000),
+                'unit': 'WEI'
+            } for _ in transactions]
+
+        elif method in ('starknet_addInvokeTransaction', 'starknet_addDeployAccountTransaction'):
+            return {'transaction_hash': hex(random.getrandbits(250)), 'contract_address': hex(random.getrandbits(250))}
+
+        elif method == 'starknet_getTransactionStatus':
+            return {'finality_status': 'ACCEPTED_ON_L2', 'execution_status': 'SUCCEEDED'}
+
+        elif method == 'starknet_getTransactionReceipt':
+            transaction_hash = params['transaction_hash'] if isinstance(params, dict) else params[0]
+            return {
+                'transaction_hash': transaction_hash,
+                'execution_status': 'SUCCEEDED',
+                'finality_status': 'ACCEPTED_ON_L2',
+                'block_number': self.block_number,
+                'block_hash': hex(self.block_number),
+                'actual_fee': {'amount': hex(10 ** 13), 'unit': 'WEI'},
+                'type': 'INVOKE',
+                'events': [],
+                'messages_sent': [],
+                'execution_resources': {'steps': 1000}
+            }
+
+        return {
+            'starknet_getClassHashAt': lambda: hex(STAND_IN_CLASS_HASH),
+            'starknet_getClassAt': lambda: STAND_IN_SIERRA_CLASS,
+            'starknet_getNonce': lambda: hex(0),
+            'starknet_blockNumber': lambda: self.block_number,
+            'starknet_chainId': lambda: hex(StarknetChainId.MAINNET),
+        }[method]()
+
+    def get_evm_result(self, chain_id: int, method: str, params: list):
+        block_number = self.block_number
+
+        if method == 'eth_call':
+            data = params[0].get('data') or params[0].get('input') or '0x'
+            if data.startswith(EVM_SELECTOR_DECIMALS):
+                return f'0x{18:064x}'
+            elif data.startswith(EVM_SELECTOR_ALLOWANCE):
+                return f'0x{2 ** 256 - 1:064x}'
+            return f'0x{STAND_IN_BALANCE:064x}'
+
+        elif method == 'eth_feeHistory':
+            block_count = int(params[0], 16) if isinstance(params[0], str) else params[0]
+            return {
+                'oldestBlock': hex(max(block_number - block_count, 0)),
+                'baseFeePerGas': [hex(10 ** 9)] * (block_count + 1),
+                'gasUsedRatio': [0.5] * block_count,
+                'reward': [[hex(10 ** 8)] for _ in range(block_count)]
+            }
+
+        elif method == 'eth_getBlockByNumber':
+            return {
+                'number': hex(block_number),
+                'hash': f'0x{block_number:064x}',
+                'parentHash': f'0x{block_number - 1:064x}',
+                'timestamp': hex(int(time.time())),
+                'baseFeePerGas': hex(10 ** 9),
+                'gasLimit': hex(30_000_000),
+                'gasUsed': hex(15_000_000),
+                'transactions': []
+            }
+
+        elif method == 'eth_sendRawTransaction':
+            return f'0x{random.getrandbits(256):064x}'
+
+        elif method == 'eth_getTransactionReceipt':
+            return {
+                'transactionHash': params[0],
+                'transactionIndex': '0x0',
+                'blockNumber': hex(block_number),
+                'blockHash': f'0x{block_number:064x}',
+                'from': f'0x{0:040x}',
+                'to': f'0x{0:040x}',
+                'cumulativeGasUsed': hex(150_000),
+                'gasUsed': hex(150_000),
+                'effectiveGasPrice': hex(10 ** 9),
+                'contractAddress': None,
+                'logs': [],
+                'logsBloom': f'0x{0:0512x}',
+                'status': '0x1',
+                'type': '0x2'
+            }
+
+        return {
+            'eth_chainId': lambda: hex(chain_id),
+            'net_version': lambda: str(chain_id),
+            'web3_clientVersion': lambda: 'stand-in/1.0',
+            'eth_blockNumber': lambda: hex(block_number),
+            'eth_getBalance': lambda: hex(STAND_IN_BALANCE),
+            'eth_getTransactionCount': lambda: hex(0),
+            'eth_estimateGas': lambda: hex(150_000),
+            'eth_gasPrice': lambda: hex(10 ** 9),
+            'eth_maxPriorityFeePerGas': lambda: hex(10 ** 8),
+            'eth_getCode': lambda: '0x',
+        }[method]()
+
+    async def handle_coingecko(self, request: web.Request) -> web.Response:
+        token_names = request.query.get('ids', '').split(',')
+        vs_currency = request.query.get('vs_currencies', 'usd')
+
+        prices_usd = {token_name: self.eth_price if token_name == 'ethereum' else 1.0 for token_name in token_names}
+        if vs_currency == 'eth':
+            prices = {token_name: price / self.eth_price for token_name, price in prices_usd.items()}
+        else:
+            prices = prices_usd
+
+        return await self.handle_api(request, 'coingecko_price', {
+            token_name: {vs_currency: price} for token_name, price in prices.items()
+        })
+
+    async def handle_feeder_block(self, request: web.Request) -> web.Response:
+        return await self.handle_api(request, 'feeder_get_block', {
+            'block_number': self.block_number,
+            'strk_l1_gas_price': hex(int(self.gas_price_gwei * 10 ** 12))
+        })
+
+    async def handle_avnu_quotes(self, request: web.Request) -> web.Response:
+        return await self.handle_api(request, 'avnu_quotes', [{
+            'quoteId': str(uuid.uuid4()),
+            'sellTokenAddress': request.query.get('sellTokenAddress'),
+            'buyTokenAddress': request.query.get('buyTokenAddress'),
+            'sellAmount': request.query.get('sellAmount'),
+        }])
+
+    async def handle_avnu_build(self, request: web.Request) -> web.Response:
+        return await self.handle_api(request, 'avnu_build', {
+            'chainId': hex(StarknetChainId.MAINNET),
+            'entrypoint': 'multi_route_swap',
+            'calldata': to_hex_list([1, 2, 3])
+        })
+
+    async def handle_layerswap_networks(self, request: web.Request) -> web.Response:
+        return await self.handle_api(request, 'layerswap_networks', {'data': [
+            {'name': network_name, 'currencies': [{'asset': 'ETH', 'decimals': 18}]}
+            for network_name in self.layerswap_networks
+        ]})
+
+    async def handle_layerswap_rate(self, request: web.Request) -> web.Response:
+        return await self.handle_api(request, 'layerswap_rate', {
+            'data': {'min_amount': 0.001, 'max_amount': 10, 'fee_amount': 0.0005}
+        })
+
+    async def handle_layerswap_swap(self, request: web.Request) -> web.Response:
+        return await self.handle_api(request, 'layerswap_swap', {'data': {'swap_id': str(uuid.uuid4())}})
+
+    async def handle_layerswap_status(self, request: web.Request) -> web.Response:
+        return await self.handle_api(request, 'layerswap_status', {
+            'data': {'id': request.match_info['swap_id'], 'status': 'completed'}
+        })
+
+    async def handle_layerswap_tx(self, request: web.Request) -> web.Response:
+        return await self.handle_api(request, 'layerswap_prepare_tx', {'data': {
+            'to_address': hex(STAND_IN_PAIR_ADDRESS),
+            'data': json.dumps([{}, {'contractAddress': hex(STAND_IN_PAIR_ADDRESS), 'calldata': ['0x1']}])
+        }})
@@ -0,0 +1,111 @@
+import time
+import asyncio
+
+# Результаты этих вызовов не меняются, поэтому кэшируются для всей сети без привязки к блоку
+STATE_CACHE_CONSTANT_SELECTORS = ('decimals', 'symbol', 'name')
+# Как часто (сек) проверять номер последнего блока. Пока блок не сменился, состояние аккаунта берется из кэша
+STATE_CACHE_BLOCK_CHECK = 3
+
+
+class AccountStateCache:
+    CACHES: dict[tuple, 'AccountStateCache'] = {}
+    CONSTANTS: dict[tuple, object] = {}
+
+    def __init__(self, network_name: str, address: str | int | None):
+        self.network_name = network_name
+        self.address = address
+        self.block_number = None
+        self.node_block = None
+        self.checked_at = 0.0
+        self.data: dict[tuple, object] = {}
+        self.nonce = None
+        self.loop = None
+        self.task: asyncio.Task | None = None
+
+    @classmethod
+    def get_cache(cls, network_name: str, address: str | int | None) -> 'AccountStateCache':
+        if address is None:
+            return cls(network_name, address)
+
+        key = (network_name, address)
+        if key not in cls.CACHES:
+            cls.CACHES[key] = cls(network_name, address)
+        return cls.CACHES[key]
+
+    def prepare(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop, self.task = loop, None
+
+    def set_block(self, block_number: int):
+        if self.block_number is None or block_number > self.block_number:
+            self.block_number, self.data, self.nonce = block_number, {}, None
+
+    async def update(self, block_fetcher):
+        try:
+            self.node_block = await block_fetcher()
+            self.set_block(self.node_block)
+            self.checked_at = time.time()
+        finally:
+            self.task = None
+
+    async def refresh(self, block_fetcher):
+        self.prepare()
+
+        if time.time() - self.checked_at > STATE_CACHE_BLOCK_CHECK:
+            if self.task is None:
+                self.task = self.loop.create_task(self.update(block_fetcher))
+            await asyncio.shield(self.task)
+
+    def is_synced(self, block_number: int | None) -> bool:
+        # Ответ кэшируется, только если нода уже дошла до блока кэша. Иначе нода, отстающая от квитанции
+        # (например, после change_rpc), вернет состояние до транзакции, и оно попадет в кэш как новое
+        return (block_number is not None and self.block_number == block_number
+                and self.node_block is not None and self.node_block >= block_number)
+
+    async def call(self, contract_address: str | int | None, selector_name: str, calldata: list | tuple,
+                   fetcher, block_fetcher):
+        key = (contract_address, selector_name, tuple(calldata or ()))
+
+        if selector_name in STATE_CACHE_CONSTANT_SELECTORS:
+            constant_key = (self.network_name, *key)
+            if constant_key not in self.CONSTANTS:
+                self.CONSTANTS[constant_key] = await fetcher()
+            return self.CONSTANTS[constant_key]
+
+        await self.refresh(block_fetcher)
+
+        if key in self.data:
+            return self.data[key]
+
+        block_number = self.block_number
+        result = await fetcher()
+        if self.is_synced(block_number):
+            self.data[key] = result
+        return result
+
+    async def get_nonce(self, fetcher, block_fetcher) -> int:
+        await self.refresh(block_fetcher)
+
+        if self.nonce is not None:
+            return self.nonce
+
+        block_number = self.block_number
+        nonce = await fetcher()
+        if self.is_synced(block_number):
+            self.nonce = nonce
+        return nonce
+
+    def on_transaction(self, block_number: int | None):
+        # Транзакция аккаунта попала в блок: балансы и апрувы перечитываются, а nonce сразу увеличивается на 1.
+        # Номер блока ноды проверяется при следующем чтении, до этого ответы не кэшируются
+        nonce = self.nonce + 1 if self.nonce is not None else None
+
+        self.invalidate()
+        if block_number is not None:
+            self.set_block(block_number)
+            self.checked_at = 0.0
+            self.nonce = nonce
+
+    def invalidate(self):
+        self.data, self.nonce = {}, None
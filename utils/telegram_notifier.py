@@ -0,0 +1,153 @@
+import re
+import time
+import asyncio
+
+from aiohttp import ClientSession, ClientError, ClientTimeout
+from modules import Logger
+from utils.metrics import QUEUE_DEPTH
+from general_settings import TG_TOKEN, TG_ID, TELEGRAM_DIGEST_INTERVAL, TELEGRAM_DIGEST_SIZE
+
+TG_API_URL = 'https://api.telegram.org/bot{token}/sendMessage'
+TG_MESSAGE_LIMIT = 4096      # Максимальная длина сообщения Telegram
+TG_MESSAGE_INTERVAL = 1.1    # Пауза между сообщениями в один чат (Telegram допускает около 1 сообщения в секунду)
+TG_SEND_RETRIES = 5          # Сколько раз повторять отправку при 429, 5xx и ошибках сети
+TG_STOP_TIMEOUT = 60         # Сколько секунд при завершении ждать отправки оставшихся сообщений
+TG_URGENT, TG_DIGEST = 0, 1  # Приоритеты очереди: сообщения с ошибками уходят раньше сводок
+
+
+def format_message(message_to_send: list[str]) -> str:
+    return '*' + '\n'.join([re.sub(r'([_*\[\]()~`>#+\-=|{}.!])', r'\\\1', message)
+                            for message in message_to_send]) + '*'
+
+
+class TelegramNotifier(Logger):
+    """
+    Отправляет отчеты аккаунтов в Telegram из фоновой задачи, не блокируя маршруты. Отчеты с ошибками уходят
+    сразу и со звуком, успешные собираются в сводку, которая отправляется по окончании потока, по таймеру
+    TELEGRAM_DIGEST_INTERVAL или при накоплении TELEGRAM_DIGEST_SIZE аккаунтов.
+    """
+
+    def __init__(self):
+        Logger.__init__(self)
+        self.session: ClientSession | None = None
+        self.queue: asyncio.PriorityQueue | None = None
+        self.worker: asyncio.Task | None = None
+        self.digest: list[str] = []
+        self.digest_started_at = 0.0
+        self.next_at = 0.0
+        self.counter = 0
+
+    def start(self):
+        if self.worker:
+            return
+
+        self.session = ClientSession(timeout=ClientTimeout(total=30))
+        self.queue = asyncio.PriorityQueue()
+        self.worker = asyncio.create_task(self.run_worker())
+
+    async def stop(self):
+        if not self.worker:
+            return
+
+        self.flush()
+        try:
+            await asyncio.wait_for(self.queue.join(), TG_STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.logger_msg(None, None, f"Telegram | {self.queue.qsize()} messages were not sent in time", 'error')
+
+        self.worker.cancel()
+        await asyncio.gather(self.worker, return_exceptions=True)
+        await self.session.close()
+        self.session, self.queue, self.worker = None, None, None
+
+    def put(self, priority: int, text: str, disable_notification: bool, account_name=None):
+        self.counter += 1
+        self.queue.put_nowait((priority, self.counter, text, disable_notification, account_name))
+        QUEUE_DEPTH.set(self.queue.qsize(), queue='telegram')
+
+    def notify(self, account_name, message_to_send: list[str], urgent: bool = False):
+        if not self.worker:
+            return
+
+        text = format_message(message_to_send)
+        if urgent:
+            self.put(TG_URGENT, text, False, account_name)
+            return
+
+        if not self.digest:
+            self.digest_started_at = time.monotonic()
+        self.digest.append(text)
+        if len(self.digest) >= TELEGRAM_DIGEST_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.worker or not self.digest:
+            return
+
+        # Отчеты аккаунтов не разрываются между сообщениями
+        chunk = ''
+        for text in self.digest:
+            if chunk and len(chunk) + len(text) + 2 > TG_MESSAGE_LIMIT:
+                self.put(TG_DIGEST, chunk, True)
+                chunk = ''
+            chunk = f'{chunk}\n\n{text}' if chunk else text
+        self.put(TG_DIGEST, chunk, True)
+        self.digest = []
+
+    async def run_worker(self):
+        while True:
+            timeout = 1
+            if self.digest:
+                timeout = self.digest_started_at + TELEGRAM_DIGEST_INTERVAL - time.monotonic()
+                if timeout <= 0:
+                    self.flush()
+                    continue
+
+            try:
+                _, _, text, disable_notification, account_name = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                continue
+
+            try:
+                await self.send(text, disable_notification, account_name)
+            except Exception as error:
+                self.logger_msg(account_name, None, f"Telegram | API Error: {error}", 'error')
+            finally:
+                self.queue.task_done()
+                QUEUE_DEPTH.set(self.queue.qsize(), queue='telegram')
+
+    async def send(self, text: str, disable_notification: bool, account_name=None):
+        url = TG_API_URL.format(token=TG_TOKEN)
+        payload = {
+            'chat_id': TG_ID,
+            'text': text,
+            'parse_mode': 'MarkdownV2',
+            'disable_notification': disable_notification,
+        }
+
+        error = None
+        for attempt in range(TG_SEND_RETRIES):
+            delay = self.next_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.next_at = time.monotonic() + TG_MESSAGE_INTERVAL
+
+            try:
+                async with self.session.post(url, json=payload) as response:
+                    data = await response.json(content_type=None)
+            except (ClientError, asyncio.TimeoutError, ValueError) as err:
+                error = err
+                await asyncio.sleep(2 ** attempt)
+                continue
+
+            if data.get('ok'):
+                self.logger_msg(account_name, None, f"Telegram message sent", 'success')
+                return
+
+            error = data.get('description')
+            if response.status == 429:
+                self.next_at = time.monotonic() + data.get('parameters', {}).get('retry_after', TG_MESSAGE_INTERVAL)
+            elif response.status < 500:
+                break
+
+        self.logger_msg(account_name, None, f"Telegram | API Error: {error}", 'error')
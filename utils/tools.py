@@ -2,6 +2,7 @@ import io
 import os
 import sys
 import json
+import time
 import random
 import asyncio
 import functools
@@ -13,14 +14,19 @@ from getpass import getpass
 from termcolor import cprint
 from datetime import datetime, timedelta
 from web3.exceptions import TimeExhausted, ContractLogicError
-from aiohttp import ClientSession, TCPConnector
+from aiohttp import ClientSession, TCPConnector, ClientError
+from starknet_py.net.client_errors import ClientError as StarknetClientError
 from msoffcrypto.exceptions import DecryptionError, InvalidKeyError
+from utils.metrics import SLEEP_SECONDS, HELPER_ERRORS, HELPER_RETRIES, GAS_WAIT
+from utils.tracing import TRACER
+from utils.retry_policy import get_retry_rule, get_max_retries, get_retry_delay
+from utils.job_queue import check_job_lease
 
 from general_settings import (
     SLEEP_TIME,
     GLOBAL_NETWORK,
-    SLEEP_TIME_RETRY,
     MAXIMUM_RETRY,
+    MODULE_TIME_BUDGET,
     MAXIMUM_GWEI,
     GAS_CONTROL,
     SLEEP_TIME_GAS,
@@ -32,11 +38,13 @@ from general_settings import (
 )
 
 
-async def sleep(self, min_time=SLEEP_TIME[0], max_time=SLEEP_TIME[1]):
-    duration = random.randint(min_time, max_time)
+async def sleep(self, min_time=SLEEP_TIME[0], max_time=SLEEP_TIME[1], reason: str = 'module'):
+    duration = min_time if min_time == max_time else random.randint(min_time, max_time)
     print()
     self.logger_msg(*self.client.acc_info, msg=f"💤 Sleeping for {duration} seconds")
-    await asyncio.sleep(duration)
+    SLEEP_SECONDS.inc(duration, reason=reason)
+    with TRACER.span('sleep', reason=reason):
+        await asyncio.sleep(duration)
 
 
 def get_accounts_data():
@@ -189,56 +197,62 @@ def helper(func):
         )
 
         attempts = 0
-        error = None
-        stop_flag = False
+        started_at = time.monotonic()
         try:
             while attempts <= MAXIMUM_RETRY:
+                check_job_lease()
                 try:
-                    return await func(self, *args, **kwargs)
+                    with TRACER.span(f'{self.__class__.__name__}.{func.__name__}', 'helper', attempt=attempts + 1):
+                        return await func(self, *args, **kwargs)
                 except (PriceImpactException, BlockchainException, SoftwareException, SoftwareExceptionWithoutRetry,
                         BlockchainExceptionWithoutRetry, asyncio.exceptions.TimeoutError, TimeExhausted, ValueError,
-                        ContractLogicError) as err:
-                    error = err
+                        ContractLogicError, ClientError, StarknetClientError) as error:
                     attempts += 1
+                    HELPER_ERRORS.inc(module=self.__class__.__name__, error=error.__class__.__name__)
 
-                    msg = f'{error} | Try[{attempts}/{MAXIMUM_RETRY + 1}]'
-                    if isinstance(error, asyncio.exceptions.TimeoutError):
-                        error = 'Connection to RPC is not stable'
-                        await self.client.change_rpc()
-                        msg = f'{error} | Try[{attempts}/{MAXIMUM_RETRY + 1}]'
+                    rule_name = get_retry_rule(error)
+                    max_retries = get_max_retries(rule_name)
+                    msg = f'{error} | Try[{attempts}/{max_retries + 1}]'
+
+                    if rule_name == 'insufficient_funds':
+                        network_name = self.client.network.name
+                        msg = f'Insufficient funds on {network_name}, software will stop this action\n'
 
-                    elif isinstance(error, SoftwareExceptionWithoutRetry):
-                        stop_flag = True
+                    elif rule_name in ('without_retry', 'circuit_open'):
                         msg = f'{error}'
 
-                    elif isinstance(error, (BlockchainException, BlockchainExceptionWithoutRetry)):
+                    elif rule_name == 'nonce':
+                        self.client.state_cache.invalidate()
 
-                        if any([i in str(error) for i in ['insufficient funds', 'gas required']]):
-                            stop_flag = True
-                            network_name = self.client.network.name
-                            msg = f'Insufficient funds on {network_name}, software will stop this action\n'
-                        else:
-                            if isinstance(error, BlockchainExceptionWithoutRetry):
-                                stop_flag = True
-                                msg = f'{error}'
+                    elif rule_name == 'transient':
+                        if isinstance(error, asyncio.exceptions.TimeoutError):
+                            msg = f'Connection to RPC is not stable | Try[{attempts}/{max_retries + 1}]'
 
-                            self.logger_msg(
-                                self.client.account_name,
-                                None, msg=f'Maybe problem with node: {self.client.rpc}', type_msg='warning')
-                            await self.client.change_rpc()
+                        self.logger_msg(
+                            self.client.account_name,
+                            None, msg=f'Maybe problem with node: {self.client.rpc}', type_msg='warning')
+                        await self.client.change_rpc()
 
                     self.logger_msg(self.client.account_name, None, msg=msg, type_msg='error')
 
-                    if stop_flag:
+                    if attempts > max_retries:
+                        if max_retries:
+                            self.logger_msg(self.client.account_name,
+                                            None, msg=f"Tries are over, software will stop module\n", type_msg='error')
+                        break
+
+                    delay = get_retry_delay(rule_name, attempts, error)
+                    if MODULE_TIME_BUDGET and time.monotonic() - started_at + delay > MODULE_TIME_BUDGET:
+                        self.logger_msg(
+                            self.client.account_name, None, type_msg='error',
+                            msg=f"Module time budget ({MODULE_TIME_BUDGET}s) is over, software will stop module\n")
                         break
 
-                    if attempts > MAXIMUM_RETRY:
-                        self.logger_msg(self.client.account_name,
-                                        None, msg=f"Tries are over, software will stop module\n", type_msg='error')
-                    else:
-                        await sleep(self, *SLEEP_TIME_RETRY)
+                    HELPER_RETRIES.inc(module=self.__class__.__name__)
+                    await sleep(self, delay, delay, reason='retry')
 
                 except Exception as error:
+                    HELPER_ERRORS.inc(module=self.__class__.__name__, error=error.__class__.__name__)
                     msg = f'Unknown Error. Description: {error}'
                     self.logger_msg(self.client.account_name, None, msg=msg, type_msg='error')
                     traceback.print_exc()
@@ -258,6 +272,7 @@ def gas_checker(func):
             flag = False
             counter = 0
             self.logger_msg(self.client.account_name, None, f"Checking for gas price")
+            started_at = time.perf_counter()
             while True:
                 gas = float(f"{(await self.client.get_gas_price()):.2f}")
                 if gas < get_max_gwei_setting():
@@ -268,7 +283,9 @@ def gas_checker(func):
                     if flag and counter == CONTROL_TIMES_FOR_SLEEP and SOFTWARE_MODE:
                         account_number = random.randint(1, ACCOUNTS_IN_STREAM)
                         sleep_duration = tuple(x * account_number for x in SLEEP_TIME_STREAM)
-                        await sleep(self, *sleep_duration)
+                        await sleep(self, *sleep_duration, reason='gas')
+                    GAS_WAIT.observe(time.perf_counter() - started_at, module=self.__class__.__name__)
+                    TRACER.add_span('gas_checker wait', started_at, gas=gas)
                     return await func(self, *args, **kwargs)
                 else:
                     flag = True
@@ -277,6 +294,7 @@ def gas_checker(func):
                     self.logger_msg(
                         self.client.account_name, None,
                         f"{gas} Gwei | Gas is too high. Next check in {SLEEP_TIME_GAS} second", type_msg='warning')
+                    SLEEP_SECONDS.inc(SLEEP_TIME_GAS, reason='gas')
                     await asyncio.sleep(SLEEP_TIME_GAS)
         return await func(self, *args, **kwargs)
     return wrapper
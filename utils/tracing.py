@@ -0,0 +1,85 @@
+import os
+import json
+import time
+import contextvars
+
+from contextlib import contextmanager
+from general_settings import TRACE_FILE
+
+TRACE_TRACK = contextvars.ContextVar('trace_track', default=None)
+TRACE_MAIN_TRACK = 'Attack machine'
+
+
+class Tracer:
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.enabled = bool(file_path)
+        self.pid = os.getpid()
+        self.started_at = time.perf_counter()
+        self.tracks: dict[str, int] = {}
+        self.events: list[dict] = []
+
+    def get_track_id(self, track_name: str) -> int:
+        if track_name not in self.tracks:
+            self.tracks[track_name] = len(self.tracks)
+            self.events.append({
+                'name': 'thread_name',
+                'ph': 'M',
+                'pid': self.pid,
+                'tid': self.tracks[track_name],
+                'args': {'name': track_name}
+            })
+        return self.tracks[track_name]
+
+    def get_timestamp(self, moment: float) -> float:
+        return round((moment - self.started_at) * 1_000_000, 1)
+
+    @staticmethod
+    def set_track(track_name) -> contextvars.Token:
+        # Все спаны текущей задачи (и задач, созданных из нее) попадают на дорожку аккаунта
+        return TRACE_TRACK.set(str(track_name))
+
+    @staticmethod
+    def reset_track(token: contextvars.Token):
+        TRACE_TRACK.reset(token)
+
+    def add_span(self, name: str, started_at: float, category: str = 'phase', **args):
+        if not self.enabled:
+            return
+
+        self.events.append({
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'pid': self.pid,
+            'tid': self.get_track_id(TRACE_TRACK.get() or TRACE_MAIN_TRACK),
+            'ts': self.get_timestamp(started_at),
+            'dur': self.get_timestamp(time.perf_counter()) - self.get_timestamp(started_at),
+            'args': {key: str(value) for key, value in args.items()}
+        })
+
+    @contextmanager
+    def span(self, name: str, category: str = 'phase', **args):
+        if not self.enabled:
+            yield
+            return
+
+        started_at = time.perf_counter()
+        try:
+            yield
+        except BaseException as error:
+            args['error'] = error.__class__.__name__
+            raise
+        finally:
+            self.add_span(name, started_at, category, **args)
+
+    def export(self):
+        if not self.enabled or not self.events:
+            return
+
+        os.makedirs(os.path.dirname(self.file_path) or '.', exist_ok=True)
+        with open(self.file_path, 'w', encoding='utf-8') as file:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, file)
+
+
+TRACER = Tracer(TRACE_FILE)
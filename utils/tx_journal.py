@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import hashlib
+
+from contextvars import ContextVar
+from utils import networks
+from utils.networks import Network
+
+TX_JOURNAL_DIR = './data/services/tx_journal'
+TX_JOURNAL_TX_TIMEOUT = 360  # Сколько секунд после перезапуска ждать подтверждения транзакции из журнала
+# Записи, после которых средства уже ушли с аккаунта без транзакции в сети
+TX_JOURNAL_OFFCHAIN_SENT = ('cex_withdrawal', 'rhino_withdrawal')
+
+# Аккаунт, шаг маршрута и модуль, к которым относятся записи журнала. Задается в Runner на время модуля
+JOURNAL_STEP: ContextVar[tuple[str, int, str] | None] = ContextVar('journal_step', default=None)
+
+
+def get_network_by_name(network_name: str) -> Network:
+    return next(network for network in vars(networks).values()
+                if isinstance(network, Network) and network.name == network_name)
+
+
+class TxJournal:
+    """
+    Журнал упреждающей записи: хэши транзакций и id внешних операций (своп LayerSwap, вывод Rhino, вывод с биржи)
+    по аккаунту и шагу маршрута. Хэш попадает на диск до отправки транзакции, id операции - сразу после ответа API,
+    поэтому после падения софта шаг продолжается проверкой статуса, а не повторным выполнением модуля.
+
+    У каждого аккаунта свой файл: аккаунт в работе только у одного процесса, поэтому файл пишет один процесс,
+    а тот, кто подхватил аккаунт после падения другого, перечитывает его с диска. Файл удаляется, когда у аккаунта
+    не остается незакрытых шагов.
+    """
+
+    def __init__(self, dir_path: str = TX_JOURNAL_DIR):
+        self.dir_path = dir_path
+        self.steps: dict[tuple, list[dict]] = {}
+        self.loaded_accounts: set[str] = set()
+        self.torn_accounts: set[str] = set()
+
+    def get_file_path(self, account_name: str) -> str:
+        # Имя аккаунта из таблицы может содержать любые символы, хэш сохраняет имена файлов уникальными
+        safe_name = ''.join(char if char.isalnum() or char in '-_' else '_' for char in account_name)[:50]
+        name_hash = hashlib.sha1(account_name.encode()).hexdigest()[:8]
+        return os.path.join(self.dir_path, f'{safe_name}_{name_hash}.jsonl')
+
+    def load(self, account_name, reload: bool = False):
+        account_name = str(account_name)
+        if account_name in self.loaded_accounts and not reload:
+            return
+
+        for key in [key for key in self.steps if key[0] == account_name]:
+            del self.steps[key]
+        self.loaded_accounts.add(account_name)
+        self.torn_accounts.discard(account_name)
+
+        try:
+            with open(self.get_file_path(account_name), 'r') as file:
+                for line in file:
+                    if not line.endswith('\n'):
+                        self.torn_accounts.add(account_name)
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Строка, оборванная при падении
+                        continue
+
+                    key = (entry['account'], entry['step'], entry['module'])
+                    if entry['kind'] == 'closed':
+                        self.steps.pop(key, None)
+                    else:
+                        self.steps.setdefault(key, []).append(entry)
+        except FileNotFoundError:
+            pass
+
+    def write(self, entry: dict):
+        account_name = entry['account']
+        os.makedirs(self.dir_path, exist_ok=True)
+        with open(self.get_file_path(account_name), 'a') as file:
+            # Оборванная строка закрывается, чтобы новая запись не склеилась с ней
+            file.write(('\n' if account_name in self.torn_accounts else '') + json.dumps(entry) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+        self.torn_accounts.discard(account_name)
+
+    @staticmethod
+    def set_step(account_name, step: int, module_name: str):
+        return JOURNAL_STEP.set((str(account_name), step, module_name))
+
+    @staticmethod
+    def reset_step(token):
+        JOURNAL_STEP.reset(token)
+
+    def record(self, kind: str, **data):
+        key = JOURNAL_STEP.get()
+        if key is None:
+            return
+
+        self.load(key[0])
+        entry = {'account': key[0], 'step': key[1], 'module': key[2], 'kind': kind, 'time': time.time()} | data
+        self.write(entry)
+        self.steps.setdefault(key, []).append(entry)
+
+    def get_entries(self) -> list[dict]:
+        key = JOURNAL_STEP.get()
+        if key is None:
+            return []
+
+        self.load(key[0])
+        return list(self.steps.get(key, []))
+
+    def close_step(self, account_name, step: int, module_name: str):
+        account_name = str(account_name)
+        self.load(account_name)
+        if self.steps.pop((account_name, step, module_name), None) is None:
+            return
+
+        if any(key[0] == account_name for key in self.steps):
+            self.write({'account': account_name, 'step': step, 'module': module_name, 'kind': 'closed',
+                        'time': time.time()})
+        else:
+            try:
+                os.remove(self.get_file_path(account_name))
+            except FileNotFoundError:
+                pass
+            self.torn_accounts.discard(account_name)
+
+    def drop_stale_steps(self, account_name, route_modules: list[str], current_step: int):
+        # Шаги, которые уже пройдены или относятся к другому маршруту, больше не продолжаются
+        self.load(account_name)
+        for key in [key for key in self.steps if key[0] == str(account_name)]:
+            _, step, module_name = key
+            if step < current_step or step >= len(route_modules) or route_modules[step] != module_name:
+                self.close_step(*key)
+
+
+TX_JOURNAL = TxJournal()